@@ -0,0 +1,288 @@
+"""Build neo4j-admin import files from a directory of PDFs.
+
+    python -m app.bulk_load --out ./import
+    neo4j-admin database import full neo4j ...   # the command is written to <out>/import.sh
+
+Papers go through the usual extraction and NLP pipeline, but instead of
+MERGE-ing each row into a live database their nodes and relationships are
+written to header-less CSV shards, with one header file per kind. Entities
+shared between papers are written once. A shard's files are renamed into
+place before its papers are recorded in `<out>/bulk_state.sqlite3`, so an
+interrupted run resumes at the first unrecorded paper and rewrites only the
+shard it was building.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+from typing import Any, Dict, List, Set
+
+from .local_db import connect
+from .neo4j_driver import _safe_token
+from .nlp import nlp_config_key
+from . import paper_graphs, papers_manager
+
+# Papers per shard; each shard is one file per kind, committed together
+BULK_SHARD_PAPERS = int(os.getenv("BULK_SHARD_PAPERS", "1000"))
+# neo4j-admin's default array delimiter
+ARRAY_DELIMITER = ";"
+
+HEADERS = {
+    "papers": ["paper_id:ID(Paper)", "title", "filename", "authors", "year", "journal", "upload_date",
+               "content_hash", "nlp_version", "text_length:long", ":LABEL"],
+    "entities": ["id:ID(Entity)", "name", "key", "paper_id", ":LABEL"],
+    "contains": [":START_ID(Paper)", ":END_ID(Entity)", ":TYPE"],
+    "relationships": [":START_ID(Entity)", ":END_ID(Entity)", ":TYPE", "paper_id", "count:int", "weight:float",
+                      "evidence:string[]", "relation"],
+}
+NODE_KINDS = ("papers", "entities")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS papers (
+    paper_id TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    shard INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS entities (id TEXT PRIMARY KEY) WITHOUT ROWID;
+"""
+
+
+def _clean(value: Any) -> str:
+    """One-line text, so the files import without --multiline-fields"""
+    return " ".join(str(value).split()) if value is not None else ""
+
+
+class BulkWriter:
+    """Collects parsed papers into shards of CSV rows and commits them to `out_dir`"""
+
+    def __init__(self, out_dir: str, shard_papers: int = None, local_stores: bool = True):
+        self.out_dir = out_dir
+        self.shard_papers = max(1, shard_papers or BULK_SHARD_PAPERS)
+        self.local_stores = local_stores
+        os.makedirs(out_dir, exist_ok=True)
+        self.state_path = os.path.join(out_dir, "bulk_state.sqlite3")
+        self._db().executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        # Paper ids accepted by this run, queued or already flushed
+        self._claimed: Set[str] = set()
+        self._reset_shard()
+        self.stats = {"papers": 0, "entities": 0, "relationships": 0, "shards": 0, "duplicates": 0}
+
+    def _db(self):
+        return connect(self.state_path)
+
+    def _reset_shard(self):
+        self._rows: Dict[str, List[List[Any]]] = {kind: [] for kind in HEADERS}
+        self._papers: List[Dict[str, Any]] = []
+        self._entities: Set[str] = set()
+
+    def check_config(self, nlp_version: str):
+        """Pin the run to one NLP config; resuming with another would mix outputs"""
+        db = self._db()
+        row = db.execute("SELECT value FROM meta WHERE key = 'nlp_version'").fetchone()
+        if row is None:
+            db.execute("INSERT INTO meta (key, value) VALUES ('nlp_version', ?)", (nlp_version,))
+        elif row["value"] != nlp_version:
+            raise RuntimeError(f"{self.out_dir} was started with NLP config {row['value']}, "
+                               f"not {nlp_version}; use a new --out directory")
+
+    @property
+    def next_shard(self) -> int:
+        row = self._db().execute("SELECT max(shard) AS shard FROM papers").fetchone()
+        return (row["shard"] + 1) if row["shard"] is not None else 0
+
+    def _is_committed(self, paper_id: str) -> bool:
+        return self._db().execute("SELECT 1 FROM papers WHERE paper_id = ?", (paper_id,)).fetchone() is not None
+
+    def is_done(self, content_hash: str) -> bool:
+        """Already committed or accepted by this run"""
+        paper_id = papers_manager.paper_id_for_hash(content_hash)
+        with self._lock:
+            if paper_id in self._claimed:
+                return True
+        return self._is_committed(paper_id)
+
+    def _is_new_entity(self, entity_id: str) -> bool:
+        if entity_id in self._entities:
+            return False
+        if self._db().execute("SELECT 1 FROM entities WHERE id = ?", (entity_id,)).fetchone():
+            return False
+        self._entities.add(entity_id)
+        return True
+
+    def add(self, paper: Dict[str, Any], nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]],
+            sentences: Dict[str, str] = None):
+        """Queue one parsed paper; the shard is written once it is full.
+
+        Returns "skipped" for a paper already accepted or committed: copies of
+        one PDF can both pass is_done() while the first is still being parsed,
+        and a second row with the same :ID would fail the import.
+        """
+        paper_id = paper["paper_id"]
+        with self._lock:
+            if paper_id in self._claimed or self._is_committed(paper_id):
+                self.stats["duplicates"] += 1
+                print(f"Skipping {paper['filename']}: paper {paper_id} is already in the import")
+                return "skipped"
+            self._claimed.add(paper_id)
+        if self.local_stores:
+            try:
+                # Everything but the graph, as normal ingestion writes it (idempotent on a rerun)
+                papers_manager.store_local(paper, sentences)
+                # Edge ids are assigned by the import, so the snapshot is taken on first read
+                paper_graphs.remove_paper(paper_id)
+            except Exception:
+                with self._lock:
+                    self._claimed.discard(paper_id)
+                raise
+        with self._lock:
+            self._papers.append({**paper, "nodes": len(nodes), "edges": len(edges)})
+            self._rows["papers"].append([
+                paper_id, _clean(paper.get("title")), paper["filename"], _clean(paper.get("authors")),
+                _clean(paper.get("year")), _clean(paper.get("journal")), paper.get("upload_date"),
+                paper["content_hash"], paper.get("nlp_version"), paper.get("text_length") or 0, "Paper",
+            ])
+            contained = set()
+            for n in nodes:
+                nid = n.get("id") or n.get("name")
+                if nid in contained:
+                    continue
+                contained.add(nid)
+                self._rows["contains"].append([paper_id, nid, "CONTAINS"])
+                if self._is_new_entity(nid):
+                    label = _safe_token(n.get("type"), "Entity")
+                    self._rows["entities"].append([
+                        nid, _clean(n.get("name")), _clean(n.get("props", {}).get("key")), paper_id,
+                        "Entity" if label == "Entity" else f"Entity;{label}",
+                    ])
+            seen = set()
+            for e in edges:
+                rel = _safe_token(e.get("label"), "RELATED_TO")
+                if (e["source"], e["target"], rel) in seen or not {e["source"], e["target"]} <= contained:
+                    continue
+                seen.add((e["source"], e["target"], rel))
+                props = e.get("props", {})
+                self._rows["relationships"].append([
+                    e["source"], e["target"], rel, paper_id, props.get("count", 1), props.get("weight", 1.0),
+                    ARRAY_DELIMITER.join(props.get("evidence", [])), _clean(props.get("relation")),
+                ])
+            full = len(self._papers) >= self.shard_papers
+        if full:
+            self.flush()
+        return "success"
+
+    def _shard_path(self, kind: str, shard: int, ext: str = "csv") -> str:
+        return os.path.join(self.out_dir, f"{kind}-{shard:05d}.{ext}")
+
+    @staticmethod
+    def _replace(path: str, write):
+        """Write a file under a temporary name and rename it into place"""
+        with open(path + ".tmp", "w", newline="", encoding="utf-8") as f:
+            write(f)
+        os.replace(path + ".tmp", path)
+
+    def flush(self):
+        """Write the current shard's files, then record its papers and entities"""
+        with self._lock:
+            if not self._papers:
+                return
+            shard = self.next_shard
+            for kind, rows in self._rows.items():
+                self._replace(self._shard_path(kind, shard), lambda f: csv.writer(f).writerows(rows))
+            # Companion catalog: the full metadata of each paper, as the papers catalog stores it
+            self._replace(self._shard_path("catalog", shard, "jsonl"), lambda f: f.writelines(
+                json.dumps({**p, "shard": shard}) + "\n" for p in self._papers))
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                db.executemany("INSERT OR REPLACE INTO papers (paper_id, filename, shard) VALUES (?, ?, ?)",
+                               [(p["paper_id"], p["filename"], shard) for p in self._papers])
+                db.executemany("INSERT OR IGNORE INTO entities (id) VALUES (?)", [(i,) for i in self._entities])
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+            self.stats["papers"] += len(self._papers)
+            self.stats["entities"] += len(self._rows["entities"])
+            self.stats["relationships"] += len(self._rows["relationships"])
+            self.stats["shards"] += 1
+            print(f"Shard {shard}: {len(self._papers)} papers, {len(self._rows['entities'])} new entities, "
+                  f"{len(self._rows['relationships'])} relationships")
+            self._reset_shard()
+
+    def write_headers(self):
+        for kind, header in HEADERS.items():
+            with open(os.path.join(self.out_dir, f"{kind}-header.csv"), "w", newline="", encoding="utf-8") as f:
+                csv.writer(f).writerow(header)
+
+    def import_command(self, database: str = "neo4j") -> str:
+        """neo4j-admin invocation loading every shard; run from `out_dir`"""
+        parts = ["neo4j-admin database import full", database, "--overwrite-destination",
+                 f"--array-delimiter='{ARRAY_DELIMITER}'"]
+        for kind in HEADERS:
+            flag = "--nodes" if kind in NODE_KINDS else "--relationships"
+            parts.append(f"{flag}='{kind}-header.csv,{kind}-[0-9]+\\.csv'")
+        return " \\\n  ".join(parts)
+
+    def write_import_script(self, database: str = "neo4j") -> str:
+        path = os.path.join(self.out_dir, "import.sh")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("#!/bin/sh\n# Build a fresh database from these files, then start the app to create the schema\n")
+            f.write('cd "$(dirname "$0")"\n')
+            f.write(self.import_command(database) + "\n")
+        os.chmod(path, 0o755)
+        return path
+
+    def committed_counts(self) -> Dict[str, int]:
+        db = self._db()
+        return {
+            "papers": db.execute("SELECT count(*) AS n FROM papers").fetchone()["n"],
+            "entities": db.execute("SELECT count(*) AS n FROM entities").fetchone()["n"],
+            "shards": self.next_shard,
+        }
+
+
+def bulk_load(papers_dir: str, out_dir: str, workers: int = None, shard_papers: int = None,
+              local_stores: bool = True, database: str = "neo4j") -> Dict[str, Any]:
+    """Process every PDF not yet in `out_dir` and write the import files"""
+    writer = BulkWriter(out_dir, shard_papers, local_stores)
+    writer.check_config(nlp_config_key())
+    writer.write_headers()
+    results = {"success": 0, "skipped": 0, "error": 0}
+    try:
+        for result in papers_manager.iter_process_papers_directory(papers_dir, workers=workers,
+                                                                   store_paper=writer.add,
+                                                                   is_done=writer.is_done):
+            results[result["status"]] += 1
+    finally:
+        # Papers parsed before an interruption still make a (short) shard
+        writer.flush()
+    script = writer.write_import_script(database)
+    return {"run": results, "written": writer.stats, "total": writer.committed_counts(), "import_script": script}
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.bulk_load", description=__doc__.splitlines()[0])
+    parser.add_argument("--papers-dir", default=papers_manager.PAPERS_DIR, help="directory of PDFs")
+    parser.add_argument("--out", required=True, help="directory for the CSV files (reused to resume)")
+    parser.add_argument("--workers", type=int, default=None, help="ingestion worker processes")
+    parser.add_argument("--shard-papers", type=int, default=None, help="papers per shard")
+    parser.add_argument("--database", default="neo4j", help="database name in the import command")
+    parser.add_argument("--no-local-stores", action="store_true",
+                        help="only write the CSVs, not the text store, search index, evidence and catalog")
+    args = parser.parse_args(argv)
+    try:
+        summary = bulk_load(args.papers_dir, args.out, workers=args.workers, shard_papers=args.shard_papers,
+                            local_stores=not args.no_local_stores, database=args.database)
+    except RuntimeError as e:
+        print(e)
+        return 1
+    print(json.dumps(summary, indent=2))
+    return 1 if summary["run"]["error"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
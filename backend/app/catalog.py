@@ -0,0 +1,110 @@
+import json
+import os
+from typing import Any, Dict, Iterator, List, Optional
+
+from .local_db import connect, data_path
+
+# Papers catalog: one row per paper, replacing the papers_index.json rewrite
+PAPERS_CATALOG_PATH = os.getenv("PAPERS_CATALOG_PATH") or data_path("papers_catalog.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+    seq INTEGER PRIMARY KEY,
+    paper_id TEXT NOT NULL UNIQUE,
+    content_hash TEXT,
+    upload_date TEXT,
+    props TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS papers_content_hash ON papers (content_hash);
+"""
+
+_initialized = set()
+
+
+def _db():
+    conn = connect(PAPERS_CATALOG_PATH)
+    if PAPERS_CATALOG_PATH not in _initialized:
+        conn.executescript(_SCHEMA)
+        _initialized.add(PAPERS_CATALOG_PATH)
+    return conn
+
+
+def _upsert(conn, paper: Dict[str, Any]):
+    conn.execute(
+        "INSERT INTO papers (paper_id, content_hash, upload_date, props) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT (paper_id) DO UPDATE SET content_hash = excluded.content_hash, "
+        "upload_date = excluded.upload_date, props = excluded.props",
+        (paper["paper_id"], paper.get("content_hash"), paper.get("upload_date"), json.dumps(paper)),
+    )
+
+
+def upsert_paper(paper: Dict[str, Any]):
+    """Add or replace one paper's metadata in a single transaction"""
+    conn = _db()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        _upsert(conn, paper)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def get_paper(paper_id: str) -> Optional[Dict[str, Any]]:
+    row = _db().execute("SELECT props FROM papers WHERE paper_id = ?", (paper_id,)).fetchone()
+    return json.loads(row["props"]) if row else None
+
+
+def get_by_hash(content_hash: str) -> Optional[Dict[str, Any]]:
+    row = _db().execute("SELECT props FROM papers WHERE content_hash = ? ORDER BY seq DESC LIMIT 1",
+                        (content_hash,)).fetchone()
+    return json.loads(row["props"]) if row else None
+
+
+def count_papers() -> int:
+    return _db().execute("SELECT count(*) AS n FROM papers").fetchone()["n"]
+
+
+def list_papers(offset: int = 0, limit: int = None) -> List[Dict[str, Any]]:
+    """Papers in the order they were added"""
+    rows = _db().execute("SELECT props FROM papers ORDER BY seq LIMIT ? OFFSET ?",
+                         (-1 if limit is None else limit, max(0, offset))).fetchall()
+    return [json.loads(r["props"]) for r in rows]
+
+
+def iter_papers() -> Iterator[Dict[str, Any]]:
+    for row in _db().execute("SELECT props FROM papers ORDER BY seq").fetchall():
+        yield json.loads(row["props"])
+
+
+def remove_paper(paper_id: str):
+    _db().execute("DELETE FROM papers WHERE paper_id = ?", (paper_id,))
+
+
+def migrate_from_json(path: str) -> int:
+    """One-time import of a legacy papers_index.json; the file is renamed afterwards.
+
+    Returns the number of papers imported (0 when there is nothing to migrate).
+    """
+    if not os.path.exists(path):
+        return 0
+    with open(path, 'r') as f:
+        try:
+            papers = json.load(f).get("papers", [])
+        except ValueError:
+            papers = []
+    conn = _db()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Entries already in the catalog are newer than the legacy file
+        conn.executemany(
+            "INSERT OR IGNORE INTO papers (paper_id, content_hash, upload_date, props) VALUES (?, ?, ?, ?)",
+            [(p["paper_id"], p.get("content_hash"), p.get("upload_date"), json.dumps(p))
+             for p in papers if p.get("paper_id")],
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    os.replace(path, path + ".migrated")
+    return len(papers)
@@ -0,0 +1,174 @@
+import heapq
+import re
+import threading
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Optional
+
+# Keys examined per fuzzy lookup, which bounds its latency on large indexes
+_FUZZY_SCAN_LIMIT = 5000
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_name(name: str) -> str:
+    """Case- and whitespace-insensitive form used as the index key"""
+    return _SPACE_RE.sub(" ", (name or "").casefold()).strip()
+
+
+def _within_distance(a: str, b: str, max_dist: int) -> bool:
+    """Levenshtein distance between a and b is at most max_dist (banded DP)"""
+    if abs(len(a) - len(b)) > max_dist:
+        return False
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i] + [0] * len(b)
+        lo = max(1, i - max_dist)
+        hi = min(len(b), i + max_dist)
+        if lo > 1:
+            cur[lo - 1] = max_dist + 1
+        for j in range(lo, hi + 1):
+            cost = 0 if ca == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+        for j in range(hi + 1, len(b) + 1):
+            cur[j] = max_dist + 1
+        if min(cur[lo - 1:hi + 1]) > max_dist:
+            return False
+        prev = cur
+    return prev[len(b)] <= max_dist
+
+
+class EntityNameIndex:
+    """Sorted array of normalized entity names for prefix and fuzzy lookups.
+
+    Every word start of a name is a key, so "graph" suggests "knowledge graph".
+    Entries remember which papers mention them and are ranked by that count.
+    """
+
+    def __init__(self):
+        self._keys: List[tuple] = []  # (normalized suffix, entity id), sorted
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _upsert(self, entity_id: str, name: str, entity_type: str = None,
+                paper_ids: Iterable[str] = ()) -> List[tuple]:
+        """Record an entity; returns the keys to insert when it is new"""
+        norm = normalize_name(name)
+        if not entity_id or not norm:
+            return []
+        keys = []
+        entry = self._entries.get(entity_id)
+        if entry is None:
+            entry = {"id": entity_id, "name": name, "type": entity_type or "Entity",
+                     "norm": norm, "papers": set()}
+            self._entries[entity_id] = entry
+            starts = [0] + [m.end() for m in re.finditer(" ", norm)]
+            keys = [(norm[start:], entity_id) for start in starts]
+        entry["papers"].update(p for p in paper_ids if p)
+        return keys
+
+    def add(self, entity_id: str, name: str, entity_type: str = None,
+            paper_ids: Iterable[str] = ()):
+        with self._lock:
+            for key in self._upsert(entity_id, name, entity_type, paper_ids):
+                insort(self._keys, key)
+
+    def add_many(self, rows: Iterable[tuple]):
+        """Add (id, name, type, paper ids) rows, sorting the keys once instead of per entity"""
+        with self._lock:
+            keys = []
+            for row in rows:
+                keys.extend(self._upsert(*row))
+            if keys:
+                self._keys.extend(keys)
+                self._keys.sort()
+
+    def build(self, rows: Iterable[tuple]):
+        """Replace the index with (id, name, type, paper ids) rows.
+
+        The new index is built aside and swapped in, so lookups keep being
+        answered from the old one while the rows are read.
+        """
+        fresh = EntityNameIndex()
+        fresh.add_many(rows)
+        with self._lock:
+            self._keys, self._entries = fresh._keys, fresh._entries
+
+    def add_nodes(self, nodes: List[Dict[str, Any]], paper_id: str = None):
+        """Index graph nodes as written by the upsert functions"""
+        for n in nodes:
+            self.add(n.get("id") or n.get("name"), n.get("name"), n.get("type"),
+                     [paper_id] if paper_id else ())
+
+    def clear(self):
+        with self._lock:
+            self._keys = []
+            self._entries = {}
+
+    @staticmethod
+    def _public(entry: Dict[str, Any]) -> Dict[str, Any]:
+        return {"id": entry["id"], "name": entry["name"], "type": entry["type"],
+                "paper_count": len(entry["papers"])}
+
+    def _rank(self, ids: Iterable[str], limit: int, types: Optional[set]) -> List[Dict[str, Any]]:
+        entries = (self._entries[i] for i in ids)
+        if types:
+            entries = (e for e in entries if e["type"] in types)
+        best = heapq.nlargest(limit, entries, key=lambda e: (len(e["papers"]), -len(e["norm"])))
+        return [self._public(e) for e in best]
+
+    def prefix(self, query: str, limit: int = 10, types: Optional[set] = None) -> List[Dict[str, Any]]:
+        """Entities with a word starting with `query`, most-mentioned first"""
+        q = normalize_name(query)
+        if not q:
+            return []
+        with self._lock:
+            ids = set()
+            i = bisect_left(self._keys, (q,))
+            while i < len(self._keys) and self._keys[i][0].startswith(q):
+                ids.add(self._keys[i][1])
+                i += 1
+            return self._rank(ids, limit, types)
+
+    def fuzzy(self, query: str, limit: int = 10, types: Optional[set] = None,
+              max_dist: int = None) -> List[Dict[str, Any]]:
+        """Entities whose word prefix is within a small edit distance of `query`"""
+        q = normalize_name(query)
+        if len(q) < 3:
+            return []
+        if max_dist is None:
+            max_dist = 1 if len(q) < 8 else 2
+        with self._lock:
+            ids = set()
+            # Typos are assumed not to hit the first character, which bounds the scan
+            i = bisect_left(self._keys, (q[0],))
+            scanned = 0
+            while i < len(self._keys) and self._keys[i][0].startswith(q[0]) and scanned < _FUZZY_SCAN_LIMIT:
+                key, eid = self._keys[i]
+                head = key[:len(q)]
+                # Cheap reject before the DP: too many characters of q missing from head
+                if len(set(q) - set(head)) <= max_dist and _within_distance(q, head, max_dist):
+                    ids.add(eid)
+                i += 1
+                scanned += 1
+            return self._rank(ids, limit, types)
+
+    def suggest(self, query: str, limit: int = 10, types: Optional[set] = None) -> List[Dict[str, Any]]:
+        """Prefix matches, topped up with fuzzy matches when there are too few"""
+        results = self.prefix(query, limit, types)
+        if len(results) < limit:
+            seen = {r["id"] for r in results}
+            results += [r for r in self.fuzzy(query, limit, types) if r["id"] not in seen][:limit - len(results)]
+        return results
+
+
+_index: Optional[EntityNameIndex] = None
+
+
+def get_entity_index() -> EntityNameIndex:
+    global _index
+    if _index is None:
+        _index = EntityNameIndex()
+    return _index
@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+import re
+import unicodedata
+from typing import Dict, Optional, Tuple
+
+from .entity_index import normalize_name
+
+# Optional JSON object mapping alias names to canonical names,
+# e.g. {"NYC": "New York City", "convolutional neural nets": "CNN"}
+ENTITY_ALIASES_PATH = os.getenv("ENTITY_ALIASES_PATH")
+
+# Proper names and quantities are never singularized ("Athens", "10 years")
+PLURAL_EXEMPT_TYPES = frozenset(
+    "PERSON GPE LOC FAC DATE TIME PERCENT MONEY QUANTITY ORDINAL CARDINAL".split()
+)
+
+_EDGE_PUNCT = "\"'`“”‘’()[]{}<>.,;:!?"
+_ACRONYM_PLURAL_RE = re.compile(r"^[A-Z0-9]{2,}s$")
+
+_aliases: Optional[Dict[str, str]] = None
+
+
+def _clean(name: str) -> str:
+    """Unicode-normalized, whitespace-collapsed surface form without wrapping punctuation"""
+    name = unicodedata.normalize("NFKC", name or "")
+    return " ".join(name.split()).strip(_EDGE_PUNCT + " ")
+
+
+def _singular(word: str, original: str) -> str:
+    """Conservative English singular of one lowercased word"""
+    if _ACRONYM_PLURAL_RE.match(original):
+        return word[:-1]
+    if len(word) <= 3 or not word.endswith("s"):
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith(("sses", "ches", "shes", "xes")):
+        return word[:-2]
+    if word.endswith(("ss", "us", "is", "os")):
+        return word
+    return word[:-1]
+
+
+def _base_key(name: str, entity_type: str = None) -> str:
+    cleaned = _clean(name)
+    key = normalize_name(cleaned)
+    if key.startswith("the "):
+        key = key[4:]
+    if key and (entity_type or "").upper() not in PLURAL_EXEMPT_TYPES:
+        words = key.split(" ")
+        originals = cleaned.split(" ")
+        words[-1] = _singular(words[-1], originals[-1] if originals else words[-1])
+        key = " ".join(words)
+    return key
+
+
+def _index_aliases(raw: Dict[str, str]) -> Dict[str, str]:
+    aliases = {}
+    for alias, canonical in raw.items():
+        aliases[normalize_name(_clean(alias))] = canonical
+        aliases.setdefault(_base_key(alias), canonical)
+    return aliases
+
+
+def load_aliases(path: str = None) -> Dict[str, str]:
+    """Read the alias table, keyed by normalized alias; values are canonical display names"""
+    path = path or ENTITY_ALIASES_PATH
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return _index_aliases(json.load(f))
+
+
+def get_aliases() -> Dict[str, str]:
+    global _aliases
+    if _aliases is None:
+        _aliases = load_aliases()
+    return _aliases
+
+
+def set_aliases(aliases: Dict[str, str]):
+    """Replace the alias table (alias -> canonical name)"""
+    global _aliases
+    _aliases = _index_aliases(aliases)
+
+
+def aliases_fingerprint() -> str:
+    """Short digest of the alias table, part of the NLP cache key"""
+    aliases = get_aliases()
+    if not aliases:
+        return ""
+    return hashlib.sha1(json.dumps(aliases, sort_keys=True).encode("utf-8")).hexdigest()[:8]
+
+
+def _lookup_alias(name: str, entity_type: str = None) -> Optional[str]:
+    aliases = get_aliases()
+    if not aliases:
+        return None
+    return aliases.get(normalize_name(_clean(name))) or aliases.get(_base_key(name, entity_type))
+
+
+def canonical_key(name: str, entity_type: str = None) -> str:
+    """Resolution key: case, whitespace, a leading "the", plurals and aliases folded"""
+    return _base_key(_lookup_alias(name, entity_type) or name, entity_type)
+
+
+def entity_id(key: str, entity_type: str = None) -> str:
+    """Deterministic node id for a resolved entity, the same in every paper"""
+    digest = hashlib.sha1(f"{(entity_type or 'Entity').upper()}\x1f{key}".encode("utf-8")).hexdigest()
+    return f"ent-{digest[:16]}"
+
+
+def resolve(name: str, entity_type: str = None) -> Tuple[str, str, str]:
+    """(entity id, resolution key, display name) for one mention"""
+    alias = _lookup_alias(name, entity_type)
+    key = _base_key(alias or name, entity_type)
+    return entity_id(key, entity_type), key, alias or _clean(name)
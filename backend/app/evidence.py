@@ -0,0 +1,65 @@
+import os
+from typing import Dict, Iterable
+
+from .local_db import connect, data_path
+
+EVIDENCE_PATH = os.getenv("EVIDENCE_PATH") or data_path("evidence.sqlite3")
+
+# Evidence sentences cited by co-occurrence edges, stored once per paper and
+# referenced from edges by sentence id
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sentences (
+    paper_id TEXT NOT NULL,
+    sentence_id TEXT NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (paper_id, sentence_id)
+) WITHOUT ROWID;
+"""
+
+_IN_CHUNK = 500
+
+_initialized = set()
+
+
+def _db():
+    conn = connect(EVIDENCE_PATH)
+    if EVIDENCE_PATH not in _initialized:
+        conn.executescript(_SCHEMA)
+        _initialized.add(EVIDENCE_PATH)
+    return conn
+
+
+def save_sentences(paper_id: str, sentences: Dict[str, str]):
+    """Replace a paper's evidence sentences"""
+    conn = _db()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("DELETE FROM sentences WHERE paper_id = ?", (paper_id,))
+        conn.executemany(
+            "INSERT INTO sentences (paper_id, sentence_id, text) VALUES (?, ?, ?)",
+            ((paper_id, sid, text) for sid, text in sentences.items()),
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def get_sentences(paper_id: str, sentence_ids: Iterable[str]) -> Dict[str, str]:
+    """Text of the given evidence sentences of one paper, by id"""
+    ids = list(dict.fromkeys(sentence_ids))
+    found = {}
+    conn = _db()
+    for i in range(0, len(ids), _IN_CHUNK):
+        chunk = ids[i:i + _IN_CHUNK]
+        marks = ",".join("?" * len(chunk))
+        for row in conn.execute(
+            f"SELECT sentence_id, text FROM sentences WHERE paper_id = ? AND sentence_id IN ({marks})",
+            [paper_id, *chunk],
+        ):
+            found[row["sentence_id"]] = row["text"]
+    return found
+
+
+def remove_paper(paper_id: str):
+    _db().execute("DELETE FROM sentences WHERE paper_id = ?", (paper_id,))
@@ -0,0 +1,349 @@
+import heapq
+import os
+import threading
+from array import array
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+GRAPH_CACHE_ENABLED = os.getenv("GRAPH_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+# Edges buffered since the last rebuild before the CSR arrays are recompacted
+GRAPH_CACHE_COMPACT_THRESHOLD = int(os.getenv("GRAPH_CACHE_COMPACT_THRESHOLD", "50000"))
+
+_OUT = 1
+_IN = 0
+# Accumulated weights are positive; at or below this every edge of the pair was removed
+_EMPTY = 1e-6
+
+
+class GraphCache:
+    """Read-side copy of the entity graph as a compact CSR adjacency.
+
+    Entities are numbered 0..n-1. For node i, adjacency entries live in
+    nbrs[indptr[i]:indptr[i+1]] with parallel arrays for the accumulated
+    weight, relationship type and direction, sorted by (neighbour, type,
+    direction). A pair linked by several relationship types or in both
+    directions has one entry for each, and every edge is reachable from both
+    ends. Writes after a rebuild go to a small delta map that is merged
+    into the arrays once it grows past GRAPH_CACHE_COMPACT_THRESHOLD.
+    Removed edges are negative deltas; an entry whose weight drops to zero is
+    skipped by reads and dropped on the next compaction.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.loaded = False
+        self._ids: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._types: List[str] = []
+        self._rel_types: List[str] = []
+        self._rel_index: Dict[str, int] = {}
+        self._reset_arrays()
+        self._delta: Dict[int, Dict[Tuple[int, int, int], float]] = {}
+        self._delta_edges = 0
+
+    def _reset_arrays(self):
+        self._indptr = array("q", [0])
+        self._nbrs = array("i")
+        self._weights = array("f")
+        self._rels = array("H")
+        self._dirs = array("b")
+        # Distinct neighbours per node in the arrays
+        self._degrees = array("i")
+
+    # -- building -------------------------------------------------------
+
+    def _node(self, node_id: str, name: str = None, node_type: str = None) -> int:
+        i = self._index.get(node_id)
+        if i is None:
+            i = len(self._ids)
+            self._index[node_id] = i
+            self._ids.append(node_id)
+            self._names.append(name or node_id)
+            self._types.append(node_type or "Entity")
+        else:
+            if name:
+                self._names[i] = name
+            if node_type:
+                self._types[i] = node_type
+        return i
+
+    def _rel(self, label: str) -> int:
+        r = self._rel_index.get(label)
+        if r is None:
+            r = len(self._rel_types)
+            self._rel_index[label] = r
+            self._rel_types.append(label)
+        return r
+
+    def _adjacency(self) -> Dict[int, Dict[Tuple[int, int, int], float]]:
+        """Current CSR contents plus delta as nested dicts (used for rebuilding)"""
+        adj: Dict[int, Dict[Tuple[int, int, int], float]] = {}
+        for i in range(len(self._indptr) - 1):
+            row = adj.setdefault(i, {})
+            for k in range(self._indptr[i], self._indptr[i + 1]):
+                row[self._key(k)] = self._weights[k]
+        for i, row in self._delta.items():
+            target = adj.setdefault(i, {})
+            for key, w in row.items():
+                target[key] = target.get(key, 0.0) + w
+        return adj
+
+    def _compact(self, adj: Dict[int, Dict[Tuple[int, int, int], float]]):
+        self._reset_arrays()
+        for i in range(len(self._ids)):
+            row = adj.get(i, {})
+            last = None
+            degree = 0
+            for key in sorted(row):
+                w = row[key]
+                if w <= _EMPTY:
+                    continue
+                j, rel, d = key
+                self._nbrs.append(j)
+                self._weights.append(w)
+                self._rels.append(rel)
+                self._dirs.append(d)
+                degree += j != last
+                last = j
+            self._indptr.append(len(self._nbrs))
+            self._degrees.append(degree)
+        self._delta = {}
+        self._delta_edges = 0
+
+    def build(self, nodes: Iterable[Tuple[str, str, str]], edges: Iterable[Tuple[str, str, str, float]]):
+        """Replace the cache with (id, name, type) nodes and (src, tgt, type, weight) edges"""
+        with self._lock:
+            self._ids, self._index, self._names, self._types = [], {}, [], []
+            self._rel_types, self._rel_index = [], {}
+            self._delta, self._delta_edges = {}, 0
+            for node_id, name, node_type in nodes:
+                self._node(node_id, name, node_type)
+            adj: Dict[int, Dict[Tuple[int, int, int], float]] = {}
+            for src, tgt, label, weight in edges:
+                self._accumulate(adj, src, tgt, label, weight)
+            self._compact(adj)
+            self.loaded = True
+
+    def _accumulate(self, adj, src: str, tgt: str, label: str, weight: float):
+        a = self._node(src)
+        b = self._node(tgt)
+        if a == b:
+            return
+        rel = self._rel(label or "RELATED_TO")
+        for x, y, d in ((a, b, _OUT), (b, a, _IN)):
+            row = adj.setdefault(x, {})
+            row[(y, rel, d)] = row.get((y, rel, d), 0.0) + weight
+
+    def add_nodes(self, nodes: List[Dict[str, Any]]):
+        with self._lock:
+            for n in nodes:
+                self._node(n.get("id") or n.get("name"), n.get("name"), n.get("type"))
+
+    def _apply(self, edges: List[Dict[str, Any]], sign: float):
+        with self._lock:
+            for e in edges:
+                if sign < 0 and not (e["source"] in self._index and e["target"] in self._index):
+                    continue
+                weight = float(e.get("props", {}).get("weight", 1) or 1)
+                self._accumulate(self._delta, e["source"], e["target"], e.get("label"), sign * weight)
+                self._delta_edges += 1
+            if self._delta_edges >= GRAPH_CACHE_COMPACT_THRESHOLD:
+                self._compact(self._adjacency())
+
+    def add_edges(self, edges: List[Dict[str, Any]]):
+        self._apply(edges, 1.0)
+
+    def remove_edges(self, edges: List[Dict[str, Any]]):
+        """Take back edges added earlier, e.g. a re-ingested paper's previous edges"""
+        self._apply(edges, -1.0)
+
+    # -- reading --------------------------------------------------------
+
+    def _key(self, k: int) -> Tuple[int, int, int]:
+        return self._nbrs[k], self._rels[k], self._dirs[k]
+
+    def _neighbors(self, i: int) -> Iterable[Tuple[int, float, int, int]]:
+        """(neighbour, weight, rel type, direction) for node i, one per adjacency entry"""
+        delta = self._delta.get(i, {})
+        for k in range(self._indptr[i], self._indptr[i + 1]) if i < len(self._indptr) - 1 else ():
+            key = self._key(k)
+            w = self._weights[k] + delta.get(key, 0.0)
+            if w > _EMPTY:
+                yield key[0], w, key[1], key[2]
+        for key, w in delta.items():
+            if w > _EMPTY and not self._in_csr(i, key):
+                yield key[0], w, key[1], key[2]
+
+    def _neighbor_weights(self, i: int) -> Dict[int, float]:
+        """Total weight to each neighbour of node i over all relationship types"""
+        weights: Dict[int, float] = {}
+        for j, w, _, _ in self._neighbors(i):
+            weights[j] = weights.get(j, 0.0) + w
+        return weights
+
+    def _csr_position(self, i: int, key: Tuple[int, int, int]) -> int:
+        """Index of the (neighbour, rel type, direction) entry in node i's CSR row, or -1"""
+        if i >= len(self._indptr) - 1:
+            return -1
+        lo, hi = self._indptr[i], self._indptr[i + 1]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < self._indptr[i + 1] and self._key(lo) == key else -1
+
+    def _in_csr(self, i: int, key: Tuple[int, int, int]) -> bool:
+        return self._csr_position(i, key) >= 0
+
+    def degree(self, i: int) -> int:
+        """Distinct neighbours of node i"""
+        if i not in self._delta:
+            return self._degrees[i] if i < len(self._degrees) else 0
+        return len(self._neighbor_weights(i))
+
+    def _node_dict(self, i: int) -> Dict[str, Any]:
+        return {
+            "id": self._ids[i],
+            "label": self._names[i],
+            "type": self._types[i],
+            "props": {"id": self._ids[i], "name": self._names[i], "degree": self.degree(i)},
+        }
+
+    def _edges_among(self, selected: Iterable[int]) -> List[Dict[str, Any]]:
+        chosen = set(selected)
+        edges = []
+        for i in chosen:
+            for j, w, rel, d in self._neighbors(i):
+                if d == _OUT and j in chosen:
+                    src, tgt = self._ids[i], self._ids[j]
+                    label = self._rel_types[rel]
+                    edges.append({
+                        "id": f"{src}|{label}|{tgt}",
+                        "source": src,
+                        "target": tgt,
+                        "label": label,
+                        "props": {"weight": w},
+                    })
+        return edges
+
+    def contains(self, node_id: str) -> bool:
+        return node_id in self._index
+
+    def expand(self, center_id: str, depth: int = 1, limit: int = 100,
+               rank: str = "degree") -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Breadth-first neighbourhood of center_id, best-ranked neighbours first.
+
+        rank is "degree" (most connected neighbours) or "weight" (strongest
+        edges to the node being expanded). At most `limit` nodes are returned.
+        """
+        with self._lock:
+            c = self._index.get(center_id)
+            if c is None:
+                return [], []
+            order = [c]
+            seen = {c}
+            frontier = [c]
+            for _ in range(max(1, depth)):
+                nxt = []
+                for i in frontier:
+                    candidates = [(j, w) for j, w in self._neighbor_weights(i).items() if j not in seen]
+                    if rank == "weight":
+                        candidates.sort(key=lambda jw: jw[1], reverse=True)
+                    else:
+                        candidates.sort(key=lambda jw: self.degree(jw[0]), reverse=True)
+                    for j, _ in candidates:
+                        if len(order) >= limit:
+                            break
+                        seen.add(j)
+                        order.append(j)
+                        nxt.append(j)
+                    if len(order) >= limit:
+                        break
+                frontier = nxt
+                if not frontier or len(order) >= limit:
+                    break
+            return [self._node_dict(i) for i in order], self._edges_among(order)
+
+    def top_neighbors(self, node_id: str, limit: int = 10, rank: str = "weight") -> List[Dict[str, Any]]:
+        with self._lock:
+            i = self._index.get(node_id)
+            if i is None:
+                return []
+            key = (lambda t: t[1]) if rank == "weight" else (lambda t: self.degree(t[0]))
+            best = heapq.nlargest(limit, self._neighbor_weights(i).items(), key=key)
+            return [{**self._node_dict(j), "weight": w} for j, w in best]
+
+    def shortest_path(self, source_id: str, target_id: str,
+                      max_depth: int = 6) -> Optional[Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]]:
+        """Unweighted shortest path via bidirectional BFS; None when unreachable"""
+        with self._lock:
+            s = self._index.get(source_id)
+            t = self._index.get(target_id)
+            if s is None or t is None:
+                return None
+            if s == t:
+                return [self._node_dict(s)], []
+            parents = {s: None}
+            children = {t: None}
+            front, back = deque([s]), deque([t])
+            meet = None
+            for _ in range(max_depth):
+                # Expand the smaller side
+                if len(front) > len(back):
+                    front, back = back, front
+                    parents, children = children, parents
+                for _ in range(len(front)):
+                    i = front.popleft()
+                    for j, _, _, _ in self._neighbors(i):
+                        if j in parents:
+                            continue
+                        parents[j] = i
+                        if j in children:
+                            meet = j
+                            break
+                        front.append(j)
+                    if meet is not None:
+                        break
+                if meet is not None or not front:
+                    break
+            if meet is None:
+                return None
+            half_a, half_b = [], []
+            i = meet
+            while i is not None:
+                half_a.append(i)
+                i = parents[i]
+            i = children[meet]
+            while i is not None:
+                half_b.append(i)
+                i = children[i]
+            path = list(reversed(half_a)) + half_b
+            if path[0] != s:
+                path.reverse()
+            return [self._node_dict(i) for i in path], self._edges_among(path)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": GRAPH_CACHE_ENABLED,
+                "loaded": self.loaded,
+                "nodes": len(self._ids),
+                "adjacency_entries": len(self._nbrs),
+                "pending_edges": self._delta_edges,
+            }
+
+
+_cache: Optional[GraphCache] = None
+
+
+def get_graph_cache() -> Optional[GraphCache]:
+    """The process-wide cache, or None when GRAPH_CACHE_ENABLED is off"""
+    global _cache
+    if not GRAPH_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        _cache = GraphCache()
+    return _cache
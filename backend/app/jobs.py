@@ -0,0 +1,173 @@
+import os
+import queue
+import threading
+import traceback
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+# Background worker threads and the maximum number of jobs waiting for one
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "32"))
+# Finished jobs kept for status lookups before the oldest are forgotten
+JOB_HISTORY = int(os.getenv("JOB_HISTORY", "500"))
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity"""
+
+
+class Job:
+    """A unit of background work and its observable state"""
+
+    def __init__(self, kind: str, fn: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]):
+        self.id = str(uuid.uuid4())
+        self.kind = kind
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.status = QUEUED
+        self.progress: Dict[str, Any] = {"done": 0, "total": None, "message": None}
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now().isoformat()
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+
+    def update_progress(self, done: int = None, total: int = None, message: str = None):
+        """Called by the job function to report how far it has got"""
+        if done is not None:
+            self.progress["done"] = done
+        if total is not None:
+            self.progress["total"] = total
+        if message is not None:
+            self.progress["message"] = message
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        data = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": dict(self.progress),
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if include_result:
+            data["result"] = self.result
+        return data
+
+
+class JobManager:
+    """In-process worker pool fed by a bounded queue.
+
+    Job functions receive the Job as their first argument so they can report
+    progress. submit() never blocks: when the queue is full it raises
+    QueueFullError so callers can push back on clients.
+    """
+
+    def __init__(self, workers: int = None, queue_size: int = None, history: int = None):
+        self.workers = workers or JOB_WORKERS
+        self.history = history or JOB_HISTORY
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size or JOB_QUEUE_SIZE)
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._stopping = threading.Event()
+
+    def start(self):
+        if self._threads:
+            return
+        self._stopping.clear()
+        for i in range(self.workers):
+            t = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def shutdown(self, wait: bool = False):
+        self._stopping.set()
+        for _ in self._threads:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break
+        if wait:
+            for t in self._threads:
+                t.join()
+        self._threads = []
+
+    def submit(self, kind: str, fn: Callable[..., Any], *args, **kwargs) -> Job:
+        job = Job(kind, fn, args, kwargs)
+        with self._lock:
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                raise QueueFullError(f"Job queue is full ({self._queue.maxsize} waiting)")
+            self._jobs[job.id] = job
+            self._prune()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def stats(self) -> Dict[str, int]:
+        counts = {QUEUED: 0, RUNNING: 0, SUCCEEDED: 0, FAILED: 0}
+        for job in self.list():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        counts["queue_capacity"] = self._queue.maxsize
+        counts["workers"] = self.workers
+        return counts
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond the history limit"""
+        finished = [jid for jid, j in self._jobs.items() if j.status in (SUCCEEDED, FAILED)]
+        for jid in finished[:max(0, len(finished) - self.history)]:
+            del self._jobs[jid]
+
+    def _work(self):
+        while not self._stopping.is_set():
+            job = self._queue.get()
+            if job is None:
+                break
+            job.status = RUNNING
+            job.started_at = datetime.now().isoformat()
+            try:
+                job.result = job.fn(job, *job.args, **job.kwargs)
+                job.status = SUCCEEDED
+            except Exception as e:
+                traceback.print_exc()
+                job.error = str(e)
+                job.status = FAILED
+            finally:
+                job.finished_at = datetime.now().isoformat()
+                job.fn = job.args = job.kwargs = None
+
+
+_manager: Optional[JobManager] = None
+
+
+def get_job_manager() -> JobManager:
+    global _manager
+    if _manager is None:
+        _manager = JobManager()
+        _manager.start()
+    return _manager
+
+
+def shutdown_job_manager():
+    global _manager
+    if _manager:
+        _manager.shutdown()
+        _manager = None
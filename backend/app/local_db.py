@@ -0,0 +1,33 @@
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+# Directory for embedded local stores (search index, catalogs, caches)
+DATA_DIR = os.getenv("DATA_DIR", "./data")
+
+_local = threading.local()
+
+
+def data_path(filename: str) -> str:
+    """Path of a file inside DATA_DIR, creating the directory if needed"""
+    Path(DATA_DIR).mkdir(parents=True, exist_ok=True)
+    return os.path.join(DATA_DIR, filename)
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """Per-thread SQLite connection in WAL mode, so readers never block the writer"""
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(path)
+    if conn is None:
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        conns[path] = conn
+    return conn
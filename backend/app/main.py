@@ -1,23 +1,49 @@
+import json
 import os
-from fastapi import FastAPI, UploadFile, File, HTTPException
-from fastapi.responses import JSONResponse
+import threading
+import time
+
+# Cold-start clock: everything below, including the app's own imports, is measured
+_import_started = time.perf_counter()
+
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pathlib import Path
+from typing import Any, Dict, Optional
 import uuid
 from dotenv import load_dotenv
 
 load_dotenv()
 
-from .pdf_utils import extract_text_from_pdf
-from .nlp import process_text_to_graph
-from .neo4j_driver import (upsert_graph, upsert_paper, upsert_graph_with_paper, 
-                          get_graph, get_subgraph, search_papers, search_entities, 
-                          get_papers_by_entity, get_graph_by_search)
-from .papers_manager import (get_preloaded_papers, add_paper_to_collection, 
-                           process_papers_directory, initialize_demo_papers)
+from .pdf_utils import iter_pdf_pages
+from .nlp import process_text_to_graph, warm_up, model_status
+from .storage import get_store, aclose_store, load_entity_index, load_graph_cache
+from .entity_index import get_entity_index
+from .graph_cache import get_graph_cache
+from .query_cache import acached, get_query_cache
+from .papers_manager import (get_papers_page, add_paper_to_collection, 
+                           iter_process_papers_directory, list_pdf_files, initialize_demo_papers)
+from . import evidence, metrics, text_store
+from .jobs import get_job_manager, shutdown_job_manager, QueueFullError, Job
+
+# Seconds from the start of this module's imports to each startup phase
+cold_start = {"import": round(time.perf_counter() - _import_started, 3)}
+# Result of the startup schema bootstrap; None until it has run or when the store needs none
+schema_status: Optional[Dict[str, Any]] = None
 
+# Load the spaCy model in a background thread at startup instead of on the first request
+NLP_WARMUP = os.getenv("NLP_WARMUP", "true").lower() in ("1", "true", "yes")
 UPLOAD_DIR = os.getenv("UPLOAD_DIR", "./uploads")
 Path(UPLOAD_DIR).mkdir(parents=True, exist_ok=True)
+# Uploads are copied to disk in chunks of this size; 0 disables the size limit
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(200 * 1024 * 1024)))
+# Largest page /graph/page serves, and NDJSON lines per chunk written by /graph/export
+GRAPH_PAGE_MAX = int(os.getenv("GRAPH_PAGE_MAX", "5000"))
+EXPORT_CHUNK_LINES = int(os.getenv("EXPORT_CHUNK_LINES", "500"))
+# Default nodes per page of /papers/{id}/graph
+PAPER_GRAPH_PAGE = int(os.getenv("PAPER_GRAPH_PAGE", "500"))
 
 app = FastAPI(title="Research KG Backend")
 app.add_middleware(
@@ -28,63 +54,274 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+_route_templates = {}
+
+
+def _route_template(request: Request) -> str:
+    """Path template of the matched route, so metrics are not labelled per id"""
+    endpoint = request.scope.get("endpoint")
+    if endpoint is None:
+        return "unmatched"
+    if not _route_templates:
+        for route in app.routes:
+            if getattr(route, "endpoint", None) is not None:
+                _route_templates[route.endpoint] = route.path
+    return _route_templates.get(endpoint, "unmatched")
+
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    if not metrics.METRICS_ENABLED:
+        return await call_next(request)
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        metrics.observe_request(request.method, _route_template(request), status, time.perf_counter() - started)
+
+
+metrics.register_gauge("kg_cold_start_seconds", "Seconds from process import to each startup phase",
+                       lambda: dict(cold_start), label="phase")
+metrics.register_gauge("kg_jobs", "Background jobs by status",
+                       lambda: {k: v for k, v in get_job_manager().stats().items()
+                                if k not in ("queue_capacity", "workers")}, label="status")
+metrics.register_gauge("kg_jobs_queue_capacity", "Background jobs that can wait in the queue",
+                       lambda: {"": get_job_manager().stats()["queue_capacity"]})
+metrics.register_gauge("kg_job_workers", "Background job worker threads",
+                       lambda: {"": get_job_manager().stats()["workers"]})
+metrics.register_gauge("kg_query_cache", "Query-result cache counters and size",
+                       lambda: {k: v for k, v in get_query_cache().stats().items()
+                                if isinstance(v, (int, float)) and not isinstance(v, bool)}, label="stat")
+
+
+def submit_job(kind: str, fn, *args, **kwargs):
+    """Queue background work and return its id, or 429 when the queue is full"""
+    try:
+        job = get_job_manager().submit(kind, fn, *args, **kwargs)
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+    return JSONResponse({"job_id": job.id, "status": job.status}, status_code=202)
+
+
+def _initialize_job(job: Job):
+    global schema_status
+    try:
+        schema_status = get_store().ensure_schema()
+    except Exception as e:
+        schema_status = {"error": str(e), "missing": ["schema"]}
+        print(f"Warning: Could not create the graph schema: {e}")
+    try:
+        print(f"Loaded {load_entity_index()} entities into the name index")
+    except Exception as e:
+        print(f"Warning: Could not load entity index: {e}")
+    if get_graph_cache() is not None:
+        try:
+            print(f"Graph cache loaded: {load_graph_cache()}")
+        except Exception as e:
+            print(f"Warning: Could not load graph cache: {e}")
+    initialize_demo_papers()
+    return {"count": get_papers_page(limit=1)["total"]}
+
+
+def _warm_up_models():
+    status = warm_up()
+    if not status["loaded"]:
+        return
+    cold_start["models"] = round(time.perf_counter() - _import_started, 3)
+    print(f"Models ready: spaCy '{status['model']}' loaded in {status['load_seconds']}s, "
+          f"{cold_start['models']}s after start")
+
+
+def _upload_job(job: Job, file_id: str, path: str):
+    job.update_progress(message="extracting text")
+    # Only the pages needed for the snippet are extracted
+    snippet = ""
+    for page in iter_pdf_pages(path):
+        snippet += page
+        if len(snippet) >= 1000:
+            break
+    return {"file_id": file_id, "text_snippet": snippet[:1000]}
+
+
+def _process_text_job(job: Job, text: str):
+    job.update_progress(message="extracting entities")
+    sentences = {}
+    nodes, edges = process_text_to_graph(text, sentences=sentences)
+    job.update_progress(message="writing graph")
+    get_store().upsert_graph(nodes, edges)
+    return {"nodes": nodes, "edges": edges, "sentences": sentences}
+
+
+def _process_directory_job(job: Job):
+    job.update_progress(done=0, total=len(list_pdf_files()))
+    results = []
+    for result in iter_process_papers_directory():
+        results.append(result)
+        job.update_progress(done=len(results), message=result["filename"])
+    return {"results": results}
+
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize papers collection on startup"""
+    """Start background workers and initialize papers collection off the event loop"""
+    if NLP_WARMUP:
+        threading.Thread(target=_warm_up_models, name="nlp-warmup", daemon=True).start()
+    get_job_manager()
     try:
-        initialize_demo_papers()
-        print("Papers collection initialized")
+        get_job_manager().submit("initialize", _initialize_job)
+        print("Papers collection initialization queued")
     except Exception as e:
         print(f"Warning: Could not initialize papers: {e}")
+    cold_start["startup"] = round(time.perf_counter() - _import_started, 3)
+    print(f"Startup finished in {cold_start['startup']}s (imports {cold_start['import']}s)")
+
+
+@app.get("/ready")
+def readiness():
+    """200 once the models are loaded (or will load on demand), 503 while warming up
+    or when the graph schema is missing a constraint"""
+    status = model_status()
+    ready = (status["loaded"] or not NLP_WARMUP) and not (schema_status or {}).get("missing")
+    body = {"ready": ready, "models": {"spacy": status}, "schema": schema_status,
+            "cold_start_seconds": dict(cold_start)}
+    return JSONResponse(body, status_code=200 if ready else 503)
 
 
-@app.post("/upload-pdf")
+@app.post("/upload-pdf", status_code=202)
 async def upload_pdf(file: UploadFile = File(...)):
     if not file.filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF files are accepted")
     file_id = str(uuid.uuid4())
     dest = Path(UPLOAD_DIR) / f"{file_id}.pdf"
-    with open(dest, "wb") as f:
-        content = await file.read()
-        f.write(content)
-    text = extract_text_from_pdf(str(dest))
-    return JSONResponse({"file_id": file_id, "text_snippet": text[:1000]})
+    size = 0
+    try:
+        with open(dest, "wb") as f:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if UPLOAD_MAX_BYTES and size > UPLOAD_MAX_BYTES:
+                    raise HTTPException(status_code=413, detail=f"File exceeds {UPLOAD_MAX_BYTES} bytes")
+                f.write(chunk)
+    except BaseException:
+        dest.unlink(missing_ok=True)
+        raise
+    return submit_job("upload-pdf", _upload_job, file_id, str(dest))
 
 
-@app.post("/process-text")
+@app.post("/process-text", status_code=202)
 async def process_text(payload: dict):
     text = payload.get("text")
     if not text:
         raise HTTPException(status_code=400, detail="'text' is required in payload")
-    nodes, edges = process_text_to_graph(text)
-    # Upsert to Neo4j
-    try:
-        upsert_graph(nodes, edges)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-    return {"nodes": nodes, "edges": edges}
+    return submit_job("process-text", _process_text_job, text)
 
 
+@app.get("/jobs")
+def list_jobs():
+    """Summaries of known background jobs"""
+    manager = get_job_manager()
+    return {"jobs": [j.to_dict(include_result=False) for j in manager.list()], "stats": manager.stats()}
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """Status, progress and (when finished) result of a background job"""
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@app.get("/jobs/{job_id}/progress")
+def get_job_progress(job_id: str):
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"job_id": job.id, "status": job.status, "progress": dict(job.progress)}
+
+
+# Graph reads are async: with Neo4j they await the async driver, so concurrent
+# requests are bounded by the connection pool rather than by worker threads.
+# The embedded backends run the same calls in a worker thread.
+
 @app.get("/graph")
 async def read_graph(limit: int = 100):
-    nodes, edges = get_graph(limit=limit)
+    async def compute():
+        nodes, edges = await get_store().aget_graph(limit=limit)
+        return {"nodes": nodes, "edges": edges}
+    return await acached("graph", {"limit": limit}, compute)
+
+
+@app.get("/graph/page")
+async def read_graph_page(cursor: str = None, limit: int = 1000):
+    """Cursor-paginated full graph: follow `next_cursor` until it is null"""
+    limit = max(1, min(limit, GRAPH_PAGE_MAX))
+    try:
+        return await acached("graph_page", {"cursor": cursor, "limit": limit},
+                             lambda: get_store().aget_graph_page(cursor, limit))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _export_lines():
+    lines = []
+    for kind, item in get_store().iter_graph_export():
+        lines.append(json.dumps({"kind": kind, **item}))
+        if len(lines) >= EXPORT_CHUNK_LINES:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+@app.get("/graph/export")
+def export_graph():
+    """The whole graph as NDJSON: one {"kind": "node" | "edge", ...} object per line, nodes first"""
+    return StreamingResponse(_export_lines(), media_type="application/x-ndjson",
+                             headers={"Content-Disposition": "attachment; filename=graph.ndjson"})
+
+
+@app.get("/graph/path")
+async def shortest_path(source: str, target: str, max_depth: int = 6):
+    """Shortest path between two entities"""
+    nodes, edges = await get_store().aget_shortest_path(source, target, max_depth=max_depth)
     return {"nodes": nodes, "edges": edges}
 
 
+@app.get("/graph/cache")
+def graph_cache_stats():
+    cache = get_graph_cache()
+    return cache.stats() if cache is not None else {"enabled": False}
+
+
+@app.get("/cache/stats")
+def query_cache_stats():
+    """Hit/miss counters of the query-result cache"""
+    return get_query_cache().stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    """Stage, query and request metrics in the Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/graph/{center_id}/expand")
-async def expand_node(center_id: str, depth: int = 1):
-    nodes, edges = get_subgraph(center_id=center_id, depth=depth)
+async def expand_node(center_id: str, depth: int = 1, limit: int = 100, rank: str = "degree"):
+    nodes, edges = await get_store().aget_subgraph(center_id=center_id, depth=depth, limit=limit, rank=rank)
     return {"nodes": nodes, "edges": edges}
 
 
 # NEW SEARCH AND PAPERS ENDPOINTS
+# Endpoints reading only local files are plain functions so FastAPI runs them
+# in its threadpool instead of on the event loop.
 
 @app.get("/papers")
-async def list_papers():
-    """Get list of all papers in the collection"""
-    papers = get_preloaded_papers()
-    return {"papers": papers}
+def list_papers(offset: int = 0, limit: int = 100):
+    """Get one page of the papers in the collection, in the order they were added"""
+    return get_papers_page(offset=max(0, offset), limit=max(1, min(limit, 1000)))
 
 
 @app.get("/papers/search")
@@ -92,8 +329,9 @@ async def search_papers_endpoint(q: str, limit: int = 20):
     """Search papers by keywords"""
     if not q.strip():
         return {"papers": []}
-    papers = search_papers(q, limit=limit)
-    return {"papers": papers, "query": q}
+    async def compute():
+        return {"papers": await get_store().asearch_papers(q, limit=limit), "query": q}
+    return await acached("papers/search", {"q": q, "limit": limit}, compute)
 
 
 @app.get("/entities/search") 
@@ -101,52 +339,78 @@ async def search_entities_endpoint(q: str, limit: int = 50):
     """Search entities by name or type"""
     if not q.strip():
         return {"entities": []}
-    entities = search_entities(q, limit=limit)
-    return {"entities": entities, "query": q}
+    async def compute():
+        return {"entities": await get_store().asearch_entities(q, limit=limit), "query": q}
+    return await acached("entities/search", {"q": q, "limit": limit}, compute)
+
+
+@app.get("/entities/suggest")
+def suggest_entities_endpoint(q: str, limit: int = 10, type: str = None):
+    """Autocomplete entity names by prefix (with typo tolerance), most-mentioned first"""
+    if not q.strip():
+        return {"suggestions": []}
+    types = {t.strip() for t in type.split(",") if t.strip()} if type else None
+    suggestions = get_entity_index().suggest(q, limit=limit, types=types)
+    return {"suggestions": suggestions, "query": q}
 
 
 @app.get("/graph/search")
 async def search_graph(q: str, limit: int = 100):
     """Get graph data filtered by search query"""
     if not q.strip():
-        return get_graph(limit=limit)
-    nodes, edges = get_graph_by_search(q, limit=limit)
-    return {"nodes": nodes, "edges": edges, "query": q}
+        return await read_graph(limit=limit)
+    async def compute():
+        nodes, edges = await get_store().aget_graph_by_search(q, limit=limit)
+        return {"nodes": nodes, "edges": edges, "query": q}
+    return await acached("graph/search", {"q": q, "limit": limit}, compute)
 
 
 @app.get("/papers/{paper_id}/graph")
-async def get_paper_graph(paper_id: str):
-    """Get graph data for a specific paper"""
-    # This would get entities and relationships from a specific paper
-    nodes, edges = get_graph_by_search(paper_id, limit=200)  # Using paper_id as search term
-    return {"nodes": nodes, "edges": edges, "paper_id": paper_id}
+async def get_paper_graph(paper_id: str, offset: int = 0, limit: int = PAPER_GRAPH_PAGE):
+    """Entities of a paper and its edges between them, `limit` nodes per page.
+
+    Each page carries the edges whose endpoints are both on it or earlier
+    pages; follow `next_offset` until it is null for the whole graph.
+    """
+    limit = max(1, min(limit, GRAPH_PAGE_MAX))
+    async def compute():
+        page = await get_store().aget_paper_graph(paper_id, offset=max(0, offset), limit=limit)
+        return {**page, "paper_id": paper_id}
+    return await acached("papers/graph", {"paper_id": paper_id, "offset": offset, "limit": limit}, compute)
 
 
-@app.post("/papers/initialize")
+@app.get("/papers/{paper_id}/text")
+def get_paper_text(paper_id: str, start: int = 0, end: int = None):
+    """A character range of a paper's text, read from the compressed text store"""
+    if not text_store.has_text(paper_id):
+        raise HTTPException(status_code=404, detail="No text stored for this paper")
+    return {"paper_id": paper_id, "start": start, "length": text_store.text_length(paper_id),
+            "text": text_store.get_text(paper_id, start, end)}
+
+
+@app.get("/papers/{paper_id}/evidence")
+def get_paper_evidence(paper_id: str, ids: str):
+    """Resolve evidence sentence ids (comma separated) cited by a paper's edges"""
+    sentence_ids = [i.strip() for i in ids.split(",") if i.strip()]
+    return {"paper_id": paper_id, "sentences": evidence.get_sentences(paper_id, sentence_ids)}
+
+
+@app.post("/papers/initialize", status_code=202)
 async def initialize_papers():
     """Initialize the system with demo papers or process papers directory"""
-    try:
-        initialize_demo_papers()
-        papers = get_preloaded_papers()
-        return {"message": "Papers initialized successfully", "count": len(papers)}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return submit_job("initialize", _initialize_job)
 
 
-@app.post("/papers/process-directory")
+@app.post("/papers/process-directory", status_code=202)
 async def process_directory():
     """Process all PDFs in the papers directory"""
-    try:
-        results = process_papers_directory()
-        return {"results": results}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return submit_job("process-directory", _process_directory_job)
 
 
 @app.on_event("shutdown")
-def shutdown_event():
+async def shutdown_event():
+    shutdown_job_manager()
     try:
-        from .neo4j_driver import close_driver
-        close_driver()
+        await aclose_store()
     except Exception:
         pass
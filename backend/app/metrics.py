@@ -0,0 +1,212 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Set to false to turn every timer and counter into a no-op
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+# Database queries slower than this are printed; 0 disables the slow-query log
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "0"))
+
+# Latency buckets in seconds, from sub-millisecond reads to multi-minute ingests
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, value: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [bucket counts..., sum, count]
+        self._values: Dict[LabelKey, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * (len(self.buckets) + 2)
+            if i < len(self.buckets):
+                row[i] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, row in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, row):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_format_labels(key, (('le', repr(bound)),))} {int(cumulative)}")
+                lines.append(f"{self.name}_bucket{_format_labels(key, (('le', '+Inf'),))} {int(row[-1])}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(row[-2])}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {int(row[-1])}")
+        return lines
+
+
+_lock = threading.Lock()
+_metrics: Dict[str, Any] = {}
+# name -> (help, callable returning {label dict as tuple: value}) sampled at scrape time
+_gauges: Dict[str, Tuple[str, Callable[[], Dict[LabelKey, float]]]] = {}
+
+
+def counter(name: str, help_text: str = "") -> Counter:
+    with _lock:
+        metric = _metrics.get(name)
+        if metric is None:
+            metric = _metrics[name] = Counter(name, help_text)
+        return metric
+
+
+def histogram(name: str, help_text: str = "", buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+    with _lock:
+        metric = _metrics.get(name)
+        if metric is None:
+            metric = _metrics[name] = Histogram(name, help_text, buckets)
+        return metric
+
+
+def register_gauge(name: str, help_text: str, sample: Callable[[], Dict[str, float]], label: str = None):
+    """A gauge read at scrape time; `sample` returns {label value: number} (or {"": number})"""
+    def collect():
+        return {((label, k),) if label else (): v for k, v in sample().items()}
+    with _lock:
+        _gauges[name] = (help_text, collect)
+
+
+def observe_stage(stage: str, seconds: float):
+    """Record one ingestion stage duration"""
+    if METRICS_ENABLED:
+        histogram("kg_stage_seconds", "Duration of ingestion stages").observe(seconds, stage=stage)
+
+
+def observe_stages(timings: Dict[str, float]):
+    """Record durations measured elsewhere, e.g. in an ingestion worker process"""
+    for stage, seconds in timings.items():
+        observe_stage(stage, seconds)
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+@contextmanager
+def _span(stage: str, into: Optional[Dict[str, float]]):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        if into is not None:
+            into[stage] = into.get(stage, 0.0) + elapsed
+        else:
+            observe_stage(stage, elapsed)
+
+
+def span(stage: str, into: Dict[str, float] = None):
+    """Time a block as an ingestion stage.
+
+    With `into`, the duration is added to that dict instead of the registry,
+    so work done in another process can be reported by its parent.
+    """
+    if not METRICS_ENABLED and into is None:
+        return _NULL_SPAN
+    return _span(stage, into)
+
+
+def observe_query(backend: str, name: str, seconds: float, rows: int):
+    """Record one database query, printing it when slower than SLOW_QUERY_MS"""
+    if SLOW_QUERY_MS and seconds * 1000 >= SLOW_QUERY_MS:
+        print(f"Slow query [{backend}] {name}: {seconds * 1000:.1f} ms, {rows} rows")
+    if not METRICS_ENABLED:
+        return
+    histogram("kg_db_query_seconds", "Latency of database queries").observe(seconds, backend=backend, query=name)
+    counter("kg_db_query_rows_total", "Rows returned or written by database queries").inc(
+        rows, backend=backend, query=name)
+
+
+def timed_rows(backend: str, name: str, rows: Iterable[Any]) -> Iterator[Any]:
+    """Pass streamed rows through, recording the query once they are exhausted"""
+    started = time.perf_counter()
+    count = 0
+    for row in rows:
+        count += 1
+        yield row
+    observe_query(backend, name, time.perf_counter() - started, count)
+
+
+def observe_request(method: str, route: str, status: int, seconds: float):
+    if METRICS_ENABLED:
+        histogram("kg_http_request_seconds", "Latency of HTTP requests").observe(
+            seconds, method=method, route=route, status=status)
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    with _lock:
+        metrics = list(_metrics.values())
+        gauges = list(_gauges.items())
+    lines: List[str] = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    for name, (help_text, collect) in gauges:
+        try:
+            values = collect()
+        except Exception:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for key, value in sorted(values.items()):
+            if value is not None:
+                lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,95 @@
+import time
+from typing import Any, Dict, List, Tuple
+
+from . import metrics
+from . import neo4j_driver as sync
+from .neo4j_driver import NEO4J_DATABASE, NEO4J_URI
+
+# Async counterparts of the read functions in neo4j_driver, for async API
+# handlers: a Cypher round trip awaits instead of holding a worker thread, so
+# concurrent requests are bounded by the connection pool.
+
+_driver = None
+
+
+def get_async_driver():
+    global _driver
+    if _driver is None:
+        config = sync.driver_config()
+        from neo4j import AsyncGraphDatabase
+        _driver = AsyncGraphDatabase.driver(NEO4J_URI, **config)
+    return _driver
+
+
+async def close_async_driver():
+    global _driver
+    if _driver is not None:
+        await _driver.close()
+        _driver = None
+
+
+async def _run(tx, name: str, cypher: str, **params) -> list:
+    started = time.perf_counter()
+    result = await tx.run(cypher, **params)
+    records = [record async for record in result]
+    metrics.observe_query("neo4j", name, time.perf_counter() - started, len(records))
+    return records
+
+
+async def _read(name: str, cypher: str, **params) -> list:
+    """Records of a read query in a managed transaction (reader-routed, retried)"""
+    from neo4j import READ_ACCESS
+    async with get_async_driver().session(database=NEO4J_DATABASE, default_access_mode=READ_ACCESS) as session:
+        return await session.execute_read(_run, name, cypher, **params)
+
+
+async def get_graph(limit: int = 100):
+    return sync.graph_from_records(await _read("get_graph", sync.GRAPH_QUERY, limit=limit))
+
+
+async def get_nodes_after(after: int, limit: int) -> List[Tuple[int, Dict[str, Any]]]:
+    return sync.keyed_nodes(await _read("get_nodes_after", sync.NODES_AFTER_QUERY + " LIMIT $limit",
+                                        after=after, limit=limit))
+
+
+async def get_edges_after(after: int, limit: int) -> List[Tuple[int, Dict[str, Any]]]:
+    return sync.keyed_edges(await _read("get_edges_after", sync.EDGES_AFTER_QUERY + " LIMIT $limit",
+                                        after=after, limit=limit))
+
+
+async def get_subgraph(center_id: str, depth: int = 1, limit: int = 100):
+    nodes = sync.subgraph_nodes(await _read("get_subgraph", sync.subgraph_query(depth),
+                                            center_id=center_id, limit=limit))
+    _, edges = sync.graph_from_records(await _read("get_subgraph_edges", sync.SUBGRAPH_EDGES_QUERY,
+                                                   ids=list(nodes.keys())))
+    return list(nodes.values()), edges
+
+
+async def get_papers(paper_ids: List[str]) -> List[Dict[str, Any]]:
+    return sync.papers_from_records(await _read("get_papers", sync.PAPERS_QUERY, paper_ids=paper_ids))
+
+
+async def search_entities(query: str, limit: int = 50) -> List[Dict[str, Any]]:
+    return sync.entities_from_records(await _read("search_entities", sync.SEARCH_ENTITIES_QUERY,
+                                                  query=query, limit=limit))
+
+
+async def get_shortest_path(source_id: str, target_id: str, max_depth: int = 6):
+    return sync.path_from_records(await _read("get_shortest_path", sync.shortest_path_query(max_depth),
+                                              source_id=source_id, target_id=target_id))
+
+
+async def get_papers_by_entity(entity_id: str) -> List[Dict[str, Any]]:
+    return sync.paper_summaries_from_records(await _read("get_papers_by_entity", sync.PAPERS_BY_ENTITY_QUERY,
+                                                         entity_id=entity_id))
+
+
+async def get_graph_for_papers(paper_ids: List[str], limit: int = 100):
+    if not paper_ids:
+        return [], []
+    records = await _read("get_graph_for_papers", sync.GRAPH_FOR_PAPERS_QUERY, paper_ids=paper_ids, limit=limit)
+    return sync.graph_from_records(records, skip_papers=True)
+
+
+async def get_paper_graph(paper_id: str):
+    return sync.paper_graph_from_records(await _read("get_paper_graph", sync.PAPER_GRAPH_QUERY, paper_id=paper_id))
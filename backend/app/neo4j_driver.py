@@ -1,22 +1,58 @@
 import os
-from neo4j import GraphDatabase
-from typing import List, Dict, Any
+import time
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+from . import metrics
+
 
 NEO4J_URI = os.getenv("NEO4J_URI")
 NEO4J_USER = os.getenv("NEO4J_USER")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
+# Rows sent per UNWIND statement when writing graphs
+NEO4J_BATCH_SIZE = int(os.getenv("NEO4J_BATCH_SIZE", "500"))
+# Database to use (default: the server's home database)
+NEO4J_DATABASE = os.getenv("NEO4J_DATABASE") or None
+# Connection pool: size, seconds to wait for a free connection, and seconds
+# before a connection is replaced (keep below any proxy/LB idle timeout)
+NEO4J_MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "100"))
+NEO4J_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_ACQUISITION_TIMEOUT", "60"))
+NEO4J_MAX_CONNECTION_LIFETIME = float(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", "3600"))
+# Total seconds a managed transaction is retried on transient errors
+NEO4J_MAX_RETRY_TIME = float(os.getenv("NEO4J_MAX_RETRY_TIME", "30"))
 
 _driver = None
 
+
+def driver_config() -> Dict[str, Any]:
+    """Pool and retry settings shared by the sync and async drivers"""
+    if not (NEO4J_URI and NEO4J_USER and NEO4J_PASSWORD):
+        raise RuntimeError("Neo4j credentials not set in environment variables")
+    return {
+        "auth": (NEO4J_USER, NEO4J_PASSWORD),
+        "max_connection_pool_size": NEO4J_MAX_POOL_SIZE,
+        "connection_acquisition_timeout": NEO4J_ACQUISITION_TIMEOUT,
+        "max_connection_lifetime": NEO4J_MAX_CONNECTION_LIFETIME,
+        "max_transaction_retry_time": NEO4J_MAX_RETRY_TIME,
+    }
+
+
 def get_driver():
     global _driver
     if _driver is None:
-        if not (NEO4J_URI and NEO4J_USER and NEO4J_PASSWORD):
-            raise RuntimeError("Neo4j credentials not set in environment variables")
-        _driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+        config = driver_config()
+        # Imported on first use so the embedded backends never load the driver
+        from neo4j import GraphDatabase
+        _driver = GraphDatabase.driver(NEO4J_URI, **config)
     return _driver
 
 
+def _session(read: bool = True):
+    """Session whose auto-commit queries go to readers (read=True) or the leader"""
+    from neo4j import READ_ACCESS, WRITE_ACCESS
+    return get_driver().session(database=NEO4J_DATABASE,
+                                default_access_mode=READ_ACCESS if read else WRITE_ACCESS)
+
+
 def close_driver():
     global _driver
     if _driver:
@@ -24,303 +60,449 @@ def close_driver():
         _driver = None
 
 
-def upsert_paper(paper_id: str, filename: str, title: str, text: str, metadata: Dict[str, Any] = None):
-    """Store a research paper in Neo4j"""
-    driver = get_driver()
-    with driver.session() as session:
-        props = {
-            "paper_id": paper_id,
-            "filename": filename,
-            "title": title,
-            "text": text,
-            "upload_date": metadata.get("upload_date") if metadata else None,
-            **(metadata or {})
-        }
-        cypher = "MERGE (p:Paper {paper_id: $paper_id}) SET p += $props RETURN p"
-        session.run(cypher, paper_id=paper_id, props=props)
-
-
-def upsert_graph_with_paper(paper_id: str, nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]]):
-    """Upsert nodes and edges linked to a specific paper"""
-    driver = get_driver()
-    with driver.session() as session:
-        # Create or merge nodes and link them to the paper
-        for n in nodes:
-            nid = n.get("id") or n.get("name")
-            label = n.get("type") or "Entity"
-            props = n.get("props", {})
-            props["name"] = n.get("name")
-            props["paper_id"] = paper_id
-            cypher = f"MERGE (a:{label} {{id: $id}}) SET a += $props RETURN a"
-            session.run(cypher, id=nid, props=props)
-            
-            # Link entity to paper
-            link_cypher = (
-                "MATCH (p:Paper {paper_id: $paper_id}), (e {id: $entity_id}) "
-                "MERGE (p)-[:CONTAINS]->(e)"
-            )
-            session.run(link_cypher, paper_id=paper_id, entity_id=nid)
-
-        # Create edges
-        for e in edges:
-            src = e["source"]
-            tgt = e["target"]
-            rel = e.get("label", "RELATED_TO")
-            props = e.get("props", {})
+def _run(runner, name: str, cypher: str, **params) -> list:
+    """Run a query on a session or transaction and return its records, timed as `name`"""
+    started = time.perf_counter()
+    records = list(runner.run(cypher, **params))
+    metrics.observe_query("neo4j", name, time.perf_counter() - started, len(records))
+    return records
+
+
+def _stream(runner, name: str, cypher: str, **params):
+    """Like `_run`, but yields records as they arrive; timed once the caller has read them all"""
+    return metrics.timed_rows("neo4j", name, runner.run(cypher, **params))
+
+
+def _read(name: str, cypher: str, **params) -> list:
+    """Records of a read query, run as a managed transaction: routed to a
+    reader in a cluster and retried on transient errors"""
+    with _session(read=True) as session:
+        return session.execute_read(_run, name, cypher, **params)
+
+
+def _write(tx, name: str, cypher: str, **params):
+    """Run a write statement to completion; `rows` counts the UNWIND rows sent"""
+    started = time.perf_counter()
+    tx.run(cypher, **params).consume()
+    metrics.observe_query("neo4j", name, time.perf_counter() - started, len(params.get("rows") or ()))
+
+
+def upsert_paper(paper_id: str, filename: str, title: str, metadata: Dict[str, Any] = None):
+    """Store a research paper's metadata in Neo4j (its text lives in the text store)"""
+    props = {
+        "paper_id": paper_id,
+        "filename": filename,
+        "title": title,
+        "upload_date": metadata.get("upload_date") if metadata else None,
+        **(metadata or {})
+    }
+    # REMOVE drops text written onto Paper nodes by earlier versions
+    cypher = "MERGE (p:Paper {paper_id: $paper_id}) SET p += $props REMOVE p.text RETURN p"
+    with _session(read=False) as session:
+        session.execute_write(_run, "upsert_paper", cypher, paper_id=paper_id, props=props)
+
+
+def _chunks(rows: List[Dict[str, Any]], size: int):
+    """Yield successive slices of at most `size` rows"""
+    size = max(1, size)
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def _safe_token(value: str, default: str) -> str:
+    """Labels and relationship types cannot be parameterized, so only allow identifier characters"""
+    token = "".join(ch if ch.isalnum() or ch == "_" else "_" for ch in (value or ""))
+    return token or default
+
+
+def _group_node_rows(nodes: List[Dict[str, Any]], paper_id: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """Group nodes by label into UNWIND rows"""
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for n in nodes:
+        nid = n.get("id") or n.get("name")
+        label = _safe_token(n.get("type"), "Entity")
+        props = dict(n.get("props", {}))
+        props["name"] = n.get("name")
+        if paper_id is not None:
             props["paper_id"] = paper_id
-            cypher = (
-                "MATCH (a {id: $src}), (b {id: $tgt}) "
-                f"MERGE (a)-[r:{rel}]->(b) SET r += $props RETURN r"
-            )
-            session.run(cypher, src=src, tgt=tgt, props=props)
+        groups.setdefault(label, []).append({"id": nid, "props": props})
+    return groups
 
 
-def upsert_graph(nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]]):
-    """Legacy function - upsert nodes and edges into Neo4j without paper linking"""
-    driver = get_driver()
-    with driver.session() as session:
-        # Create or merge nodes
-        for n in nodes:
-            nid = n.get("id") or n.get("name")
-            label = n.get("type") or "Entity"
-            props = n.get("props", {})
-            props["name"] = n.get("name")
-            cypher = f"MERGE (a:{label} {{id: $id}}) SET a += $props RETURN a"
-            session.run(cypher, id=nid, props=props)
-
-        # Create edges
-        for e in edges:
-            src = e["source"]
-            tgt = e["target"]
-            rel = e.get("label", "RELATED_TO")
-            props = e.get("props", {})
-            cypher = (
-                "MATCH (a {id: $src}), (b {id: $tgt}) "
-                f"MERGE (a)-[r:{rel}]->(b) SET r += $props RETURN r"
-            )
-            session.run(cypher, src=src, tgt=tgt, props=props)
+def _group_edge_rows(edges: List[Dict[str, Any]], paper_id: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """Group edges by relationship type into UNWIND rows"""
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for i, e in enumerate(edges):
+        rel = _safe_token(e.get("label"), "RELATED_TO")
+        props = dict(e.get("props", {}))
+        if paper_id is not None:
+            props["paper_id"] = paper_id
+        groups.setdefault(rel, []).append({"i": i, "src": e["source"], "tgt": e["target"], "props": props})
+    return groups
 
 
-def get_graph(limit: int = 100):
-    driver = get_driver()
-    with driver.session() as session:
-        q = (
-            "MATCH (n)-[r]-(m) "
-            "RETURN n,r,m LIMIT $limit"
+def _write_graph_batched(tx, nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]],
+                         paper_id: Optional[str], batch_size: int) -> Dict[str, int]:
+    """Write grouped nodes and edges with one UNWIND statement per chunk.
+
+    stats["edge_ids"] holds the id of each written edge, in input order
+    (None where an endpoint was missing and the edge was skipped).
+    """
+    stats = {"nodes": 0, "edges": 0, "statements": 0, "edge_ids": [None] * len(edges)}
+    if paper_id is not None:
+        # Entities are linked to the paper, so writing them for a missing paper is an error
+        if tx.run("MATCH (p:Paper {paper_id: $paper_id}) RETURN count(p) AS n", paper_id=paper_id).single()["n"] == 0:
+            raise ValueError(f"Paper {paper_id} does not exist; upsert it before its graph")
+        # Re-ingesting a paper replaces its previous links instead of accumulating them
+        _write(
+            tx, "delete_paper_edges",
+            "MATCH (p:Paper {paper_id: $paper_id})-[:CONTAINS]->(e:Entity)-[r]-() "
+            "WHERE r.paper_id = $paper_id DELETE r",
+            paper_id=paper_id,
+        )
+        _write(
+            tx, "delete_paper_contains",
+            "MATCH (p:Paper {paper_id: $paper_id})-[c:CONTAINS]->() DELETE c",
+            paper_id=paper_id,
         )
-        res = session.run(q, limit=limit)
-        nodes = {}
-        edges = []
-        for record in res:
-            n = record["n"]
-            m = record["m"]
-            r = record["r"]
-            for node in (n, m):
-                nid = node.get("id")
-                if nid not in nodes:
-                    nodes[nid] = {
-                        "id": nid,
-                        "label": node.get("name") or nid,
-                        "type": list(node.labels)[0] if list(node.labels) else "Entity",
-                        "props": dict(node.items()),
-                    }
-            edges.append({
-                "id": str(r.id),
-                "source": n.get("id"),
-                "target": m.get("id"),
-                "label": type(r).__name__ if hasattr(r, "type") else r.type if hasattr(r, "type") else "RELATED_TO",
-+                "props": dict(r.items()),
-            })
-        return list(nodes.values()), edges
-
-
-def get_subgraph(center_id: str, depth: int = 1):
-    driver = get_driver()
-    with driver.session() as session:
-        q = (
-            "MATCH (c {id: $center_id})-[*1..$depth]-(n) "
-            "RETURN DISTINCT c, n LIMIT 100"
+        stats["statements"] += 3
+    for label, rows in _group_node_rows(nodes, paper_id).items():
+        # MERGE on the shared :Entity label so the id lookup uses its uniqueness constraint
+        cypher = (
+            "UNWIND $rows AS row "
+            f"MERGE (a:Entity {{id: row.id}}) SET a:{label}, a += row.props"
         )
-        res = session.run(q, center_id=center_id, depth=depth)
-        nodes = {}
-        edges = []
-        # Simple expansion: return neighbors and relationships
-        # For more precise control, adapt the query
-        for record in res:
-            c = record["c"]
-            n = record["n"]
-            for node in (c, n):
-                nid = node.get("id")
-                if nid not in nodes:
-                    nodes[nid] = {
-                        "id": nid,
-                        "label": node.get("name") or nid,
-                        "type": list(node.labels)[0] if list(node.labels) else "Entity",
-                        "props": dict(node.items()),
-                    }
-        # Fetch relationships separately
-        q2 = (
-            "MATCH (a)-[r]-(b) WHERE a.id IN $ids AND b.id IN $ids RETURN a,r,b LIMIT 200"
+        for chunk in _chunks(rows, batch_size):
+            _write(tx, "merge_nodes", cypher, rows=chunk)
+            stats["nodes"] += len(chunk)
+            stats["statements"] += 1
+
+    if paper_id is not None:
+        cypher = (
+            "MATCH (p:Paper {paper_id: $paper_id}) "
+            "UNWIND $rows AS row "
+            "MATCH (a:Entity {id: row.id}) "
+            "MERGE (p)-[:CONTAINS]->(a)"
+        )
+        ids = [{"id": n.get("id") or n.get("name")} for n in nodes]
+        for chunk in _chunks(ids, batch_size):
+            _write(tx, "merge_contains", cypher, rows=chunk, paper_id=paper_id)
+            stats["statements"] += 1
+
+    # Entities are shared between papers, so each paper keeps its own edge
+    # between a pair and weights from different papers are never overwritten
+    edge_key = " {paper_id: $paper_id}" if paper_id is not None else ""
+    for rel, rows in _group_edge_rows(edges, paper_id).items():
+        cypher = (
+            "UNWIND $rows AS row "
+            "MATCH (a:Entity {id: row.src}), (b:Entity {id: row.tgt}) "
+            f"MERGE (a)-[r:{rel}{edge_key}]->(b) SET r += row.props "
+            "RETURN row.i AS i, id(r) AS id"
         )
-        res2 = session.run(q2, ids=list(nodes.keys()))
-        for record in res2:
-            a = record["a"]
-            b = record["b"]
-            r = record["r"]
-            edges.append({
-                "id": str(r.id),
-                "source": a.get("id"),
-                "target": b.get("id"),
-                "label": r.type if hasattr(r, "type") else "RELATED_TO",
-                "props": dict(r.items()),
-            })
-        return list(nodes.values()), edges
-
-
-def search_papers(query: str, limit: int = 20) -> List[Dict[str, Any]]:
-    """Search papers by keywords in title, text, or metadata"""
-    driver = get_driver()
-    with driver.session() as session:
-        # Search in paper titles and text content
-        cypher = """
-        MATCH (p:Paper)
-        WHERE toLower(p.title) CONTAINS toLower($query)
-           OR toLower(p.text) CONTAINS toLower($query)
-           OR toLower(p.authors) CONTAINS toLower($query)
-           OR toLower(p.journal) CONTAINS toLower($query)
-        RETURN p
-        ORDER BY 
-          CASE WHEN toLower(p.title) CONTAINS toLower($query) THEN 1 ELSE 2 END,
-          p.upload_date DESC
-        LIMIT $limit
-        """
-        
-        result = session.run(cypher, query=query, limit=limit)
-        papers = []
-        for record in result:
-            paper = record["p"]
-            papers.append({
-                "paper_id": paper.get("paper_id"),
-                "title": paper.get("title"),
-                "authors": paper.get("authors"),
-                "year": paper.get("year"),
-                "journal": paper.get("journal"),
-                "filename": paper.get("filename"),
-                "upload_date": paper.get("upload_date"),
-                "text_snippet": (paper.get("text", "")[:300] + "...") if len(paper.get("text", "")) > 300 else paper.get("text", "")
-            })
-        return papers
+        for chunk in _chunks(rows, batch_size):
+            for record in _run(tx, "merge_edges", cypher, rows=chunk, paper_id=paper_id):
+                stats["edge_ids"][record["i"]] = str(record["id"])
+            stats["edges"] += len(chunk)
+            stats["statements"] += 1
+    return stats
+
+
+def upsert_graph_with_paper(paper_id: str, nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]],
+                            batch_size: int = None) -> Dict[str, Any]:
+    """Upsert nodes and edges linked to a specific paper in a single transaction.
+
+    The transaction is retried as a whole on transient errors; every
+    statement is a MERGE or a delete of the paper's own links, so a retry
+    leaves the same graph.
+    """
+    batch_size = batch_size or NEO4J_BATCH_SIZE
+    started = time.perf_counter()
+    with _session(read=False) as session:
+        stats = session.execute_write(_write_graph_batched, nodes, edges, paper_id, batch_size)
+    stats["seconds"] = round(time.perf_counter() - started, 4)
+    return stats
+
+
+def upsert_graph(nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]],
+                 batch_size: int = None) -> Dict[str, Any]:
+    """Legacy function - upsert nodes and edges into Neo4j without paper linking"""
+    batch_size = batch_size or NEO4J_BATCH_SIZE
+    started = time.perf_counter()
+    with _session(read=False) as session:
+        stats = session.execute_write(_write_graph_batched, nodes, edges, None, batch_size)
+    stats["seconds"] = round(time.perf_counter() - started, 4)
+    return stats
+
+
+# -- reads ----------------------------------------------------------------
+# Queries and record conversion are shared with the async layer in neo4j_async.
+# Every entity also carries the :Entity label, so id and name lookups are
+# label-qualified and served by the indexes in neo4j_schema.
+
+
+def type_of(var: str) -> str:
+    """Cypher expression for an entity's type: its label other than Entity"""
+    return f"head([l IN labels({var}) WHERE l <> 'Entity'] + ['Entity'])"
+
+
+# Directed, so each relationship comes back once
+GRAPH_QUERY = "MATCH (n)-[r]->(m) RETURN n, r, m LIMIT $limit"
+SUBGRAPH_EDGES_QUERY = (
+    "MATCH (n:Entity)-[r]->(m:Entity) WHERE n.id IN $ids AND m.id IN $ids RETURN n, r, m LIMIT 200"
+)
+PAPERS_QUERY = "MATCH (p:Paper) WHERE p.paper_id IN $paper_ids RETURN p"
+SEARCH_ENTITIES_QUERY = f"""
+MATCH (e:Entity)
+WHERE toLower(e.name) CONTAINS toLower($query) OR toLower({type_of('e')}) CONTAINS toLower($query)
+RETURN e, [{type_of('e')}] AS entity_labels
+LIMIT $limit
+"""
+PAPERS_BY_ENTITY_QUERY = """
+MATCH (p:Paper)-[:CONTAINS]->(e:Entity {id: $entity_id})
+RETURN p
+ORDER BY p.upload_date DESC
+"""
+# Starts from the papers (unique index) and follows their own links
+GRAPH_FOR_PAPERS_QUERY = """
+MATCH (p:Paper) WHERE p.paper_id IN $paper_ids
+MATCH (p)-[:CONTAINS]->(n:Entity)-[r]->(m:Entity)
+WHERE r.paper_id = p.paper_id
+RETURN n, r, m
+LIMIT $limit
+"""
+# A paper's entities with its own edges among them, from the Paper's unique index
+PAPER_GRAPH_QUERY = """
+MATCH (p:Paper {paper_id: $paper_id})-[:CONTAINS]->(n:Entity)
+OPTIONAL MATCH (n)-[r]->(m:Entity)
+WHERE r.paper_id = $paper_id
+RETURN n, r, m
+"""
+# Keyset scans in internal-id order: entity nodes, then entity relationships
+NODES_AFTER_QUERY = "MATCH (n:Entity) WHERE id(n) > $after RETURN id(n) AS key, n ORDER BY key"
+EDGES_AFTER_QUERY = (
+    "MATCH (a:Entity)-[r]->(b:Entity) WHERE id(r) > $after "
+    "RETURN id(r) AS key, r, a.id AS src, b.id AS tgt ORDER BY key"
+)
+
+
+def subgraph_query(depth: int) -> str:
+    # Variable-length bounds cannot be parameters
+    return f"MATCH (c:Entity {{id: $center_id}})-[*1..{max(1, int(depth))}]-(n) RETURN DISTINCT c, n LIMIT $limit"
+
+
+def shortest_path_query(max_depth: int) -> str:
+    return (
+        "MATCH (a:Entity {id: $source_id}), (b:Entity {id: $target_id}) "
+        f"MATCH p = shortestPath((a)-[*..{int(max_depth)}]-(b)) "
+        "RETURN nodes(p) AS nodes, relationships(p) AS rels"
+    )
+
+
+def node_dict(node) -> Dict[str, Any]:
+    nid = node.get("id")
+    labels = sorted(label for label in node.labels if label != "Entity")
+    return {
+        "id": nid,
+        "label": node.get("name") or nid,
+        "type": labels[0] if labels else "Entity",
+        "props": dict(node.items()),
+    }
+
+
+def edge_dict(r, source: str, target: str) -> Dict[str, Any]:
+    return {
+        "id": str(r.id),
+        "source": source,
+        "target": target,
+        "label": r.type,
+        "props": dict(r.items()),
+    }
+
+
+def graph_from_records(records, skip_papers: bool = False):
+    """Nodes and edges from (n, r, m) records; Paper nodes are optionally left out"""
+    nodes = {}
+    edges = []
+    for record in records:
+        n, r, m = record["n"], record["r"], record["m"]
+        is_paper = "Paper" in n.labels or "Paper" in m.labels
+        for node in (n, m):
+            if skip_papers and "Paper" in node.labels:
+                continue
+            nid = node.get("id")
+            if nid and nid not in nodes:
+                nodes[nid] = node_dict(node)
+        if skip_papers and (is_paper or not (n.get("id") and m.get("id"))):
+            continue
+        edges.append(edge_dict(r, n.get("id"), m.get("id")))
+    return list(nodes.values()), edges
+
+
+def subgraph_nodes(records) -> Dict[str, Dict[str, Any]]:
+    nodes = {}
+    for record in records:
+        for node in (record["c"], record["n"]):
+            nid = node.get("id")
+            if nid not in nodes:
+                nodes[nid] = node_dict(node)
+    return nodes
+
+
+def path_from_records(records):
+    if not records:
+        return [], []
+    record = records[0]
+    nodes = [node_dict(node) for node in record["nodes"]]
+    edges = [edge_dict(r, r.start_node.get("id"), r.end_node.get("id")) for r in record["rels"]]
+    return nodes, edges
+
+
+def paper_graph_from_records(records):
+    nodes = {}
+    edges = []
+    for record in records:
+        n, r = record["n"], record["r"]
+        nodes.setdefault(n.get("id"), node_dict(n))
+        if r is not None:
+            edges.append(edge_dict(r, n.get("id"), record["m"].get("id")))
+    return list(nodes.values()), edges
+
+
+def papers_from_records(records) -> List[Dict[str, Any]]:
+    return [dict(record["p"].items()) for record in records]
+
+
+def entities_from_records(records) -> List[Dict[str, Any]]:
+    entities = []
+    for record in records:
+        entity = record["e"]
+        labels = record["entity_labels"]
+        entities.append({
+            "id": entity.get("id"),
+            "name": entity.get("name"),
+            "type": labels[0] if labels else "Entity",
+            "paper_id": entity.get("paper_id"),
+            "props": dict(entity.items())
+        })
+    return entities
+
+
+def paper_summaries_from_records(records) -> List[Dict[str, Any]]:
+    papers = []
+    for record in records:
+        paper = record["p"]
+        papers.append({
+            "paper_id": paper.get("paper_id"),
+            "title": paper.get("title"),
+            "authors": paper.get("authors"),
+            "year": paper.get("year"),
+            "filename": paper.get("filename")
+        })
+    return papers
+
+
+def keyed_nodes(records) -> List[Tuple[int, Dict[str, Any]]]:
+    return [(record["key"], node_dict(record["n"])) for record in records]
+
+
+def keyed_edges(records) -> List[Tuple[int, Dict[str, Any]]]:
+    return [(record["key"], edge_dict(record["r"], record["src"], record["tgt"])) for record in records]
+
+
+def get_graph(limit: int = 100):
+    return graph_from_records(_read("get_graph", GRAPH_QUERY, limit=limit))
+
+
+def get_nodes_after(after: int, limit: int) -> List[Tuple[int, Dict[str, Any]]]:
+    """Up to `limit` entity nodes with an internal id above `after`, as (id, node)"""
+    return keyed_nodes(_read("get_nodes_after", NODES_AFTER_QUERY + " LIMIT $limit", after=after, limit=limit))
+
+
+def get_edges_after(after: int, limit: int) -> List[Tuple[int, Dict[str, Any]]]:
+    """Up to `limit` entity relationships with an internal id above `after`, as (id, edge)"""
+    return keyed_edges(_read("get_edges_after", EDGES_AFTER_QUERY + " LIMIT $limit", after=after, limit=limit))
+
+
+def iter_graph_export() -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Every entity node, then every relationship, as ("node" | "edge", dict).
+
+    Each result is consumed lazily as the caller iterates, so the driver only
+    buffers one fetch batch at a time.
+    """
+    with _session(read=True) as session:
+        for record in _stream(session, "export_nodes", NODES_AFTER_QUERY, after=-1):
+            yield "node", node_dict(record["n"])
+        for record in _stream(session, "export_edges", EDGES_AFTER_QUERY, after=-1):
+            yield "edge", edge_dict(record["r"], record["src"], record["tgt"])
+
+
+def get_subgraph(center_id: str, depth: int = 1, limit: int = 100):
+    nodes = subgraph_nodes(_read("get_subgraph", subgraph_query(depth), center_id=center_id, limit=limit))
+    # Fetch relationships separately
+    _, edges = graph_from_records(_read("get_subgraph_edges", SUBGRAPH_EDGES_QUERY, ids=list(nodes.keys())))
+    return list(nodes.values()), edges
+
+
+def get_papers(paper_ids: List[str]) -> List[Dict[str, Any]]:
+    """Properties of the given Paper nodes"""
+    return papers_from_records(_read("get_papers", PAPERS_QUERY, paper_ids=paper_ids))
 
 
 def search_entities(query: str, limit: int = 50) -> List[Dict[str, Any]]:
     """Search entities by name or type"""
-    driver = get_driver()
-    with driver.session() as session:
-        cypher = """
-        MATCH (e)
-        WHERE e:Entity OR e:PERSON OR e:ORG OR e:GPE OR e:WORK_OF_ART
-        AND (toLower(e.name) CONTAINS toLower($query) OR toLower(labels(e)[0]) CONTAINS toLower($query))
-        RETURN DISTINCT e, labels(e) as entity_labels
-        LIMIT $limit
-        """
-        
-        result = session.run(cypher, query=query, limit=limit)
-        entities = []
-        for record in result:
-            entity = record["e"]
-            labels = record["entity_labels"]
-            entities.append({
-                "id": entity.get("id"),
-                "name": entity.get("name"),
-                "type": labels[0] if labels else "Entity",
-                "paper_id": entity.get("paper_id"),
-                "props": dict(entity.items())
-            })
-        return entities
+    return entities_from_records(_read("search_entities", SEARCH_ENTITIES_QUERY, query=query, limit=limit))
+
+
+def iter_entity_rows():
+    """(id, name, type, paper ids) for every entity a paper contains"""
+    cypher = f"""
+    MATCH (p:Paper)-[:CONTAINS]->(e:Entity)
+    RETURN e.id AS id, e.name AS name, {type_of('e')} AS type, collect(p.paper_id) AS paper_ids
+    """
+    with _session(read=True) as session:
+        for record in _stream(session, "iter_entity_rows", cypher):
+            yield record["id"], record["name"], record["type"], record["paper_ids"]
+
+
+def iter_node_rows():
+    """(id, name, type) for every entity node"""
+    cypher = f"MATCH (n:Entity) RETURN n.id AS id, n.name AS name, {type_of('n')} AS type"
+    with _session(read=True) as session:
+        for record in _stream(session, "iter_node_rows", cypher):
+            yield record["id"], record["name"], record["type"]
+
+
+def iter_edge_rows():
+    """(source, target, type, weight) for every relationship between entities"""
+    cypher = (
+        "MATCH (a:Entity)-[r]->(b:Entity) "
+        "RETURN a.id AS src, b.id AS tgt, type(r) AS rel, coalesce(r.weight, 1.0) AS weight"
+    )
+    with _session(read=True) as session:
+        for record in _stream(session, "iter_edge_rows", cypher):
+            yield record["src"], record["tgt"], record["rel"], record["weight"]
+
+
+def get_shortest_path(source_id: str, target_id: str, max_depth: int = 6):
+    """Shortest undirected path between two entities"""
+    return path_from_records(_read("get_shortest_path", shortest_path_query(max_depth),
+                                   source_id=source_id, target_id=target_id))
 
 
 def get_papers_by_entity(entity_id: str) -> List[Dict[str, Any]]:
     """Get all papers that contain a specific entity"""
-    driver = get_driver()
-    with driver.session() as session:
-        cypher = """
-        MATCH (p:Paper)-[:CONTAINS]->(e {id: $entity_id})
-        RETURN p
-        ORDER BY p.upload_date DESC
-        """
-        
-        result = session.run(cypher, entity_id=entity_id)
-        papers = []
-        for record in result:
-            paper = record["p"]
-            papers.append({
-                "paper_id": paper.get("paper_id"),
-                "title": paper.get("title"),
-                "authors": paper.get("authors"),
-                "year": paper.get("year"),
-                "filename": paper.get("filename")
-            })
-        return papers
-
-
-def get_graph_by_search(query: str, limit: int = 100):
-    """Get graph data filtered by search query"""
-    driver = get_driver()
-    with driver.session() as session:
-        # First find papers matching the query
-        papers_cypher = """
-        MATCH (p:Paper)
-        WHERE toLower(p.title) CONTAINS toLower($query)
-           OR toLower(p.text) CONTAINS toLower($query)
-           OR toLower(p.authors) CONTAINS toLower($query)
-        RETURN collect(p.paper_id) as paper_ids
-        """
-        
-        papers_result = session.run(papers_cypher, query=query)
-        paper_ids = papers_result.single()["paper_ids"] if papers_result.peek() else []
-        
-        if not paper_ids:
-            return [], []
-        
-        # Get entities and relationships from matching papers
-        graph_cypher = """
-        MATCH (n)-[r]-(m)
-        WHERE n.paper_id IN $paper_ids OR m.paper_id IN $paper_ids
-        RETURN n, r, m
-        LIMIT $limit
-        """
-        
-        graph_result = session.run(graph_cypher, paper_ids=paper_ids, limit=limit)
-        nodes = {}
-        edges = []
-        
-        for record in graph_result:
-            n = record["n"]
-            m = record["m"]  
-            r = record["r"]
-            
-            for node in (n, m):
-                if "Paper" in list(node.labels):
-                    continue  # Skip paper nodes in visualization
-                    
-                nid = node.get("id")
-                if nid and nid not in nodes:
-                    nodes[nid] = {
-                        "id": nid,
-                        "label": node.get("name") or nid,
-                        "type": list(node.labels)[0] if list(node.labels) else "Entity",
-                        "props": dict(node.items()),
-                    }
-            
-            # Only add edges between entities (not involving papers)
-            if ("Paper" not in list(n.labels) and "Paper" not in list(m.labels) and 
-                n.get("id") and m.get("id")):
-                edges.append({
-                    "id": str(r.id),
-                    "source": n.get("id"),
-                    "target": m.get("id"),
-                    "label": r.type if hasattr(r, "type") else "RELATED_TO",
-                    "props": dict(r.items()),
-                })
-        
-        return list(nodes.values()), edges
+    return paper_summaries_from_records(_read("get_papers_by_entity", PAPERS_BY_ENTITY_QUERY, entity_id=entity_id))
+
+
+def get_graph_for_papers(paper_ids: List[str], limit: int = 100):
+    """Entities and relationships belonging to the given papers"""
+    if not paper_ids:
+        return [], []
+    records = _read("get_graph_for_papers", GRAPH_FOR_PAPERS_QUERY, paper_ids=paper_ids, limit=limit)
+    # Paper nodes are left out of the visualization
+    return graph_from_records(records, skip_papers=True)
+
+
+def get_paper_graph(paper_id: str):
+    """Every entity a paper contains and the paper's own relationships between them"""
+    return paper_graph_from_records(_read("get_paper_graph", PAPER_GRAPH_QUERY, paper_id=paper_id))
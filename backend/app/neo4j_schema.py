@@ -0,0 +1,180 @@
+"""Neo4j constraints, indexes and label migration, plus query plans of the hot reads.
+
+    python -m app.neo4j_schema            # create the schema
+    python -m app.neo4j_schema --explain  # print plans of the hot queries
+"""
+import argparse
+import os
+import sys
+from typing import Any, Dict, List, Tuple
+
+from . import neo4j_driver
+from .neo4j_driver import _run, _session
+
+# Create constraints and indexes when the app starts (they are idempotent)
+NEO4J_SCHEMA_BOOTSTRAP = os.getenv("NEO4J_SCHEMA_BOOTSTRAP", "true").lower() in ("1", "true", "yes")
+# Seconds to wait for new indexes to come online
+NEO4J_INDEX_WAIT = int(os.getenv("NEO4J_INDEX_WAIT", "300"))
+
+SCHEMA_STATEMENTS: List[Tuple[str, str]] = [
+    ("paper_id_unique",
+     "CREATE CONSTRAINT paper_id_unique IF NOT EXISTS FOR (p:Paper) REQUIRE p.paper_id IS UNIQUE"),
+    ("entity_id_unique",
+     "CREATE CONSTRAINT entity_id_unique IF NOT EXISTS FOR (e:Entity) REQUIRE e.id IS UNIQUE"),
+    ("entity_name",
+     "CREATE RANGE INDEX entity_name IF NOT EXISTS FOR (e:Entity) ON (e.name)"),
+    ("entity_paper_id",
+     "CREATE RANGE INDEX entity_paper_id IF NOT EXISTS FOR (e:Entity) ON (e.paper_id)"),
+    ("paper_upload_date",
+     "CREATE RANGE INDEX paper_upload_date IF NOT EXISTS FOR (p:Paper) ON (p.upload_date)"),
+]
+
+# Version -> statement run once to bring an older graph up to it. The last
+# applied version is stored on a single :KgSchema node.
+MIGRATIONS: Dict[int, str] = {
+    # Entities written before the shared label existed were only labelled by type
+    1: (
+        "MATCH (n) WHERE n.id IS NOT NULL AND NOT n:Paper AND NOT n:Entity "
+        "CALL { WITH n SET n:Entity } IN TRANSACTIONS OF 10000 ROWS"
+    ),
+    # Older graphs keyed entities by offsets in their paper (ent-{start}-{end}),
+    # so the same id names entities of several papers. One keeps the id, the
+    # others get their paper id appended, and entity_id_unique can be created.
+    2: (
+        "MATCH (n:Entity) WHERE n.id IS NOT NULL "
+        "WITH n.id AS id, collect(n) AS nodes WHERE size(nodes) > 1 "
+        "UNWIND nodes[1..] AS n "
+        "CALL { WITH n SET n.id = n.id + '@' + coalesce(n.paper_id, elementId(n)) } IN TRANSACTIONS OF 10000 ROWS"
+    ),
+}
+
+DUPLICATE_ENTITY_IDS_QUERY = (
+    "MATCH (n:Entity) WHERE n.id IS NOT NULL "
+    "WITH n.id AS id, count(*) AS copies WHERE copies > 1 "
+    "RETURN count(id) AS ids, coalesce(sum(copies), 0) AS nodes"
+)
+
+
+def schema_version(session) -> int:
+    record = _run(session, "schema_version", "MATCH (v:KgSchema) RETURN max(v.version) AS version")
+    return (record[0]["version"] if record else None) or 0
+
+
+def duplicate_entity_ids(session) -> int:
+    """Number of entity ids shared by more than one node"""
+    return _run(session, "duplicate_entity_ids", DUPLICATE_ENTITY_IDS_QUERY)[0]["ids"]
+
+
+def ensure_schema() -> Dict[str, Any]:
+    """Run pending migrations, then create missing constraints and indexes.
+
+    entity_id_unique is not created while entity ids are duplicated; it is
+    reported under "missing" with the duplicate count instead.
+    """
+    with _session(read=False) as session:
+        version = schema_version(session)
+        migrated = []
+        for target in sorted(v for v in MIGRATIONS if v > version):
+            # CALL ... IN TRANSACTIONS needs an auto-commit query, not a managed transaction
+            _run(session, f"migrate_{target}", MIGRATIONS[target])
+            _run(session, "set_schema_version", "MERGE (v:KgSchema) SET v.version = $version", version=target)
+            migrated.append(target)
+        duplicates = duplicate_entity_ids(session)
+        missing = ["entity_id_unique"] if duplicates else []
+        for name, cypher in SCHEMA_STATEMENTS:
+            if name not in missing:
+                _run(session, f"schema_{name}", cypher)
+        _run(session, "await_indexes", f"CALL db.awaitIndexes({NEO4J_INDEX_WAIT})")
+    statements = [name for name, _ in SCHEMA_STATEMENTS if name not in missing]
+    print(f"Neo4j schema ready (version {max([version] + migrated)}, "
+          f"{len(statements)} constraints/indexes, migrated {migrated or 'none'})")
+    if missing:
+        print(f"Warning: {duplicates} entity ids are used by more than one node; "
+              f"not creating {', '.join(missing)}")
+    return {"version": max([version] + migrated), "migrated": migrated, "statements": statements,
+            "missing": missing, "duplicate_entity_ids": duplicates}
+
+
+# Name, query, example parameters. The values only shape the plan; EXPLAIN
+# does not run the query.
+def hot_queries() -> List[Tuple[str, str, Dict[str, Any]]]:
+    d = neo4j_driver
+    return [
+        ("get_subgraph", d.subgraph_query(1), {"center_id": "ent-0", "limit": 100}),
+        ("get_subgraph_edges", d.SUBGRAPH_EDGES_QUERY, {"ids": ["ent-0", "ent-1"]}),
+        ("get_shortest_path", d.shortest_path_query(6), {"source_id": "ent-0", "target_id": "ent-1"}),
+        ("get_papers", d.PAPERS_QUERY, {"paper_ids": ["paper-0"]}),
+        ("get_papers_by_entity", d.PAPERS_BY_ENTITY_QUERY, {"entity_id": "ent-0"}),
+        ("get_graph_for_papers", d.GRAPH_FOR_PAPERS_QUERY, {"paper_ids": ["paper-0"], "limit": 100}),
+        ("get_paper_graph", d.PAPER_GRAPH_QUERY, {"paper_id": "paper-0"}),
+        ("search_entities", d.SEARCH_ENTITIES_QUERY, {"query": "graph", "limit": 50}),
+        ("merge_edges",
+         "UNWIND $rows AS row MATCH (a:Entity {id: row.src}), (b:Entity {id: row.tgt}) RETURN a, b",
+         {"rows": [{"src": "ent-0", "tgt": "ent-1"}]}),
+    ]
+
+
+# Operators that read every node (of a label) instead of seeking an index
+SCAN_OPERATORS = ("AllNodesScan", "NodeByLabelScan", "UndirectedAllRelationshipsScan",
+                  "DirectedAllRelationshipsScan")
+# Scans of the whole graph; a hot query planned with one of these needs fixing
+UNLABELLED_SCANS = ("AllNodesScan", "UndirectedAllRelationshipsScan", "DirectedAllRelationshipsScan")
+
+
+def _operator(plan: Dict[str, Any]) -> str:
+    # Newer servers suffix the runtime, e.g. "NodeIndexSeek@neo4j"
+    return plan.get("operatorType", "").split("@")[0]
+
+
+def plan_lines(plan: Dict[str, Any], depth: int = 0) -> List[str]:
+    """An EXPLAIN plan as an indented operator tree"""
+    details = plan.get("args", plan.get("arguments", {})).get("Details", "")
+    lines = [f"{'  ' * depth}{_operator(plan)}" + (f"  {details}" if details else "")]
+    for child in plan.get("children", []):
+        lines.extend(plan_lines(child, depth + 1))
+    return lines
+
+
+def plan_operators(plan: Dict[str, Any]) -> List[str]:
+    return [_operator(plan)] + [op for child in plan.get("children", []) for op in plan_operators(child)]
+
+
+def explain(name: str, cypher: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    with _session(read=True) as session:
+        summary = session.run("EXPLAIN " + cypher, **params).consume()
+    operators = plan_operators(summary.plan)
+    return {
+        "name": name,
+        "plan": plan_lines(summary.plan),
+        "index": any("Index" in op for op in operators),
+        "scans": [op for op in operators if op in SCAN_OPERATORS],
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.neo4j_schema", description=__doc__.splitlines()[0])
+    parser.add_argument("--explain", action="store_true", help="print plans of the hot queries instead")
+    args = parser.parse_args(argv)
+    try:
+        if not args.explain:
+            return 1 if ensure_schema()["missing"] else 0
+        queries = hot_queries()
+        full_scans = 0
+        for name, cypher, params in queries:
+            result = explain(name, cypher, params)
+            status = "index" if result["index"] else "no index"
+            if result["scans"]:
+                status += f", scans: {', '.join(result['scans'])}"
+            print(f"{name} ({status})")
+            for line in result["plan"]:
+                print(f"    {line}")
+            full_scans += any(op in UNLABELLED_SCANS for op in result["scans"])
+        # search_entities is a substring match, so a label scan is expected there
+        print(f"{full_scans} of {len(queries)} hot queries scan the whole graph")
+        return 1 if full_scans else 0
+    finally:
+        neo4j_driver.close_driver()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
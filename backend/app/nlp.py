@@ -1,89 +1,369 @@
 import os
-import spacy
-from typing import List, Dict, Any, Tuple
-from transformers import pipeline
+import threading
+import time
+from typing import List, Dict, Any, Tuple, Iterable, Iterator, Optional, Union
 
-# Load spaCy model lazily
+from .entity_resolution import resolve, aliases_fingerprint
+from .relation_extraction import (RELATION_EXTRACTION, get_relation_extractor, match_entity,
+                                  relation_config_key, relation_label)
+
+SPACY_MODEL = os.getenv("SPACY_MODEL", "en_core_web_sm")
+# Bump when entity/relation extraction changes so cached NLP output is rebuilt
+NLP_PIPELINE_VERSION = "3"
+
+# Defaults for batched parsing with nlp.pipe
+NLP_BATCH_SIZE = int(os.getenv("NLP_BATCH_SIZE", "8"))
+NLP_N_PROCESS = int(os.getenv("NLP_N_PROCESS", "1"))
+# Longest text handed to spaCy in one piece; longer pages are split
+NLP_CHUNK_CHARS = int(os.getenv("NLP_CHUNK_CHARS", "100000"))
+# Evidence sentence ids kept per co-occurrence edge
+NLP_MAX_EVIDENCE = int(os.getenv("NLP_MAX_EVIDENCE", "3"))
+
+# Named pipeline profiles; only doc.ents and doc.sents are used downstream.
+#   full:    the whole model (tagger, parser, lemmatizer, ...), parser sentences
+#   ner:     NER only, with the rule-based sentencizer; much faster
+#   chunked: the whole model, but texts are cut into small chunks and
+#            max_length is capped, bounding memory on very long papers
+NLP_PROFILES: Dict[str, Dict[str, Any]] = {
+    "full": {"exclude": [], "chunk_chars": None, "max_length": None},
+    "ner": {"exclude": ["tagger", "morphologizer", "parser", "senter", "attribute_ruler", "lemmatizer"],
+            "chunk_chars": None, "max_length": None},
+    "chunked": {"exclude": [], "chunk_chars": 20000, "max_length": 20000},
+}
+NLP_PROFILE = os.getenv("NLP_PROFILE", "full").lower()
+
+# Load spaCy model lazily; spacy itself is only imported by the first load
 _nlp = None
+_nlp_lock = threading.Lock()
+_model_status: Dict[str, Any] = {"model": SPACY_MODEL, "profile": NLP_PROFILE, "loaded": False,
+                                 "load_seconds": None, "error": None}
+
+
+def get_profile(name: str = None) -> Dict[str, Any]:
+    name = (name or NLP_PROFILE).lower()
+    if name not in NLP_PROFILES:
+        raise ValueError(f"Unknown NLP_PROFILE '{name}'; choose one of {', '.join(NLP_PROFILES)}")
+    return NLP_PROFILES[name]
+
+
+def chunk_chars(profile: str = None) -> int:
+    """Longest text the profile parses in one piece"""
+    return get_profile(profile)["chunk_chars"] or NLP_CHUNK_CHARS
+
+
+def load_pipeline(profile: str = None, model: str = None):
+    """Load `model` (default SPACY_MODEL) with the components `profile` keeps"""
+    import spacy
+    settings = get_profile(profile)
+    nlp = spacy.load(model or SPACY_MODEL, exclude=settings["exclude"])
+    if not {"parser", "senter", "sentencizer"} & set(nlp.pipe_names):
+        nlp.add_pipe("sentencizer", first=True)
+    if settings["max_length"]:
+        nlp.max_length = settings["max_length"]
+    return nlp
 
 
 def get_spacy():
     global _nlp
     if _nlp is None:
-        try:
-            _nlp = spacy.load("en_core_web_sm")
-        except Exception:
-            # Informative fallback: user must download the model
-            raise RuntimeError("spaCy model 'en_core_web_sm' not found. Run: python -m spacy download en_core_web_sm")
+        with _nlp_lock:
+            if _nlp is None:
+                started = time.perf_counter()
+                get_profile()  # an unknown profile is a config error, not a missing model
+                try:
+                    nlp = load_pipeline()
+                except Exception as e:
+                    _model_status["error"] = str(e)
+                    # Informative fallback: user must download the model
+                    raise RuntimeError(f"spaCy model '{SPACY_MODEL}' not found. Run: python -m spacy download {SPACY_MODEL}")
+                _model_status.update(loaded=True, error=None, load_seconds=round(time.perf_counter() - started, 3))
+                _nlp = nlp
     return _nlp
 
 
-def extract_entities(text: str) -> List[Dict[str, Any]]:
-    nlp = get_spacy()
-    doc = nlp(text)
+def set_spacy(nlp):
+    """Use an already built pipeline (e.g. a blank model with an entity ruler)"""
+    global _nlp
+    _nlp = nlp
+    _model_status.update(loaded=nlp is not None, error=None)
+
+
+def warm_up() -> Dict[str, Any]:
+    """Load the spaCy model and run it once, so the first request does not pay for it"""
+    try:
+        get_spacy()("Warm-up sentence for the pipeline.")
+    except Exception as e:
+        print(f"Warning: spaCy warm-up failed: {e}")
+    return model_status()
+
+
+def model_status() -> Dict[str, Any]:
+    return dict(_model_status)
+
+
+def nlp_config_key() -> str:
+    """Identify the NLP configuration that produced a graph, for cache keys"""
+    aliases = aliases_fingerprint()
+    profile = "" if NLP_PROFILE == "full" else f"-p{NLP_PROFILE}"
+    return (f"{SPACY_MODEL}{profile}-v{NLP_PIPELINE_VERSION}" + (f"-a{aliases}" if aliases else "")
+            + relation_config_key())
+
+
+def extract_entities(text: str, doc=None, offset: int = 0) -> List[Dict[str, Any]]:
+    """Named entity mentions with resolved ids, so every mention of a concept
+    (in any paper) shares one id; `offset` shifts positions when the doc is a
+    chunk of a larger text"""
+    if doc is None:
+        doc = get_spacy()(text)
     entities = []
     for ent in doc.ents:
+        start, end = ent.start_char + offset, ent.end_char + offset
+        eid, key, name = resolve(ent.text, ent.label_)
+        if not key:
+            continue
         entities.append({
-            "id": f"ent-{ent.start_char}-{ent.end_char}",
-            "name": ent.text,
+            "id": eid,
+            "name": name,
             "type": ent.label_,
-            "props": {"start": ent.start_char, "end": ent.end_char},
+            "props": {"key": key, "start": start, "end": end},
         })
     return entities
 
 
-def extract_relations(text: str) -> List[Dict[str, Any]]:
-    """A simple heuristic relation extractor: create relations between entities
-    that co-occur in the same sentence. This is a placeholder you can replace
-    with a Hugging Face relation extraction model for higher quality.
+def extract_relations(text: str, doc=None, offset: int = 0,
+                      sentences: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+    """A simple heuristic relation extractor: entities that co-occur in the same
+    sentence are related. Co-occurrences are aggregated into one edge per entity
+    pair with a count and a few evidence sentence ids; when `sentences` is given
+    it is filled with the text of every cited sentence. This is a placeholder you
+    can replace with a Hugging Face relation extraction model for higher quality.
     """
+    if doc is None:
+        doc = get_spacy()(text)
+    builder = _GraphBuilder()
+    builder.add_doc(doc, offset)
+    if sentences is not None:
+        sentences.update(builder.sentences)
+    return builder.edges
+
+
+def advanced_relation_extraction(text: str, model_name: str = None,
+                                 sentences: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+    """Typed, directed relation edges between the entities of `text`, found by
+    the relation model (see relation_extraction) whether or not
+    RELATION_EXTRACTION is on. Edges have the same shape as co-occurrence edges."""
+    builder = _GraphBuilder(relations=get_relation_extractor(model_name))
     nlp = get_spacy()
-    doc = nlp(text)
-    relations = []
-    for sent in doc.sents:
-        ents = [ent for ent in sent.ents]
-        # Pairwise relations
-        for i in range(len(ents)):
-            for j in range(i + 1, len(ents)):
-                a = ents[i]
-                b = ents[j]
-                relations.append({
-                    "source": f"ent-{a.start_char}-{a.end_char}",
-                    "target": f"ent-{b.start_char}-{b.end_char}",
-                    "label": "cooccurs_in_sentence",
-                    "props": {"sentence": sent.text.strip()},
-                })
-    return relations
-
-
-def advanced_relation_extraction(text: str, model_name: str = "Babelscape/rebel-large") -> List[Dict[str, Any]]:
-    """Optional: use a transformers pipeline or custom model to extract relations.
-    This function is a stub showing how you'd plug a Hugging Face model.
+    offset = 0
+    for chunk in iter_text_chunks([text]):
+        builder.add_doc(nlp(chunk), offset)
+        offset += len(chunk)
+    builder.result()
+    if sentences is not None:
+        sentences.update(builder.sentences)
+    return builder.relation_edges
+
+
+class _GraphBuilder:
+    """Accumulates nodes, aggregated edges and evidence sentences over one or more
+    parsed chunks of a text"""
+
+    def __init__(self, max_evidence: int = None, relations=None):
+        self.max_evidence = NLP_MAX_EVIDENCE if max_evidence is None else max_evidence
+        self.nodes = {}
+        self.edges = []
+        # (id, id) -> edge; pairs are ordered by id so direction is stable across papers
+        self.pairs = {}
+        # Interned evidence: sentence id -> text, and text -> id for repeats
+        self.sentences = {}
+        self._sentence_ids = {}
+        # Relation extractor, when enabled; sentences with 2+ entities are
+        # collected and sent to it in one batched call by result()
+        if relations is None and RELATION_EXTRACTION:
+            relations = get_relation_extractor()
+        self.relations = relations
+        self.relation_edges = []
+        self._relation_keys = {}
+        self._candidates = []
+
+    def _intern_sentence(self, sent, offset: int) -> str:
+        return self._intern_text(sent.text.strip(), sent.start_char + offset, sent.end_char + offset)
+
+    def _intern_text(self, text: str, start: int, end: int) -> str:
+        sid = self._sentence_ids.get(text)
+        if sid is None:
+            sid = f"sent-{start}-{end}"
+            self._sentence_ids[text] = sid
+            self.sentences[sid] = text
+        return sid
+
+    def add_doc(self, doc, offset: int = 0):
+        # One node per resolved entity; the first mention names it
+        mention_ids = {}
+        for e in extract_entities(doc.text, doc=doc, offset=offset):
+            mention_ids[(e["props"]["start"], e["props"]["end"])] = e["id"]
+            if e["id"] not in self.nodes:
+                self.nodes[e["id"]] = {"id": e["id"], "name": e["name"], "type": e["type"],
+                                       "props": {"key": e["props"]["key"]}}
+        # One edge per entity pair, counting the sentences they share
+        for sent in doc.sents:
+            ids = sorted({mention_ids.get((ent.start_char + offset, ent.end_char + offset))
+                          for ent in sent.ents} - {None})
+            if self.relations is not None and len(ids) > 1:
+                entities = [(eid, self.nodes[eid]["props"]["key"], self.nodes[eid]["type"]) for eid in ids]
+                self._candidates.append((sent.text.strip(), sent.start_char + offset, sent.end_char + offset,
+                                         entities))
+            sid = None
+            for i in range(len(ids)):
+                for j in range(i + 1, len(ids)):
+                    a, b = ids[i], ids[j]
+                    edge = self.pairs.get((a, b))
+                    if edge is None:
+                        edge = {
+                            "source": a,
+                            "target": b,
+                            "label": "cooccurs_in_sentence",
+                            "props": {"count": 0, "weight": 0, "evidence": []},
+                        }
+                        self.pairs[(a, b)] = edge
+                        self.edges.append(edge)
+                    props = edge["props"]
+                    props["count"] += 1
+                    props["weight"] = props["count"]
+                    if len(props["evidence"]) < self.max_evidence:
+                        if sid is None:
+                            sid = self._intern_sentence(sent, offset)
+                        if sid not in props["evidence"]:
+                            props["evidence"].append(sid)
+
+    def _add_relations(self):
+        """Run the relation model over the collected sentences and add one edge
+        per (head, relation, tail), counted like co-occurrence edges"""
+        candidates, self._candidates = self._candidates, []
+        triplets = self.relations.extract([text for text, _, _, _ in candidates])
+        for (text, start, end, entities), found in zip(candidates, triplets):
+            for triplet in found:
+                source = match_entity(triplet["head"], entities)
+                target = match_entity(triplet["tail"], entities)
+                label = relation_label(triplet["relation"])
+                if source is None or target is None or source == target or not label:
+                    continue
+                edge = self._relation_keys.get((source, target, label))
+                if edge is None:
+                    edge = {
+                        "source": source,
+                        "target": target,
+                        "label": label,
+                        "props": {"count": 0, "weight": 0, "evidence": [], "relation": triplet["relation"]},
+                    }
+                    self._relation_keys[(source, target, label)] = edge
+                    self.relation_edges.append(edge)
+                    self.edges.append(edge)
+                props = edge["props"]
+                props["count"] += 1
+                props["weight"] = props["count"]
+                sid = self._intern_text(text, start, end)
+                if len(props["evidence"]) < self.max_evidence and sid not in props["evidence"]:
+                    props["evidence"].append(sid)
+
+    def result(self) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        if self._candidates:
+            self._add_relations()
+        return list(self.nodes.values()), self.edges
+
+
+def graph_from_doc(doc, sentences: Optional[Dict[str, str]] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Build deduplicated nodes and aggregated edges from an already parsed Doc"""
+    builder = _GraphBuilder()
+    builder.add_doc(doc)
+    nodes, edges = builder.result()
+    if sentences is not None:
+        sentences.update(builder.sentences)
+    return nodes, edges
+
+
+def iter_text_chunks(pages: Iterable[str], max_chars: int = None) -> Iterator[str]:
+    """Re-chunk page texts so no chunk exceeds max_chars, splitting at paragraph or line breaks"""
+    max_chars = max_chars or chunk_chars()
+    for page in pages:
+        while len(page) > max_chars:
+            cut = page.rfind("\n\n", 0, max_chars)
+            if cut <= 0:
+                cut = page.rfind("\n", 0, max_chars)
+            if cut <= 0:
+                cut = page.rfind(" ", 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            yield page[:cut]
+            page = page[cut:]
+        if page:
+            yield page
+
+
+def process_chunks_to_graph(chunks: Iterable[str], batch_size: Optional[int] = None,
+                            n_process: Optional[int] = None,
+                            sentences: Optional[Dict[str, str]] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Build one text's graph from consecutive chunks (e.g. pages) consumed lazily.
+
+    Only a batch of chunks is parsed at a time, so memory depends on chunk
+    size rather than on the length of the whole text. Evidence sentences are
+    added to `sentences` when it is given.
     """
-    # Example: load a relation extraction pipeline if a suitable model is available
-    # NOTE: Many relation-extraction models require custom preprocessing and outputs.
-    try:
-        rel_pipe = pipeline("text-classification", model=model_name)
-    except Exception:
-        raise RuntimeError("Failed to load transformer pipeline for relation extraction")
-    # Use rel_pipe on sentences or candidate pairs and convert outputs to graph edges
-    return []
-
-
-def process_text_to_graph(text: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
-    entities = extract_entities(text)
-    relations = extract_relations(text)
-    # Deduplicate entities by name
-    seen = {}
-    nodes = []
-    for e in entities:
-        key = e["name"].strip().lower()
-        if key in seen:
-            # prefer existing id
-            continue
-        seen[key] = e
-        nodes.append(e)
-    # Filter relations to only include known entities
-    valid_ids = {n["id"] for n in nodes}
-    edges = [r for r in relations if r["source"] in valid_ids and r["target"] in valid_ids]
+    found: List[Dict[str, str]] = []
+    [(nodes, edges)] = iter_texts_to_graphs([chunks], batch_size=batch_size, n_process=n_process, sentences=found)
+    if sentences is not None:
+        sentences.update(found[0])
     return nodes, edges
+
+
+def process_text_to_graph(text: str, sentences: Optional[Dict[str, str]] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Parse a text once and build its graph; long texts are parsed in chunks"""
+    if len(text) <= chunk_chars():
+        return graph_from_doc(get_spacy()(text), sentences=sentences)
+    return process_chunks_to_graph(iter_text_chunks([text]), sentences=sentences)
+
+
+def iter_texts_to_graphs(texts: Iterable[Union[str, Iterable[str]]], batch_size: Optional[int] = None,
+                         n_process: Optional[int] = None,
+                         sentences: Optional[List[Dict[str, str]]] = None) -> Iterator[Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]]:
+    """Stream (nodes, edges) for many texts, parsed together in nlp.pipe batches.
+
+    A text is a string, parsed in chunks when longer than the profile's chunk
+    size, or an iterable of chunks (e.g. a paper's pages) consumed lazily.
+    Results are in input order; when `sentences` is given, each text's
+    evidence sentences are appended to it as one dict per result.
+    """
+    def with_offsets():
+        for i, text in enumerate(texts):
+            offset = 0
+            for chunk in iter_text_chunks([text]) if isinstance(text, str) else text:
+                yield chunk, (i, offset)
+                offset += len(chunk)
+            if offset == 0:
+                # An empty text still gets its (empty) result
+                yield "", (i, 0)
+
+    def finish(builder):
+        nodes, edges = builder.result()
+        if sentences is not None:
+            sentences.append(builder.sentences)
+        return nodes, edges
+
+    nlp = get_spacy()
+    docs = nlp.pipe(with_offsets(), as_tuples=True, batch_size=batch_size or NLP_BATCH_SIZE,
+                    n_process=n_process or NLP_N_PROCESS)
+    current, builder = None, None
+    for doc, (i, offset) in docs:
+        if i != current:
+            if builder is not None:
+                yield finish(builder)
+            current, builder = i, _GraphBuilder()
+        builder.add_doc(doc, offset)
+    if builder is not None:
+        yield finish(builder)
+
+
+def process_texts_to_graphs(texts: List[str], batch_size: Optional[int] = None, n_process: Optional[int] = None,
+                            sentences: Optional[List[Dict[str, str]]] = None) -> List[Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]]:
+    """Batch version of process_text_to_graph; results are in input order"""
+    return list(iter_texts_to_graphs(texts, batch_size=batch_size, n_process=n_process, sentences=sentences))
@@ -0,0 +1,115 @@
+import json
+import os
+import zlib
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+
+from .local_db import connect, data_path
+
+# Per-paper graph snapshots, written when a paper is ingested so opening a
+# paper reads one row instead of querying the graph
+PAPER_GRAPHS_PATH = os.getenv("PAPER_GRAPHS_PATH") or data_path("paper_graphs.sqlite3")
+PAPER_GRAPH_SNAPSHOTS = os.getenv("PAPER_GRAPH_SNAPSHOTS", "true").lower() in ("1", "true", "yes")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS paper_graphs (
+    paper_id TEXT PRIMARY KEY,
+    nodes INTEGER NOT NULL,
+    edges INTEGER NOT NULL,
+    graph BLOB NOT NULL
+) WITHOUT ROWID;
+"""
+
+_initialized = set()
+
+Graph = Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]
+
+
+def _db():
+    conn = connect(PAPER_GRAPHS_PATH)
+    if PAPER_GRAPHS_PATH not in _initialized:
+        conn.executescript(_SCHEMA)
+        _initialized.add(PAPER_GRAPHS_PATH)
+    return conn
+
+
+def view_from_written(paper_id: str, nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]],
+                      edge_ids: List[Optional[str]]) -> Graph:
+    """The graph a store returns for a paper, built from the nodes and edges written for it.
+
+    `edge_ids` are the store's ids of the written edges, in the same order;
+    edges the store skipped (None) are left out, as a read would.
+    """
+    view_nodes = []
+    for n in nodes:
+        nid = n.get("id") or n.get("name")
+        view_nodes.append({
+            "id": nid,
+            "label": n.get("name") or nid,
+            "type": n.get("type") or "Entity",
+            "props": {**n.get("props", {}), "id": nid, "name": n.get("name"), "paper_id": paper_id},
+        })
+    view_edges = []
+    for e, edge_id in zip(edges, edge_ids):
+        if edge_id is None:
+            continue
+        view_edges.append({
+            "id": edge_id,
+            "source": e["source"],
+            "target": e["target"],
+            "label": e.get("label") or "RELATED_TO",
+            "props": {**e.get("props", {}), "paper_id": paper_id},
+        })
+    return view_nodes, view_edges
+
+
+def order_graph(nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]]) -> Graph:
+    """Nodes by id, and edges by the position of their later endpoint.
+
+    Paging then hands out each edge on the page that completes it, so a
+    client adding pages to its view never holds an edge without its nodes.
+    """
+    nodes = sorted({n["id"]: n for n in nodes}.values(), key=lambda n: n["id"])
+    rank = {n["id"]: i for i, n in enumerate(nodes)}
+    edges = sorted((e for e in edges if e["source"] in rank and e["target"] in rank),
+                   key=lambda e: (max(rank[e["source"]], rank[e["target"]]), e["id"]))
+    return nodes, edges
+
+
+def page_graph(nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]], offset: int, limit: int) -> Dict[str, Any]:
+    """One page of an ordered graph: `limit` nodes from `offset`, plus the edges they complete"""
+    offset, limit = max(0, offset), max(1, limit)
+    end = min(offset + limit, len(nodes))
+    rank = {n["id"]: i for i, n in enumerate(nodes)}
+    last = [max(rank[e["source"]], rank[e["target"]]) for e in edges]
+    return {
+        "nodes": nodes[offset:end],
+        "edges": edges[bisect_left(last, offset):bisect_right(last, end - 1)] if end > offset else [],
+        "offset": offset,
+        "limit": limit,
+        "total_nodes": len(nodes),
+        "total_edges": len(edges),
+        "next_offset": end if end < len(nodes) else None,
+    }
+
+
+def save_graph(paper_id: str, nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]]):
+    """Replace a paper's snapshot with an already ordered graph"""
+    data = zlib.compress(json.dumps({"nodes": nodes, "edges": edges}).encode("utf-8"), 6)
+    _db().execute(
+        "INSERT OR REPLACE INTO paper_graphs (paper_id, nodes, edges, graph) VALUES (?, ?, ?, ?)",
+        (paper_id, len(nodes), len(edges), data),
+    )
+
+
+def get_graph(paper_id: str) -> Optional[Graph]:
+    """A paper's ordered snapshot, or None when it has none"""
+    row = _db().execute("SELECT graph FROM paper_graphs WHERE paper_id = ?", (paper_id,)).fetchone()
+    if row is None:
+        return None
+    graph = json.loads(zlib.decompress(row["graph"]).decode("utf-8"))
+    return graph["nodes"], graph["edges"]
+
+
+def remove_paper(paper_id: str):
+    _db().execute("DELETE FROM paper_graphs WHERE paper_id = ?", (paper_id,))
@@ -1,65 +1,166 @@
 import os
 import json
+import hashlib
+import queue
+import threading
+import time
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Iterator, Optional, Tuple
 from datetime import datetime
-import uuid
 
-from .pdf_utils import extract_text_from_pdf
-from .nlp import process_text_to_graph
-from .neo4j_driver import upsert_paper, upsert_graph_with_paper
+from .pdf_utils import iter_pdf_pages
+from .nlp import iter_texts_to_graphs, iter_text_chunks, nlp_config_key, NLP_BATCH_SIZE
+from .storage import get_store
+from . import catalog, text_index, text_store, evidence, metrics
 
 # Directory containing pre-loaded research papers
 PAPERS_DIR = os.getenv("PAPERS_DIR", "./papers")
+# Legacy JSON index, migrated into the papers catalog on first use
 PAPERS_INDEX_FILE = os.path.join(PAPERS_DIR, "papers_index.json")
+# Extracted text and NLP output, keyed by PDF content hash
+PAPERS_CACHE_DIR = os.getenv("PAPERS_CACHE_DIR", os.path.join(PAPERS_DIR, ".cache"))
+# pdfminer ends every page with a form feed
+PAGE_BREAK = "\f"
+# Extraction/NLP worker processes and bound on papers in flight between stages
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", str(os.cpu_count() or 1)))
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "16"))
+
+_migrated = False
 
 def ensure_papers_directory():
-    """Create papers directory and index if they don't exist"""
+    """Create the papers directory and move a legacy papers_index.json into the catalog"""
+    global _migrated
     Path(PAPERS_DIR).mkdir(parents=True, exist_ok=True)
-    if not os.path.exists(PAPERS_INDEX_FILE):
-        with open(PAPERS_INDEX_FILE, 'w') as f:
-            json.dump({"papers": []}, f, indent=2)
+    if not _migrated:
+        count = catalog.migrate_from_json(PAPERS_INDEX_FILE)
+        if count:
+            print(f"Migrated {count} papers from {PAPERS_INDEX_FILE} to the papers catalog")
+        _migrated = True
 
-def load_papers_index() -> Dict[str, Any]:
-    """Load the papers index from JSON file"""
+def get_preloaded_papers() -> List[Dict[str, Any]]:
+    """Get list of all pre-loaded papers"""
     ensure_papers_directory()
-    try:
-        with open(PAPERS_INDEX_FILE, 'r') as f:
-            return json.load(f)
-    except Exception:
-        return {"papers": []}
+    return catalog.list_papers()
 
-def save_papers_index(index: Dict[str, Any]):
-    """Save the papers index to JSON file"""
+def get_papers_page(offset: int = 0, limit: int = 100) -> Dict[str, Any]:
+    """One page of the papers catalog plus the total count"""
     ensure_papers_directory()
-    with open(PAPERS_INDEX_FILE, 'w') as f:
-        json.dump(index, f, indent=2)
+    return {"papers": catalog.list_papers(offset, limit), "total": catalog.count_papers(),
+            "offset": offset, "limit": limit}
 
-def get_preloaded_papers() -> List[Dict[str, Any]]:
-    """Get list of all pre-loaded papers"""
-    index = load_papers_index()
-    return index.get("papers", [])
+def compute_content_hash(pdf_path: str) -> str:
+    """SHA-256 of the PDF bytes, read in chunks"""
+    digest = hashlib.sha256()
+    with open(pdf_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
 
-def add_paper_to_collection(pdf_path: str, title: str = None, authors: str = None, 
-                           year: str = None, journal: str = None) -> str:
-    """Add a paper to the collection and process it"""
+def paper_id_for_hash(content_hash: str) -> str:
+    """Papers are keyed by content, so re-ingesting a file maps to the same node"""
+    return content_hash[:32]
+
+def _is_unchanged(content_hash: str) -> bool:
+    """A paper is skipped when its bytes and the NLP config both match the catalog"""
+    ensure_papers_directory()
+    entry = catalog.get_by_hash(content_hash)
+    return entry is not None and entry.get("nlp_version") == nlp_config_key()
+
+def _cache_path(content_hash: str, suffix: str) -> str:
+    return os.path.join(PAPERS_CACHE_DIR, f"{content_hash}.{suffix}")
+
+def _write_cache(path: str, content: str):
+    """Write a cache file atomically so parallel workers never see partial files"""
+    Path(PAPERS_CACHE_DIR).mkdir(parents=True, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+def extract_to_cache(pdf_path: str, content_hash: str) -> str:
+    """Stream a PDF's pages into the text cache, running pdfminer only on a miss.
+
+    Pages are written as they are extracted (each ends with a form feed), so
+    the full text is never held in memory. Returns the cache file path.
+    """
+    path = _cache_path(content_hash, "txt")
+    if os.path.exists(path):
+        return path
+    Path(PAPERS_CACHE_DIR).mkdir(parents=True, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    has_text = False
+    try:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for page in iter_pdf_pages(pdf_path):
+                has_text = has_text or bool(page.strip())
+                f.write(page)
+        if not has_text:
+            raise ValueError("Could not extract text from PDF")
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return path
+
+def iter_cached_pages(content_hash: str, read_size: int = 1 << 16) -> Iterator[str]:
+    """Yield cached pages one at a time (form feeds kept, so offsets match the full text)"""
+    with open(_cache_path(content_hash, "txt"), 'r', encoding='utf-8') as f:
+        pending = ""
+        for block in iter(lambda: f.read(read_size), ''):
+            pending += block
+            *pages, pending = pending.split(PAGE_BREAK)
+            for page in pages:
+                yield page + PAGE_BREAK
+        if pending:
+            yield pending
+
+def read_cached_text(content_hash: str, max_chars: int = -1) -> str:
+    """The first `max_chars` characters of a cached text (all of it by default)"""
+    with open(_cache_path(content_hash, "txt"), 'r', encoding='utf-8') as f:
+        return f.read(max_chars)
+
+def load_cached_graph(content_hash: str) -> Optional[Tuple[List[Dict[str, Any]], List[Dict[str, Any]], Dict[str, str]]]:
+    """Return cached (nodes, edges, evidence sentences) for the current NLP config, if any"""
+    path = _cache_path(content_hash, f"{nlp_config_key()}.json")
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        return cached["nodes"], cached["edges"], cached.get("sentences", {})
+    except Exception:
+        return None
+
+def save_cached_graph(content_hash: str, nodes, edges, sentences: Dict[str, str] = None):
+    _write_cache(_cache_path(content_hash, f"{nlp_config_key()}.json"),
+                 json.dumps({"nodes": nodes, "edges": edges, "sentences": sentences or {}}))
+
+def _prepare_paper(pdf_path: str, title: str = None, authors: str = None,
+                   year: str = None, journal: str = None, content_hash: str = None,
+                   timings: Dict[str, float] = None) -> Dict[str, Any]:
+    """Extract a PDF's text into the cache and build its metadata record"""
     if not os.path.exists(pdf_path):
         raise FileNotFoundError(f"PDF file not found: {pdf_path}")
     
-    # Generate unique paper ID
-    paper_id = str(uuid.uuid4())
+    if not content_hash:
+        with metrics.span("hash", timings):
+            content_hash = compute_content_hash(pdf_path)
+    paper_id = paper_id_for_hash(content_hash)
     filename = os.path.basename(pdf_path)
     
-    # Extract text from PDF
-    text = extract_text_from_pdf(pdf_path)
-    if not text.strip():
-        raise ValueError("Could not extract text from PDF")
+    # Extract text from PDF (or reuse the cached extraction)
+    with metrics.span("extract", timings):
+        extract_to_cache(pdf_path, content_hash)
+        text_length = sum(len(page) for page in iter_cached_pages(content_hash))
     
     # If no title provided, use filename or extract from first lines
     if not title:
         title = filename.replace('.pdf', '').replace('_', ' ').replace('-', ' ').title()
         # Try to get title from first non-empty lines
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
+        lines = [line.strip() for line in read_cached_text(content_hash, 2000).split('\n') if line.strip()]
         if lines:
             potential_title = lines[0]
             if len(potential_title) < 200 and not potential_title.lower().startswith('abstract'):
@@ -68,66 +169,337 @@ def add_paper_to_collection(pdf_path: str, title: str = None, authors: str = Non
     # Create paper metadata
     paper_metadata = {
         "paper_id": paper_id,
+        "content_hash": content_hash,
+        "nlp_version": nlp_config_key(),
         "filename": filename,
         "title": title,
         "authors": authors,
         "year": year,
         "journal": journal,
         "upload_date": datetime.now().isoformat(),
-        "text_length": len(text),
+        "text_length": text_length,
         "pdf_path": pdf_path
     }
+    return paper_metadata
+
+def _parse_paper(paper_metadata: Dict[str, Any], batch_size: int = None, n_process: int = None,
+                 timings: Dict[str, float] = None):
+    """Run NLP over a paper's cached pages unless the current config's output is cached"""
+    content_hash = paper_metadata["content_hash"]
+    with metrics.span("nlp", timings):
+        cached = load_cached_graph(content_hash)
+        if cached is not None:
+            return cached
+        found: List[Dict[str, str]] = []
+        [(nodes, edges)] = iter_texts_to_graphs([iter_text_chunks(iter_cached_pages(content_hash))],
+                                                batch_size=batch_size, n_process=n_process, sentences=found)
+        sentences = found[0]
+        save_cached_graph(content_hash, nodes, edges, sentences)
+    return nodes, edges, sentences
+
+def _store_paper(paper_metadata: Dict[str, Any], nodes, edges, sentences: Dict[str, str] = None):
+    """Write a processed paper to the graph store, text store, search index and papers index.
+
+    The text is streamed from the cache; Paper nodes only carry metadata.
+    """
+    paper_id = paper_metadata["paper_id"]
+    store = get_store()
+    with metrics.span("store.graph"):
+        store.upsert_paper(paper_id, paper_metadata["filename"], paper_metadata["title"], paper_metadata)
+        store.upsert_graph_with_paper(paper_id, nodes, edges)
+    store_local(paper_metadata, sentences)
+
+def store_local(paper_metadata: Dict[str, Any], sentences: Dict[str, str] = None):
+    """Write a paper's evidence, text, search index entry and catalog row (everything but the graph)"""
+    paper_id = paper_metadata["paper_id"]
+    content_hash = paper_metadata["content_hash"]
+    with metrics.span("store.evidence"):
+        evidence.save_sentences(paper_id, sentences or {})
+    with metrics.span("store.text"):
+        text_store.put_text(paper_id, iter_cached_pages(content_hash))
+    with metrics.span("store.search_index"):
+        text_index.index_paper(paper_id, iter_cached_pages(content_hash), title=paper_metadata.get("title"),
+                               authors=paper_metadata.get("authors"), journal=paper_metadata.get("journal"))
     
-    # Process text with NLP
-    nodes, edges = process_text_to_graph(text)
-    
-    # Store in Neo4j
-    upsert_paper(paper_id, filename, title, text, paper_metadata)
-    upsert_graph_with_paper(paper_id, nodes, edges)
-    
-    # Update papers index
-    index = load_papers_index()
-    index["papers"].append(paper_metadata)
-    save_papers_index(index)
-    
-    return paper_id
+    # Record the paper in the catalog, replacing any previous entry for the same content
+    with metrics.span("store.catalog"):
+        catalog.upsert_paper(paper_metadata)
 
-def process_papers_directory(papers_dir: str = None):
-    """Process all PDF files in a directory and add them to the collection"""
+def add_paper_to_collection(pdf_path: str, title: str = None, authors: str = None, 
+                           year: str = None, journal: str = None, force: bool = False) -> str:
+    """Add a paper to the collection and process it.
+
+    Files whose content hash is already indexed with the current NLP config are
+    skipped unless `force` is set.
+    """
+    if not os.path.exists(pdf_path):
+        raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+    with metrics.span("total"):
+        with metrics.span("hash"):
+            content_hash = compute_content_hash(pdf_path)
+        if not force and _is_unchanged(content_hash):
+            return paper_id_for_hash(content_hash)
+        
+        paper_metadata = _prepare_paper(pdf_path, title, authors, year, journal, content_hash)
+        
+        # Process text with NLP
+        nodes, edges, sentences = _parse_paper(paper_metadata)
+        
+        # Store in Neo4j
+        _store_paper(paper_metadata, nodes, edges, sentences)
+    return paper_metadata["paper_id"]
+
+def _skipped_result(pdf_file: Path, content_hash: str) -> Dict[str, Any]:
+    return {
+        "paper_id": paper_id_for_hash(content_hash),
+        "filename": pdf_file.name,
+        "status": "skipped"
+    }
+
+def _extract_and_parse(pdf_path: str, content_hash: str = None):
+    """Extraction and NLP stage; runs inside an ingestion worker process.
+
+    Stage timings are returned with the result, since the worker's own metrics
+    registry is never scraped.
+    """
+    timings: Dict[str, float] = {}
+    paper_metadata = _prepare_paper(pdf_path, content_hash=content_hash, timings=timings)
+    nodes, edges, sentences = _parse_paper(paper_metadata, timings=timings)
+    return paper_metadata, nodes, edges, sentences, timings
+
+def _store_result(item, store_paper: Callable = None) -> Dict[str, Any]:
+    """Write stage: store one parsed paper, or pass through an upstream error"""
+    filename, parsed, error = item
+    if error is None:
+        paper_metadata, nodes, edges, sentences, timings = parsed
+        metrics.observe_stages(timings)
+        try:
+            status = (store_paper or _store_paper)(paper_metadata, nodes, edges, sentences)
+            return {
+                "paper_id": paper_metadata["paper_id"],
+                "filename": filename,
+                "status": status or "success"
+            }
+        except Exception as e:
+            error = e
+    print(f"Error processing {filename}: {str(error)}")
+    return {
+        "filename": filename,
+        "status": "error",
+        "error": str(error)
+    }
+
+def _iter_sequential(pdf_files: List[Path], batch_size: int, force: bool = False,
+                     store_paper: Callable = None,
+                     is_done: Callable[[str], bool] = None) -> Iterator[Dict[str, Any]]:
+    """Single-process path: papers are extracted in turn and their pages parsed
+    together by iter_texts_to_graphs, so nlp.pipe batches span papers.
+
+    After a parse fails, the papers in flight and the remaining ones are
+    parsed one at a time, so each error is reported for its own paper.
+    """
+    is_done = is_done or _is_unchanged
+    files = iter(pdf_files)
+    # Results and (filename, parsed, error) items that need no parsing, and
+    # the metadata of papers handed to the parser, in input order
+    ready: "deque" = deque()
+    parsing: "deque" = deque()
+
+    def texts():
+        for pdf_file in files:
+            try:
+                with metrics.span("hash"):
+                    content_hash = compute_content_hash(str(pdf_file))
+                if not force and is_done(content_hash):
+                    ready.append(_skipped_result(pdf_file, content_hash))
+                    continue
+                print(f"Processing: {pdf_file.name}")
+                paper_metadata = _prepare_paper(str(pdf_file), content_hash=content_hash)
+                cached = load_cached_graph(content_hash)
+            except Exception as e:
+                ready.append((pdf_file.name, None, e))
+                continue
+            if cached is not None:
+                ready.append((pdf_file.name, (paper_metadata, *cached, {}), None))
+                continue
+            parsing.append(paper_metadata)
+            yield iter_text_chunks(iter_cached_pages(content_hash))
+
+    def drain():
+        while ready:
+            item = ready.popleft()
+            yield item if isinstance(item, dict) else _store_result(item, store_paper)
+
+    found: List[Dict[str, str]] = []
+    graphs = iter_texts_to_graphs(texts(), batch_size=batch_size, sentences=found)
+    started = time.perf_counter()
+    while True:
+        try:
+            nodes, edges = next(graphs)
+        except StopIteration:
+            yield from drain()
+            return
+        except Exception:
+            break
+        paper_metadata, sentences = parsing.popleft(), found.pop()
+        timings = {"nlp": time.perf_counter() - started}
+        save_cached_graph(paper_metadata["content_hash"], nodes, edges, sentences)
+        yield from drain()
+        yield _store_result((paper_metadata["filename"], (paper_metadata, nodes, edges, sentences, timings), None),
+                            store_paper)
+        started = time.perf_counter()
+
+    def one_at_a_time():
+        while parsing:
+            yield parsing.popleft()
+        for _ in texts():
+            yield parsing.popleft()
+
+    # A parse failed: the papers in flight and the rest are parsed one by one
+    for paper_metadata in one_at_a_time():
+        try:
+            parsed = _parse_paper(paper_metadata, batch_size=batch_size)
+        except Exception as e:
+            ready.append((paper_metadata["filename"], None, e))
+        else:
+            ready.append((paper_metadata["filename"], (paper_metadata, *parsed, {}), None))
+        yield from drain()
+    yield from drain()
+
+def _iter_pipelined(pdf_files: List[Path], workers: int, queue_size: int,
+                    force: bool = False, store_paper: Callable = None,
+                    is_done: Callable[[str], bool] = None) -> Iterator[Dict[str, Any]]:
+    """Staged pipeline: a process pool extracts and parses, a writer thread stores.
+
+    At most `queue_size` files are in flight in the pool, and the write queue is
+    bounded by the same size, so a slow database throttles parsing instead of
+    buffering the whole corpus in memory.
+    """
+    is_done = is_done or _is_unchanged
+    write_queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+    result_queue: "queue.Queue" = queue.Queue()
+    stop = threading.Event()
+    done = object()
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def feed():
+        pending = {}
+        files = iter(pdf_files)
+        try:
+            while not stop.is_set():
+                while len(pending) < queue_size:
+                    pdf_file = next(files, None)
+                    if pdf_file is None:
+                        break
+                    try:
+                        with metrics.span("hash"):
+                            content_hash = compute_content_hash(str(pdf_file))
+                        if not force and is_done(content_hash):
+                            result_queue.put(_skipped_result(pdf_file, content_hash))
+                            continue
+                        print(f"Processing: {pdf_file.name}")
+                        pending[pool.submit(_extract_and_parse, str(pdf_file), content_hash)] = pdf_file.name
+                    except Exception as e:
+                        write_queue.put((pdf_file.name, None, e))
+                if not pending:
+                    break
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    filename = pending.pop(future)
+                    error = future.exception()
+                    write_queue.put((filename, None if error else future.result(), error))
+        finally:
+            write_queue.put(done)
+
+    def write():
+        while True:
+            item = write_queue.get()
+            if item is done:
+                break
+            result_queue.put(_store_result(item, store_paper))
+        result_queue.put(done)
+
+    feeder = threading.Thread(target=feed, name="ingest-feeder", daemon=True)
+    writer = threading.Thread(target=write, name="ingest-writer", daemon=True)
+    feeder.start()
+    writer.start()
+    try:
+        while True:
+            result = result_queue.get()
+            if result is done:
+                break
+            yield result
+    finally:
+        stop.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def list_pdf_files(papers_dir: str = None) -> List[Path]:
+    """PDF files that directory ingestion would consider"""
+    papers_dir = papers_dir or PAPERS_DIR
+    if not os.path.exists(papers_dir):
+        return []
+    return list(Path(papers_dir).glob("*.pdf"))
+
+def iter_process_papers_directory(papers_dir: str = None, workers: int = None,
+                                  queue_size: int = None, batch_size: int = None,
+                                  force: bool = False, store_paper: Callable = None,
+                                  is_done: Callable[[str], bool] = None) -> Iterator[Dict[str, Any]]:
+    """Process all PDF files in a directory, yielding per-file results as they finish.
+
+    Files already indexed under the same content hash and NLP config are
+    reported as skipped without being read beyond hashing. `store_paper`
+    (metadata, nodes, edges, sentences) and `is_done` (content hash) replace
+    the write stage and that check, e.g. for the bulk loader; `store_paper`
+    may return "skipped" for a paper it did not write.
+    """
     if papers_dir is None:
         papers_dir = PAPERS_DIR
+    workers = workers or INGEST_WORKERS
+    queue_size = queue_size or INGEST_QUEUE_SIZE
     
     if not os.path.exists(papers_dir):
         print(f"Papers directory not found: {papers_dir}")
-        return []
-    
-    processed_papers = []
-    pdf_files = list(Path(papers_dir).glob("*.pdf"))
-    
-    print(f"Found {len(pdf_files)} PDF files to process...")
+        return
     
-    for pdf_file in pdf_files:
-        try:
-            print(f"Processing: {pdf_file.name}")
-            paper_id = add_paper_to_collection(str(pdf_file))
-            processed_papers.append({
-                "paper_id": paper_id,
-                "filename": pdf_file.name,
-                "status": "success"
-            })
-        except Exception as e:
-            print(f"Error processing {pdf_file.name}: {str(e)}")
-            processed_papers.append({
-                "filename": pdf_file.name,
-                "status": "error",
-                "error": str(e)
-            })
+    pdf_files = list_pdf_files(papers_dir)
+    print(f"Found {len(pdf_files)} PDF files to process with {workers} worker(s)...")
     
-    return processed_papers
+    if workers <= 1 or len(pdf_files) <= 1:
+        yield from _iter_sequential(pdf_files, batch_size or NLP_BATCH_SIZE, force=force,
+                                    store_paper=store_paper, is_done=is_done)
+    else:
+        yield from _iter_pipelined(pdf_files, min(workers, len(pdf_files)), queue_size, force=force,
+                                   store_paper=store_paper, is_done=is_done)
+
+def process_papers_directory(papers_dir: str = None, workers: int = None, queue_size: int = None,
+                             force: bool = False):
+    """Process all PDF files in a directory and add them to the collection"""
+    return list(iter_process_papers_directory(papers_dir, workers=workers, queue_size=queue_size,
+                                              force=force))
+
+def _needs_reindex(papers: List[Dict[str, Any]]) -> bool:
+    return (text_index.indexed_count() < len(papers)
+            or any(not text_store.has_text(p["paper_id"]) for p in papers if p.get("content_hash")))
+
+def reindex_papers() -> int:
+    """Backfill the text store and full-text index from cached text for papers
+    ingested before they existed"""
+    count = 0
+    for paper in get_preloaded_papers():
+        content_hash = paper.get("content_hash")
+        if not content_hash or not os.path.exists(_cache_path(content_hash, "txt")):
+            continue
+        text_store.put_text(paper["paper_id"], iter_cached_pages(content_hash))
+        text_index.index_paper(paper["paper_id"], iter_cached_pages(content_hash), title=paper.get("title"),
+                               authors=paper.get("authors"), journal=paper.get("journal"))
+        count += 1
+    return count
 
 def initialize_demo_papers():
     """Initialize system with some demo papers if none exist"""
     papers = get_preloaded_papers()
+    if papers and _needs_reindex(papers):
+        print(f"Reindexed {reindex_papers()} papers for full-text search")
     if not papers:
         print("No papers found in collection. You can:")
         print(f"1. Add PDF files to {PAPERS_DIR} directory")
@@ -147,8 +519,7 @@ def initialize_demo_papers():
             "is_demo": True
         }
         
-        index = {"papers": [sample_paper]}
-        save_papers_index(index)
+        catalog.upsert_paper(sample_paper)
         
         # Add sample data to Neo4j for demonstration
         sample_text = """
@@ -158,10 +529,17 @@ def initialize_demo_papers():
         Graph databases like Neo4j provide efficient storage for connected data structures.
         """
         
-        nodes, edges = process_text_to_graph(sample_text)
-        upsert_paper("demo-1", "sample_paper.txt", "Sample Research Paper on Knowledge Graphs", 
-                    sample_text, sample_paper)
-        upsert_graph_with_paper("demo-1", nodes, edges)
+        found = []
+        [(nodes, edges)] = iter_texts_to_graphs([sample_text], sentences=found)
+        sentences = found[0]
+        store = get_store()
+        store.upsert_paper("demo-1", "sample_paper.txt", "Sample Research Paper on Knowledge Graphs", 
+                           sample_paper)
+        store.upsert_graph_with_paper("demo-1", nodes, edges)
+        evidence.save_sentences("demo-1", sentences)
+        text_store.put_text("demo-1", sample_text)
+        text_index.index_paper("demo-1", sample_text, title=sample_paper["title"],
+                               authors=sample_paper["authors"], journal=sample_paper["journal"])
         
         print("Created demo paper for testing")
 
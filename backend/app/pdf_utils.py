@@ -1,7 +1,91 @@
-from pdfminer.high_level import extract_text
-from typing import Optional
+import os
+import time
+from io import StringIO
+from typing import Iterator, Optional
+
+from pdfminer.converter import TextConverter
+from pdfminer.layout import LAParams
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+
+# Pages beyond this are ignored, and a page taking longer than this many seconds is skipped
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "2000"))
+PDF_PAGE_TIMEOUT = float(os.getenv("PDF_PAGE_TIMEOUT", "10"))
+
+
+class PageTimeout(Exception):
+    """Raised inside pdfminer when a page exceeds its time budget"""
+
+
+class _DeadlineTextConverter(TextConverter):
+    """TextConverter that aborts the current page once its deadline passes.
+
+    pdfminer is pure Python and cannot be interrupted from outside, so the
+    check runs on every rendered character and path, before layout analysis
+    and before the analysed page is written out. The analysis itself
+    (LAParams grouping) cannot be interrupted, so a page can overrun its
+    deadline by the time that takes for the characters it rendered in time.
+    """
+
+    deadline: Optional[float] = None
+
+    def _check_deadline(self):
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise PageTimeout()
+
+    def render_char(self, *args, **kwargs):
+        self._check_deadline()
+        return super().render_char(*args, **kwargs)
+
+    def paint_path(self, *args, **kwargs):
+        self._check_deadline()
+        return super().paint_path(*args, **kwargs)
+
+    def end_page(self, *args, **kwargs):
+        self._check_deadline()
+        return super().end_page(*args, **kwargs)
+
+    def receive_layout(self, *args, **kwargs):
+        self._check_deadline()
+        return super().receive_layout(*args, **kwargs)
+
+
+def iter_pdf_pages(path: str, max_pages: int = None, page_timeout: float = None) -> Iterator[str]:
+    """Yield the text of each page in turn, so only one page is held in memory.
+
+    Pages that exceed `page_timeout` seconds yield an empty string; pages past
+    `max_pages` are not read.
+    """
+    max_pages = max_pages or PDF_MAX_PAGES
+    page_timeout = page_timeout or PDF_PAGE_TIMEOUT
+    rsrcmgr = PDFResourceManager()
+    output = StringIO()
+    device = _DeadlineTextConverter(rsrcmgr, output, laparams=LAParams())
+    interpreter = PDFPageInterpreter(rsrcmgr, device)
+    try:
+        with open(path, "rb") as fp:
+            for pageno, page in enumerate(PDFPage.get_pages(fp)):
+                if pageno >= max_pages:
+                    print(f"{os.path.basename(path)}: stopped after {max_pages} pages")
+                    break
+                device.deadline = time.monotonic() + page_timeout
+                try:
+                    interpreter.process_page(page)
+                except PageTimeout:
+                    print(f"{os.path.basename(path)}: page {pageno + 1} exceeded {page_timeout}s, skipped")
+                    # begin_page resets the device's layout state for the next page
+                    output.seek(0)
+                    output.truncate(0)
+                    yield ""
+                    continue
+                text = output.getvalue()
+                output.seek(0)
+                output.truncate(0)
+                yield text
+    finally:
+        device.close()
 
 
 def extract_text_from_pdf(path: str) -> str:
-    text = extract_text(path)
+    text = "".join(iter_pdf_pages(path))
     return text or ""
@@ -0,0 +1,135 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+QUERY_CACHE_ENABLED = os.getenv("QUERY_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+# Maximum cached results and their lifetime in seconds
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "300"))
+
+
+class QueryCache:
+    """Bounded LRU/TTL cache of endpoint results, invalidated by a graph version.
+
+    Every entry records the graph version it was computed at; bumping the
+    version (on any write) makes all older entries misses without walking
+    the cache. Concurrent misses for the same key share one computation.
+    """
+
+    def __init__(self, maxsize: int = None, ttl: float = None):
+        self.maxsize = maxsize or QUERY_CACHE_SIZE
+        self.ttl = ttl if ttl is not None else QUERY_CACHE_TTL
+        self.version = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        # Computations in progress, awaited by every request for the same key
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0,
+                         "expirations": 0, "invalidations": 0}
+
+    @staticmethod
+    def make_key(endpoint: str, params: Dict[str, Any]) -> Hashable:
+        return endpoint, tuple(sorted(params.items()))
+
+    def bump(self):
+        """Invalidate every cached result; called whenever the graph changes"""
+        with self._lock:
+            self.version += 1
+            self.counters["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _lookup(self, key: Hashable):
+        """(True, value) on a fresh hit; drops a stale entry. Caller holds the lock."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            version, expires_at, value = entry
+            if version == self.version and expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.counters["hits"] += 1
+                return True, value
+            del self._entries[key]
+            if version == self.version:
+                self.counters["expirations"] += 1
+        return False, None
+
+    def _store(self, key: Hashable, version: int, value: Any):
+        """Caller holds the lock"""
+        # A write during the computation leaves the entry stale, so skip storing it
+        if version == self.version:
+            self._entries[key] = (version, time.monotonic() + self.ttl, value)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    async def _fill(self, key: Hashable, version: int, compute: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await compute()
+        except BaseException:
+            with self._lock:
+                del self._inflight[key]
+            raise
+        with self._lock:
+            del self._inflight[key]
+            self._store(key, version, value)
+        return value
+
+    async def aget_or_compute(self, endpoint: str, params: Dict[str, Any],
+                              compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Cached result of `compute()`; identical concurrent misses await one computation.
+
+        The computation runs as its own task, so a cancelled request (e.g. a
+        client that disconnected) leaves it running for the others.
+        """
+        key = self.make_key(endpoint, params)
+        with self._lock:
+            hit, value = self._lookup(key)
+            if hit:
+                return value
+            flight = self._inflight.get(key)
+            if flight is not None:
+                self.counters["coalesced"] += 1
+            else:
+                flight = self._inflight[key] = asyncio.ensure_future(self._fill(key, self.version, compute))
+                # Retrieved here so a failure nobody awaited is not logged as never retrieved
+                flight.add_done_callback(lambda f: f.cancelled() or f.exception())
+                self.counters["misses"] += 1
+        return await asyncio.shield(flight)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"] + self.counters["coalesced"]
+            return {
+                "enabled": QUERY_CACHE_ENABLED,
+                "graph_version": self.version,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hit_ratio": round(self.counters["hits"] / lookups, 4) if lookups else None,
+                **self.counters,
+            }
+
+
+_cache = QueryCache()
+
+
+def get_query_cache() -> QueryCache:
+    return _cache
+
+
+def bump_graph_version():
+    """Mark the graph as changed so cached read results are recomputed"""
+    _cache.bump()
+
+
+async def acached(endpoint: str, params: Dict[str, Any], compute: Callable[[], Awaitable[Any]]) -> Any:
+    """Serve an endpoint result from the cache, computing it at most once per version;
+    `compute` returns a coroutine"""
+    if not QUERY_CACHE_ENABLED:
+        return await compute()
+    return await _cache.aget_or_compute(endpoint, params, compute)
@@ -0,0 +1,199 @@
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from .entity_resolution import canonical_key
+
+# Seq2seq relation model emitting REBEL-style "<triplet> head <subj> tail <obj> relation" text
+RELATION_MODEL = os.getenv("RELATION_MODEL", "Babelscape/rebel-large")
+# Run relation extraction during ingestion, next to sentence co-occurrence
+RELATION_EXTRACTION = os.getenv("RELATION_EXTRACTION", "false").lower() in ("1", "true", "yes")
+# int8 dynamic quantization of the model's Linear layers (CPU only)
+RELATION_QUANTIZE = os.getenv("RELATION_QUANTIZE", "false").lower() in ("1", "true", "yes")
+# Threads running batches, and torch threads per process (0 = torch default)
+RELATION_WORKERS = int(os.getenv("RELATION_WORKERS", "1"))
+RELATION_TORCH_THREADS = int(os.getenv("RELATION_TORCH_THREADS", "0"))
+# Dynamic batches: sentences are sorted by length and packed until either bound is hit
+RELATION_BATCH_TOKENS = int(os.getenv("RELATION_BATCH_TOKENS", "4096"))
+RELATION_BATCH_SIZE = int(os.getenv("RELATION_BATCH_SIZE", "32"))
+RELATION_MAX_INPUT_TOKENS = int(os.getenv("RELATION_MAX_INPUT_TOKENS", "256"))
+RELATION_MAX_OUTPUT_TOKENS = int(os.getenv("RELATION_MAX_OUTPUT_TOKENS", "128"))
+RELATION_NUM_BEAMS = int(os.getenv("RELATION_NUM_BEAMS", "1"))
+
+_MARKERS = re.compile(r"(<triplet>|<subj>|<obj>)")
+_SPECIAL = re.compile(r"<s>|</s>|<pad>")
+
+
+def parse_triplets(generated: str) -> List[Dict[str, str]]:
+    """(head, tail, relation) triplets from one decoded REBEL-style output"""
+    triplets = []
+    head = tail = relation = ""
+    current = None
+
+    def flush():
+        if head.strip() and tail.strip() and relation.strip():
+            triplets.append({"head": head.strip(), "tail": tail.strip(), "relation": relation.strip()})
+
+    for part in _MARKERS.split(_SPECIAL.sub(" ", generated)):
+        if part == "<triplet>":
+            flush()
+            head = tail = relation = ""
+            current = "head"
+        elif part == "<subj>":
+            # A new <subj> after a complete triplet reuses the head
+            if relation:
+                flush()
+            tail = relation = ""
+            current = "tail"
+        elif part == "<obj>":
+            relation = ""
+            current = "relation"
+        elif current == "head":
+            head += part
+        elif current == "tail":
+            tail += part
+        elif current == "relation":
+            relation += part
+    flush()
+    return triplets
+
+
+class RelationExtractor:
+    """Loads a seq2seq relation model once and runs it over sentences in
+    length-sorted dynamic batches on a dedicated thread pool.
+
+    `model` and `tokenizer` may be passed in (e.g. a tiny randomly
+    initialized model); otherwise they are loaded from `model_name` on first use.
+    """
+
+    def __init__(self, model_name: str = None, quantize: bool = None, workers: int = None,
+                 model=None, tokenizer=None):
+        self.model_name = model_name or RELATION_MODEL
+        self.quantize = RELATION_QUANTIZE if quantize is None else quantize
+        self.workers = max(1, workers or RELATION_WORKERS)
+        self._model = model
+        self._tokenizer = tokenizer
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def _load(self):
+        with self._lock:
+            if self._model is None or self._tokenizer is None:
+                # Imported here: torch and transformers are only needed when this feature is on
+                import torch
+                from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+                if RELATION_TORCH_THREADS:
+                    torch.set_num_threads(RELATION_TORCH_THREADS)
+                self._tokenizer = self._tokenizer or AutoTokenizer.from_pretrained(self.model_name)
+                self._model = self._model or AutoModelForSeq2SeqLM.from_pretrained(self.model_name)
+                self._model.eval()
+                if self.quantize:
+                    self._model = torch.quantization.quantize_dynamic(self._model, {torch.nn.Linear},
+                                                                      dtype=torch.qint8)
+                print(f"Loaded relation model {self.model_name}" + (" (int8 dynamic)" if self.quantize else ""))
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="relation")
+        return self._model, self._tokenizer
+
+    def batches(self, sentences: List[str]) -> List[List[int]]:
+        """Sentence indices grouped into batches of similar length.
+
+        A batch is padded to its longest member, so its cost is roughly
+        size x longest; sorting keeps that close to the real token count.
+        """
+        _, tokenizer = self._load()
+        lengths = [min(len(ids), RELATION_MAX_INPUT_TOKENS)
+                   for ids in tokenizer(sentences, truncation=False)["input_ids"]]
+        order = sorted(range(len(sentences)), key=lambda i: lengths[i])
+        batches, batch = [], []
+        for i in order:
+            # Lengths are ascending, so the newest member is the longest
+            if batch and (len(batch) >= RELATION_BATCH_SIZE
+                          or lengths[i] * (len(batch) + 1) > RELATION_BATCH_TOKENS):
+                batches.append(batch)
+                batch = []
+            batch.append(i)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _generate(self, texts: List[str]) -> List[str]:
+        import torch
+        model, tokenizer = self._load()
+        inputs = tokenizer(texts, padding=True, truncation=True, max_length=RELATION_MAX_INPUT_TOKENS,
+                           return_tensors="pt")
+        with torch.inference_mode():
+            output = model.generate(**inputs, max_length=RELATION_MAX_OUTPUT_TOKENS,
+                                    num_beams=RELATION_NUM_BEAMS)
+        # Special tokens carry the triplet markers, so they must survive decoding
+        return tokenizer.batch_decode(output, skip_special_tokens=False)
+
+    def extract(self, sentences: List[str]) -> List[List[Dict[str, str]]]:
+        """Triplets for each sentence, in input order"""
+        if not sentences:
+            return []
+        self._load()
+        results: List[List[Dict[str, str]]] = [[] for _ in sentences]
+        futures = [(batch, self._pool.submit(self._generate, [sentences[i] for i in batch]))
+                   for batch in self.batches(sentences)]
+        for batch, future in futures:
+            for i, generated in zip(batch, future.result()):
+                results[i] = parse_triplets(generated)
+        return results
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+
+_extractor: Optional[RelationExtractor] = None
+# Extractors for models other than the default one, by model name
+_extractors: Dict[str, RelationExtractor] = {}
+_extractor_lock = threading.Lock()
+
+
+def get_relation_extractor(model_name: str = None) -> RelationExtractor:
+    """The process-wide extractor for a model (the default one when not given);
+    each model is loaded once and reused"""
+    global _extractor
+    if _extractor is not None and model_name in (None, _extractor.model_name):
+        return _extractor
+    with _extractor_lock:
+        if model_name is None or model_name == RELATION_MODEL:
+            if _extractor is None:
+                _extractor = RelationExtractor()
+            if model_name in (None, _extractor.model_name):
+                return _extractor
+        if model_name not in _extractors:
+            _extractors[model_name] = RelationExtractor(model_name)
+        return _extractors[model_name]
+
+
+def set_relation_extractor(extractor: Optional[RelationExtractor]):
+    """Use an already built extractor as the default (e.g. one around a tiny local model)"""
+    global _extractor
+    _extractor = extractor
+
+
+def relation_label(relation: str) -> str:
+    """Edge label for a relation name, e.g. "part of" -> "part_of" """
+    return "_".join(relation.lower().split())
+
+
+def relation_config_key() -> str:
+    """Part of the NLP cache key; empty while relation extraction is off"""
+    if not RELATION_EXTRACTION:
+        return ""
+    model = (_extractor.model_name if _extractor is not None else RELATION_MODEL).rsplit("/", 1)[-1]
+    return f"-r{model}" + ("-q8" if RELATION_QUANTIZE else "")
+
+
+def match_entity(name: str, candidates: List[Tuple[str, str, str]]) -> Optional[str]:
+    """Id of the sentence entity (id, key, type) that `name` resolves to"""
+    for entity_id, key, entity_type in candidates:
+        if canonical_key(name, entity_type) == key:
+            return entity_id
+    return None
@@ -0,0 +1,869 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from . import text_index, text_store
+from . import neo4j_async, neo4j_driver, neo4j_schema, paper_graphs
+from .entity_index import get_entity_index
+from .graph_cache import get_graph_cache
+from .local_db import connect, data_path
+from .query_cache import bump_graph_version
+
+# "neo4j" (default), "sqlite" (embedded file) or "memory" (embedded, not persisted)
+GRAPH_BACKEND = os.getenv("GRAPH_BACKEND", "neo4j").lower()
+SQLITE_GRAPH_PATH = os.getenv("SQLITE_GRAPH_PATH") or data_path("graph.sqlite3")
+# Top-ranked papers whose entities make up a search graph
+SEARCH_GRAPH_PAPERS = int(os.getenv("SEARCH_GRAPH_PAPERS", "50"))
+# Characters scanned for a snippet when the index has no term offset
+SNIPPET_SCAN_CHARS = 65536
+# Elements fetched per keyset query when exporting from an embedded store
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+Graph = Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]
+
+
+class GraphStore:
+    """Storage interface used by the API and the ingestion pipeline.
+
+    Backends implement the primitives below. The shared
+    behaviour — keeping the entity name index and graph cache current on
+    writes, serving reads from the graph cache, and ranking searches with the
+    full-text index — lives here so every backend gets it.
+    """
+
+    name = "base"
+
+    # -- backend primitives ---------------------------------------------
+
+    def upsert_paper(self, paper_id: str, filename: str, title: str,
+                     metadata: Dict[str, Any] = None):
+        """Store a paper's metadata; its text belongs in the text store"""
+        raise NotImplementedError
+
+    def _write_graph(self, paper_id: Optional[str], nodes: List[Dict[str, Any]],
+                     edges: List[Dict[str, Any]], batch_size: int = None) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def get_graph(self, limit: int = 100) -> Graph:
+        raise NotImplementedError
+
+    def _query_subgraph(self, center_id: str, depth: int, limit: int) -> Graph:
+        raise NotImplementedError
+
+    def _query_shortest_path(self, source_id: str, target_id: str, max_depth: int) -> Graph:
+        raise NotImplementedError
+
+    def get_papers(self, paper_ids: List[str]) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def search_entities(self, query: str, limit: int = 50) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def get_papers_by_entity(self, entity_id: str) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def get_graph_for_papers(self, paper_ids: List[str], limit: int = 100) -> Graph:
+        raise NotImplementedError
+
+    def _query_paper_graph(self, paper_id: str) -> Graph:
+        """Every entity a paper contains and the paper's own edges between them"""
+        raise NotImplementedError
+
+    def iter_entity_rows(self) -> Iterator[Tuple[str, str, str, List[str]]]:
+        raise NotImplementedError
+
+    def iter_node_rows(self) -> Iterator[Tuple[str, str, str]]:
+        raise NotImplementedError
+
+    def iter_edge_rows(self) -> Iterator[Tuple[str, str, str, float]]:
+        raise NotImplementedError
+
+    def _nodes_after(self, after: int, limit: int) -> List[Tuple[int, Dict[str, Any]]]:
+        """Entity nodes with an internal id above `after`, in id order, as (id, node)"""
+        raise NotImplementedError
+
+    def _edges_after(self, after: int, limit: int) -> List[Tuple[int, Dict[str, Any]]]:
+        """Entity edges with an internal id above `after`, in id order, as (id, edge)"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def ensure_schema(self) -> Optional[Dict[str, Any]]:
+        """Create missing constraints and indexes; embedded stores create theirs on open"""
+        return None
+
+    # -- shared behaviour -----------------------------------------------
+
+    def _after_write(self, nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]], paper_id: str = None,
+                     replaced: List[Dict[str, Any]] = None):
+        get_entity_index().add_nodes(nodes, paper_id)
+        cache = get_graph_cache()
+        if cache is not None and cache.loaded:
+            cache.add_nodes(nodes)
+            if replaced:
+                cache.remove_edges(replaced)
+            cache.add_edges(edges)
+        bump_graph_version()
+
+    def upsert_graph_with_paper(self, paper_id: str, nodes: List[Dict[str, Any]],
+                                edges: List[Dict[str, Any]], batch_size: int = None) -> Dict[str, Any]:
+        """Replace a paper's graph with the given nodes and edges"""
+        # The write drops the paper's previous edges, so the graph cache must drop them too
+        cache = get_graph_cache()
+        replaced = self._query_paper_graph(paper_id)[1] if cache is not None and cache.loaded else None
+        stats = self._write_graph(paper_id, nodes, edges, batch_size)
+        edge_ids = stats.pop("edge_ids", None)
+        self._after_write(nodes, edges, paper_id, replaced)
+        if paper_graphs.PAPER_GRAPH_SNAPSHOTS:
+            paper_graphs.save_graph(paper_id, *paper_graphs.order_graph(
+                *paper_graphs.view_from_written(paper_id, nodes, edges, edge_ids)))
+        return stats
+
+    def upsert_graph(self, nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]],
+                     batch_size: int = None) -> Dict[str, Any]:
+        """Upsert nodes and edges without paper linking"""
+        stats = self._write_graph(None, nodes, edges, batch_size)
+        self._after_write(nodes, edges)
+        return stats
+
+    def get_graph_page(self, cursor: str = None, limit: int = 1000) -> Dict[str, Any]:
+        """One page of the whole graph: all nodes first, then all edges, in internal-id order.
+
+        `cursor` is the `next_cursor` of the previous page ("n:<id>" or
+        "e:<id>"); it is None on the last page. Raises ValueError for a
+        malformed cursor.
+        """
+        phase, after = self._parse_cursor(cursor)
+        limit = max(1, limit)
+        rows = self._nodes_after(after, limit) if phase == "n" else self._edges_after(after, limit)
+        return self._page(phase, rows, limit)
+
+    @staticmethod
+    def _parse_cursor(cursor: Optional[str]) -> Tuple[str, int]:
+        if not cursor:
+            return "n", -1
+        try:
+            phase, key = cursor.split(":", 1)
+            after = int(key)
+        except ValueError:
+            raise ValueError(f"Invalid cursor: {cursor}")
+        if phase not in ("n", "e"):
+            raise ValueError(f"Invalid cursor: {cursor}")
+        return phase, after
+
+    @staticmethod
+    def _page(phase: str, rows: List[Tuple[int, Dict[str, Any]]], limit: int) -> Dict[str, Any]:
+        items = [item for _, item in rows]
+        if phase == "n":
+            # A short page means the nodes are done; edges start on the next page
+            next_cursor = f"n:{rows[-1][0]}" if len(rows) == limit else "e:-1"
+            return {"nodes": items, "edges": [], "next_cursor": next_cursor}
+        next_cursor = f"e:{rows[-1][0]}" if len(rows) == limit else None
+        return {"nodes": [], "edges": items, "next_cursor": next_cursor}
+
+    def iter_graph_export(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Every node, then every edge, as ("node" | "edge", dict), read in keyset batches"""
+        for kind, page in (("node", self._nodes_after), ("edge", self._edges_after)):
+            after = -1
+            while True:
+                rows = page(after, EXPORT_BATCH_SIZE)
+                for _, item in rows:
+                    yield kind, item
+                if len(rows) < EXPORT_BATCH_SIZE:
+                    break
+                after = rows[-1][0]
+
+    def get_subgraph(self, center_id: str, depth: int = 1, limit: int = 100, rank: str = "degree") -> Graph:
+        """Neighbourhood of an entity; answered in memory when the graph cache is loaded"""
+        cache = get_graph_cache()
+        if cache is not None and cache.loaded and cache.contains(center_id):
+            return cache.expand(center_id, depth=depth, limit=limit, rank=rank)
+        return self._query_subgraph(center_id, depth, limit)
+
+    def get_shortest_path(self, source_id: str, target_id: str, max_depth: int = 6) -> Graph:
+        cache = get_graph_cache()
+        if cache is not None and cache.loaded:
+            return cache.shortest_path(source_id, target_id, max_depth=max_depth) or ([], [])
+        return self._query_shortest_path(source_id, target_id, max_depth)
+
+    def search_papers(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """BM25-ranked papers from the full-text index, with highlighted snippets"""
+        hits = text_index.search(query, limit=limit)
+        if not hits:
+            return []
+        return self._paper_results(hits, self.get_papers([h["paper_id"] for h in hits]))
+
+    def _paper_results(self, hits: List[Dict[str, Any]], found: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        found = {p.get("paper_id"): p for p in found}
+        papers = []
+        for hit in hits:
+            paper = found.get(hit["paper_id"])
+            if paper is None:
+                continue
+            papers.append({
+                "paper_id": paper.get("paper_id"),
+                "title": paper.get("title"),
+                "authors": paper.get("authors"),
+                "year": paper.get("year"),
+                "journal": paper.get("journal"),
+                "filename": paper.get("filename"),
+                "upload_date": paper.get("upload_date"),
+                "score": hit["score"],
+                **self._snippet(hit),
+            })
+        return papers
+
+    @staticmethod
+    def _snippet(hit: Dict[str, Any], width: int = 300) -> Dict[str, Optional[str]]:
+        """Snippet built from the few text-store blocks around the first match"""
+        paper_id = hit["paper_id"]
+        if hit.get("pos") is not None:
+            start = max(0, hit["pos"] - width)
+            excerpt = text_store.get_text(paper_id, start, start + 2 * width)
+        else:
+            start = 0
+            excerpt = text_store.get_text(paper_id, 0, SNIPPET_SCAN_CHARS)
+        return text_index.make_snippet(excerpt, hit["terms"], width, offset=start,
+                                       total_length=text_store.text_length(paper_id))
+
+    def _ordered_paper_graph(self, paper_id: str, snapshot: Optional[Graph], graph: Optional[Graph]) -> Graph:
+        if snapshot is not None:
+            return snapshot
+        ordered = paper_graphs.order_graph(*graph)
+        # Papers ingested before snapshots existed get one on first read
+        if paper_graphs.PAPER_GRAPH_SNAPSHOTS and ordered[0]:
+            paper_graphs.save_graph(paper_id, *ordered)
+        return ordered
+
+    def get_paper_graph(self, paper_id: str, offset: int = 0, limit: int = 500) -> Dict[str, Any]:
+        """One page of a paper's graph, from its snapshot when it has one"""
+        snapshot = paper_graphs.get_graph(paper_id) if paper_graphs.PAPER_GRAPH_SNAPSHOTS else None
+        graph = self._query_paper_graph(paper_id) if snapshot is None else None
+        return paper_graphs.page_graph(*self._ordered_paper_graph(paper_id, snapshot, graph), offset, limit)
+
+    def get_graph_by_search(self, query: str, limit: int = 100) -> Graph:
+        """Graph of the entities in the papers best matching the query"""
+        paper_ids = [h["paper_id"] for h in text_index.search(query, limit=SEARCH_GRAPH_PAPERS)]
+        if not paper_ids:
+            return [], []
+        return self.get_graph_for_papers(paper_ids, limit=limit)
+
+    # -- async API ------------------------------------------------------
+    # For async handlers. Backends without an async driver inherit these
+    # defaults, which run the blocking primitive in a worker thread.
+
+    async def aget_graph(self, limit: int = 100) -> Graph:
+        return await asyncio.to_thread(self.get_graph, limit)
+
+    async def _aquery_subgraph(self, center_id: str, depth: int, limit: int) -> Graph:
+        return await asyncio.to_thread(self._query_subgraph, center_id, depth, limit)
+
+    async def _aquery_shortest_path(self, source_id: str, target_id: str, max_depth: int) -> Graph:
+        return await asyncio.to_thread(self._query_shortest_path, source_id, target_id, max_depth)
+
+    async def aget_papers(self, paper_ids: List[str]) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.get_papers, paper_ids)
+
+    async def asearch_entities(self, query: str, limit: int = 50) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.search_entities, query, limit)
+
+    async def aget_papers_by_entity(self, entity_id: str) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.get_papers_by_entity, entity_id)
+
+    async def aget_graph_for_papers(self, paper_ids: List[str], limit: int = 100) -> Graph:
+        return await asyncio.to_thread(self.get_graph_for_papers, paper_ids, limit)
+
+    async def _anodes_after(self, after: int, limit: int) -> List[Tuple[int, Dict[str, Any]]]:
+        return await asyncio.to_thread(self._nodes_after, after, limit)
+
+    async def _aquery_paper_graph(self, paper_id: str) -> Graph:
+        return await asyncio.to_thread(self._query_paper_graph, paper_id)
+
+    async def _aedges_after(self, after: int, limit: int) -> List[Tuple[int, Dict[str, Any]]]:
+        return await asyncio.to_thread(self._edges_after, after, limit)
+
+    async def aget_graph_page(self, cursor: str = None, limit: int = 1000) -> Dict[str, Any]:
+        phase, after = self._parse_cursor(cursor)
+        limit = max(1, limit)
+        rows = await (self._anodes_after(after, limit) if phase == "n" else self._aedges_after(after, limit))
+        return self._page(phase, rows, limit)
+
+    async def aget_subgraph(self, center_id: str, depth: int = 1, limit: int = 100,
+                            rank: str = "degree") -> Graph:
+        cache = get_graph_cache()
+        if cache is not None and cache.loaded and cache.contains(center_id):
+            return cache.expand(center_id, depth=depth, limit=limit, rank=rank)
+        return await self._aquery_subgraph(center_id, depth, limit)
+
+    async def aget_shortest_path(self, source_id: str, target_id: str, max_depth: int = 6) -> Graph:
+        cache = get_graph_cache()
+        if cache is not None and cache.loaded:
+            return cache.shortest_path(source_id, target_id, max_depth=max_depth) or ([], [])
+        return await self._aquery_shortest_path(source_id, target_id, max_depth)
+
+    async def asearch_papers(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        # The full-text index and text store are local files, read in a thread
+        hits = await asyncio.to_thread(text_index.search, query, limit)
+        if not hits:
+            return []
+        found = await self.aget_papers([h["paper_id"] for h in hits])
+        return await asyncio.to_thread(self._paper_results, hits, found)
+
+    async def aget_paper_graph(self, paper_id: str, offset: int = 0, limit: int = 500) -> Dict[str, Any]:
+        snapshot = None
+        if paper_graphs.PAPER_GRAPH_SNAPSHOTS:
+            snapshot = await asyncio.to_thread(paper_graphs.get_graph, paper_id)
+        graph = await self._aquery_paper_graph(paper_id) if snapshot is None else None
+        ordered = await asyncio.to_thread(self._ordered_paper_graph, paper_id, snapshot, graph)
+        return paper_graphs.page_graph(*ordered, offset, limit)
+
+    async def aget_graph_by_search(self, query: str, limit: int = 100) -> Graph:
+        hits = await asyncio.to_thread(text_index.search, query, SEARCH_GRAPH_PAPERS)
+        if not hits:
+            return [], []
+        return await self.aget_graph_for_papers([h["paper_id"] for h in hits], limit=limit)
+
+    async def aclose(self):
+        self.close()
+
+
+class Neo4jStore(GraphStore):
+    """Neo4j / AuraDB backend, implemented by the functions in neo4j_driver"""
+
+    name = "neo4j"
+
+    def upsert_paper(self, paper_id, filename, title, metadata=None):
+        return neo4j_driver.upsert_paper(paper_id, filename, title, metadata)
+
+    def _write_graph(self, paper_id, nodes, edges, batch_size=None):
+        if paper_id is None:
+            return neo4j_driver.upsert_graph(nodes, edges, batch_size=batch_size)
+        return neo4j_driver.upsert_graph_with_paper(paper_id, nodes, edges, batch_size=batch_size)
+
+    def get_graph(self, limit=100):
+        return neo4j_driver.get_graph(limit=limit)
+
+    def _query_subgraph(self, center_id, depth, limit):
+        return neo4j_driver.get_subgraph(center_id, depth=depth, limit=limit)
+
+    def _query_shortest_path(self, source_id, target_id, max_depth):
+        return neo4j_driver.get_shortest_path(source_id, target_id, max_depth=max_depth)
+
+    def get_papers(self, paper_ids):
+        return neo4j_driver.get_papers(paper_ids)
+
+    def search_entities(self, query, limit=50):
+        return neo4j_driver.search_entities(query, limit=limit)
+
+    def get_papers_by_entity(self, entity_id):
+        return neo4j_driver.get_papers_by_entity(entity_id)
+
+    def get_graph_for_papers(self, paper_ids, limit=100):
+        return neo4j_driver.get_graph_for_papers(paper_ids, limit=limit)
+
+    def _query_paper_graph(self, paper_id):
+        return neo4j_driver.get_paper_graph(paper_id)
+
+    def iter_entity_rows(self):
+        return neo4j_driver.iter_entity_rows()
+
+    def iter_node_rows(self):
+        return neo4j_driver.iter_node_rows()
+
+    def iter_edge_rows(self):
+        return neo4j_driver.iter_edge_rows()
+
+    def _nodes_after(self, after, limit):
+        return neo4j_driver.get_nodes_after(after, limit)
+
+    def _edges_after(self, after, limit):
+        return neo4j_driver.get_edges_after(after, limit)
+
+    def iter_graph_export(self):
+        # One lazily consumed result per element kind instead of keyset batches
+        return neo4j_driver.iter_graph_export()
+
+    def close(self):
+        neo4j_driver.close_driver()
+
+    def ensure_schema(self):
+        if not neo4j_schema.NEO4J_SCHEMA_BOOTSTRAP:
+            return None
+        return neo4j_schema.ensure_schema()
+
+    async def aget_graph(self, limit=100):
+        return await neo4j_async.get_graph(limit=limit)
+
+    async def _aquery_subgraph(self, center_id, depth, limit):
+        return await neo4j_async.get_subgraph(center_id, depth=depth, limit=limit)
+
+    async def _aquery_shortest_path(self, source_id, target_id, max_depth):
+        return await neo4j_async.get_shortest_path(source_id, target_id, max_depth=max_depth)
+
+    async def aget_papers(self, paper_ids):
+        return await neo4j_async.get_papers(paper_ids)
+
+    async def asearch_entities(self, query, limit=50):
+        return await neo4j_async.search_entities(query, limit=limit)
+
+    async def aget_papers_by_entity(self, entity_id):
+        return await neo4j_async.get_papers_by_entity(entity_id)
+
+    async def aget_graph_for_papers(self, paper_ids, limit=100):
+        return await neo4j_async.get_graph_for_papers(paper_ids, limit=limit)
+
+    async def _anodes_after(self, after, limit):
+        return await neo4j_async.get_nodes_after(after, limit)
+
+    async def _aedges_after(self, after, limit):
+        return await neo4j_async.get_edges_after(after, limit)
+
+    async def _aquery_paper_graph(self, paper_id):
+        return await neo4j_async.get_paper_graph(paper_id)
+
+    async def aclose(self):
+        await neo4j_async.close_async_driver()
+        self.close()
+
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+    paper_id TEXT PRIMARY KEY,
+    title TEXT,
+    upload_date TEXT,
+    props TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS papers_upload_date ON papers (upload_date);
+CREATE TABLE IF NOT EXISTS entities (
+    id TEXT PRIMARY KEY,
+    label TEXT NOT NULL,
+    name TEXT,
+    props TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS entities_name ON entities (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS entities_label ON entities (label);
+CREATE TABLE IF NOT EXISTS contains (
+    paper_id TEXT NOT NULL,
+    entity_id TEXT NOT NULL,
+    PRIMARY KEY (paper_id, entity_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS contains_entity ON contains (entity_id);
+CREATE TABLE IF NOT EXISTS edges (
+    id INTEGER PRIMARY KEY,
+    src TEXT NOT NULL,
+    tgt TEXT NOT NULL,
+    label TEXT NOT NULL,
+    paper_id TEXT NOT NULL DEFAULT '',
+    props TEXT NOT NULL DEFAULT '{}',
+    UNIQUE (src, tgt, label, paper_id)
+);
+CREATE INDEX IF NOT EXISTS edges_tgt ON edges (tgt);
+CREATE INDEX IF NOT EXISTS edges_paper ON edges (paper_id);
+"""
+
+# SQLite's bound-parameter limit is far higher, but keep IN lists modest
+_IN_CHUNK = 500
+
+
+def _in_chunks(values: List[str]) -> Iterator[Tuple[List[str], str]]:
+    for i in range(0, len(values), _IN_CHUNK):
+        chunk = values[i:i + _IN_CHUNK]
+        yield chunk, ",".join("?" * len(chunk))
+
+
+class SQLiteGraphStore(GraphStore):
+    """Embedded backend on SQLite with indexes on every lookup path.
+
+    The same schema serves a persistent file (WAL mode, one connection per
+    thread) or ":memory:" (one shared connection behind a lock), so a single
+    node or a CI run needs no database server.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str = None):
+        self.path = path or SQLITE_GRAPH_PATH
+        self._memory = self.path == ":memory:"
+        self._lock = threading.RLock()
+        self._shared = None
+        if self._memory:
+            self.name = "memory"
+            self._shared = sqlite3.connect(":memory:", isolation_level=None, check_same_thread=False)
+            self._shared.row_factory = sqlite3.Row
+        with self._read() as db:
+            db.executescript(_SQLITE_SCHEMA)
+
+    def _db(self) -> sqlite3.Connection:
+        return self._shared if self._memory else connect(self.path)
+
+    @contextmanager
+    def _read(self):
+        if self._memory:
+            with self._lock:
+                yield self._shared
+        else:
+            yield self._db()
+
+    @contextmanager
+    def _write(self):
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+
+    @staticmethod
+    def _node(row) -> Dict[str, Any]:
+        props = json.loads(row["props"] or "{}")
+        props.setdefault("id", row["id"])
+        return {
+            "id": row["id"],
+            "label": row["name"] or row["id"],
+            "type": row["label"],
+            "props": props,
+        }
+
+    @staticmethod
+    def _edge(row) -> Dict[str, Any]:
+        return {
+            "id": str(row["id"]),
+            "source": row["src"],
+            "target": row["tgt"],
+            "label": row["label"],
+            "props": json.loads(row["props"] or "{}"),
+        }
+
+    def _nodes_by_id(self, db, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        nodes = {}
+        for chunk, marks in _in_chunks(ids):
+            for row in db.execute(f"SELECT * FROM entities WHERE id IN ({marks})", chunk):
+                nodes[row["id"]] = self._node(row)
+        return nodes
+
+    def _graph_from_edge_rows(self, db, rows) -> Graph:
+        edges = [self._edge(r) for r in rows]
+        ids = list(dict.fromkeys([e["source"] for e in edges] + [e["target"] for e in edges]))
+        return list(self._nodes_by_id(db, ids).values()), edges
+
+    # -- writes ---------------------------------------------------------
+
+    def upsert_paper(self, paper_id, filename, title, metadata=None):
+        props = {
+            "paper_id": paper_id,
+            "filename": filename,
+            "title": title,
+            "upload_date": metadata.get("upload_date") if metadata else None,
+            **(metadata or {})
+        }
+        with self._write() as db:
+            db.execute(
+                "INSERT INTO papers (paper_id, title, upload_date, props) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (paper_id) DO UPDATE SET title = excluded.title, "
+                "upload_date = excluded.upload_date, props = json_patch(papers.props, excluded.props)",
+                (paper_id, title, props.get("upload_date"), json.dumps(props)),
+            )
+
+    def _write_graph(self, paper_id, nodes, edges, batch_size=None):
+        started = time.perf_counter()
+        node_rows = []
+        for n in nodes:
+            props = dict(n.get("props", {}))
+            props["name"] = n.get("name")
+            if paper_id is not None:
+                props["paper_id"] = paper_id
+            node_rows.append((n.get("id") or n.get("name"), n.get("type") or "Entity", n.get("name"), json.dumps(props)))
+        edge_rows = []
+        for e in edges:
+            props = dict(e.get("props", {}))
+            if paper_id is not None:
+                props["paper_id"] = paper_id
+            edge_rows.append((e["source"], e["target"], e.get("label") or "RELATED_TO", paper_id or "",
+                              json.dumps(props), e["source"], e["target"]))
+
+        with self._write() as db:
+            if paper_id is not None:
+                # Re-ingesting a paper replaces its previous links
+                db.execute("DELETE FROM edges WHERE paper_id = ?", (paper_id,))
+                db.execute("DELETE FROM contains WHERE paper_id = ?", (paper_id,))
+            db.executemany(
+                "INSERT INTO entities (id, label, name, props) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET label = excluded.label, name = excluded.name, "
+                "props = json_patch(entities.props, excluded.props)",
+                node_rows,
+            )
+            if paper_id is not None:
+                db.executemany(
+                    "INSERT OR IGNORE INTO contains (paper_id, entity_id) VALUES (?, ?)",
+                    [(paper_id, row[0]) for row in node_rows],
+                )
+            # Like MATCH ... MERGE in Cypher, edges whose endpoints don't exist are skipped
+            db.executemany(
+                "INSERT INTO edges (src, tgt, label, paper_id, props) "
+                "SELECT ?, ?, ?, ?, ? WHERE EXISTS (SELECT 1 FROM entities WHERE id = ?) "
+                "AND EXISTS (SELECT 1 FROM entities WHERE id = ?) "
+                "ON CONFLICT (src, tgt, label, paper_id) DO UPDATE SET "
+                "props = json_patch(edges.props, excluded.props)",
+                edge_rows,
+            )
+            written = {}
+            if paper_id is not None:
+                written = {(row["src"], row["label"], row["tgt"]): str(row["id"]) for row in db.execute(
+                    "SELECT id, src, tgt, label FROM edges WHERE paper_id = ?", (paper_id,))}
+        return {
+            "nodes": len(node_rows),
+            "edges": len(edge_rows),
+            "edge_ids": [written.get((row[0], row[2], row[1])) for row in edge_rows],
+            "statements": 3 + (2 if paper_id is not None else 0),
+            "seconds": round(time.perf_counter() - started, 4),
+        }
+
+    # -- reads ----------------------------------------------------------
+
+    def get_graph(self, limit=100):
+        with self._read() as db:
+            rows = db.execute("SELECT * FROM edges ORDER BY id LIMIT ?", (limit,)).fetchall()
+            return self._graph_from_edge_rows(db, rows)
+
+    def _neighbor_ids(self, db, ids: List[str]) -> Iterator[Tuple[str, str]]:
+        """(node, neighbour) pairs over edges in either direction"""
+        for chunk, marks in _in_chunks(ids):
+            for row in db.execute(f"SELECT src, tgt FROM edges WHERE src IN ({marks})", chunk):
+                yield row["src"], row["tgt"]
+            for row in db.execute(f"SELECT tgt, src FROM edges WHERE tgt IN ({marks})", chunk):
+                yield row["tgt"], row["src"]
+
+    def _edges_among(self, db, ids: List[str], limit: int = 200) -> List[Dict[str, Any]]:
+        wanted = set(ids)
+        edges = []
+        for chunk, marks in _in_chunks(ids):
+            for row in db.execute(f"SELECT * FROM edges WHERE src IN ({marks})", chunk):
+                if row["tgt"] in wanted:
+                    edges.append(self._edge(row))
+                    if len(edges) >= limit:
+                        return edges
+        return edges
+
+    def _query_subgraph(self, center_id, depth, limit):
+        with self._read() as db:
+            if not db.execute("SELECT 1 FROM entities WHERE id = ?", (center_id,)).fetchone():
+                return [], []
+            order = [center_id]
+            seen = {center_id}
+            frontier = [center_id]
+            for _ in range(max(1, depth)):
+                nxt = []
+                for _, neighbor in self._neighbor_ids(db, frontier):
+                    if neighbor not in seen and len(order) < limit:
+                        seen.add(neighbor)
+                        order.append(neighbor)
+                        nxt.append(neighbor)
+                frontier = nxt
+                if not frontier or len(order) >= limit:
+                    break
+            nodes = self._nodes_by_id(db, order)
+            return [nodes[i] for i in order if i in nodes], self._edges_among(db, order)
+
+    def _query_shortest_path(self, source_id, target_id, max_depth):
+        with self._read() as db:
+            parents = {source_id: None}
+            frontier = [source_id]
+            found = source_id == target_id
+            for _ in range(max_depth):
+                if found or not frontier:
+                    break
+                nxt = []
+                for node, neighbor in self._neighbor_ids(db, frontier):
+                    if neighbor in parents:
+                        continue
+                    parents[neighbor] = node
+                    if neighbor == target_id:
+                        found = True
+                        break
+                    nxt.append(neighbor)
+                frontier = nxt
+            if not found:
+                return [], []
+            path = []
+            node = target_id
+            while node is not None:
+                path.append(node)
+                node = parents[node]
+            path.reverse()
+            nodes = self._nodes_by_id(db, path)
+            return [nodes[i] for i in path if i in nodes], self._edges_among(db, path)
+
+    def get_papers(self, paper_ids):
+        papers = []
+        with self._read() as db:
+            for chunk, marks in _in_chunks(list(paper_ids)):
+                for row in db.execute(f"SELECT props FROM papers WHERE paper_id IN ({marks})", chunk):
+                    papers.append(json.loads(row["props"] or "{}"))
+        return papers
+
+    def search_entities(self, query, limit=50):
+        pattern = f"%{query}%"
+        with self._read() as db:
+            rows = db.execute(
+                "SELECT * FROM entities WHERE name LIKE ? OR label LIKE ? LIMIT ?",
+                (pattern, pattern, limit),
+            ).fetchall()
+        entities = []
+        for row in rows:
+            props = json.loads(row["props"] or "{}")
+            entities.append({
+                "id": row["id"],
+                "name": row["name"],
+                "type": row["label"],
+                "paper_id": props.get("paper_id"),
+                "props": props,
+            })
+        return entities
+
+    def get_papers_by_entity(self, entity_id):
+        with self._read() as db:
+            rows = db.execute(
+                "SELECT p.props FROM contains c JOIN papers p ON p.paper_id = c.paper_id "
+                "WHERE c.entity_id = ? ORDER BY p.upload_date DESC",
+                (entity_id,),
+            ).fetchall()
+        papers = []
+        for row in rows:
+            paper = json.loads(row["props"] or "{}")
+            papers.append({
+                "paper_id": paper.get("paper_id"),
+                "title": paper.get("title"),
+                "authors": paper.get("authors"),
+                "year": paper.get("year"),
+                "filename": paper.get("filename")
+            })
+        return papers
+
+    def get_graph_for_papers(self, paper_ids, limit=100):
+        marks = ",".join("?" * len(paper_ids))
+        with self._read() as db:
+            rows = db.execute(
+                f"SELECT * FROM edges WHERE paper_id IN ({marks}) ORDER BY id LIMIT ?",
+                (*paper_ids, limit),
+            ).fetchall()
+            return self._graph_from_edge_rows(db, rows)
+
+    def _query_paper_graph(self, paper_id):
+        with self._read() as db:
+            nodes = [self._node(row) for row in db.execute(
+                "SELECT e.* FROM contains c JOIN entities e ON e.id = c.entity_id WHERE c.paper_id = ?",
+                (paper_id,))]
+            edges = [self._edge(row) for row in db.execute("SELECT * FROM edges WHERE paper_id = ?", (paper_id,))]
+        return nodes, edges
+
+    def iter_entity_rows(self):
+        with self._read() as db:
+            rows = db.execute(
+                "SELECT e.id, e.name, e.label, group_concat(c.paper_id, char(31)) AS paper_ids "
+                "FROM entities e JOIN contains c ON c.entity_id = e.id GROUP BY e.id"
+            ).fetchall()
+        for row in rows:
+            yield row["id"], row["name"], row["label"], (row["paper_ids"] or "").split("\x1f")
+
+    def iter_node_rows(self):
+        with self._read() as db:
+            rows = db.execute("SELECT id, name, label FROM entities").fetchall()
+        for row in rows:
+            yield row["id"], row["name"], row["label"]
+
+    def iter_edge_rows(self):
+        with self._read() as db:
+            rows = db.execute(
+                "SELECT src, tgt, label, coalesce(json_extract(props, '$.weight'), 1.0) AS weight FROM edges"
+            ).fetchall()
+        for row in rows:
+            yield row["src"], row["tgt"], row["label"], float(row["weight"])
+
+    def _nodes_after(self, after, limit):
+        with self._read() as db:
+            rows = db.execute("SELECT rowid AS key, * FROM entities WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                              (after, limit)).fetchall()
+        return [(row["key"], self._node(row)) for row in rows]
+
+    def _edges_after(self, after, limit):
+        with self._read() as db:
+            rows = db.execute("SELECT * FROM edges WHERE id > ? ORDER BY id LIMIT ?", (after, limit)).fetchall()
+        return [(row["id"], self._edge(row)) for row in rows]
+
+    def close(self):
+        if self._shared is not None:
+            self._shared.close()
+            self._shared = None
+
+
+_store: Optional[GraphStore] = None
+_store_lock = threading.Lock()
+
+
+def create_store(backend: str = None) -> GraphStore:
+    backend = (backend or GRAPH_BACKEND).lower()
+    if backend == "neo4j":
+        return Neo4jStore()
+    if backend == "sqlite":
+        return SQLiteGraphStore(SQLITE_GRAPH_PATH)
+    if backend == "memory":
+        return SQLiteGraphStore(":memory:")
+    raise ValueError(f"Unknown GRAPH_BACKEND: {backend}")
+
+
+def get_store() -> GraphStore:
+    """The process-wide store selected by GRAPH_BACKEND"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = create_store()
+    return _store
+
+
+def set_store(store: Optional[GraphStore]):
+    """Swap the process-wide store (for tests and benchmarks)"""
+    global _store
+    _store = store
+
+
+def close_store():
+    global _store
+    if _store is not None:
+        _store.close()
+        _store = None
+
+
+async def aclose_store():
+    """close_store() that also closes the async driver, from the event loop"""
+    global _store
+    if _store is not None:
+        await _store.aclose()
+        _store = None
+
+
+def load_entity_index(store: GraphStore = None) -> int:
+    """Rebuild the in-memory entity name index from the entities papers contain"""
+    store = store or get_store()
+    index = get_entity_index()
+    index.build(store.iter_entity_rows())
+    return len(index)
+
+
+def load_graph_cache(store: GraphStore = None) -> Dict[str, Any]:
+    """Build the in-memory adjacency cache from every entity and entity relationship"""
+    cache = get_graph_cache()
+    if cache is None:
+        return {"enabled": False}
+    store = store or get_store()
+    cache.build(store.iter_node_rows(), store.iter_edge_rows())
+    return cache.stats()
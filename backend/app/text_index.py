@@ -0,0 +1,211 @@
+import math
+import os
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from .local_db import connect, data_path
+
+TEXT_INDEX_PATH = os.getenv("TEXT_INDEX_PATH") or data_path("text_index.sqlite3")
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Metadata fields count this many times towards term frequency
+FIELD_BOOST = 3
+# The last query term also matches up to this many indexed terms it prefixes
+PREFIX_EXPANSIONS = 20
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the to was were will with
+""".split())
+
+_TOKEN_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    paper_id TEXT PRIMARY KEY,
+    length INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    paper_id TEXT NOT NULL,
+    tf INTEGER NOT NULL,
+    pos INTEGER,
+    PRIMARY KEY (term, paper_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_paper ON postings (paper_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('doc_count', 0), ('total_length', 0);
+"""
+
+_initialized = set()
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens without stopwords or single characters"""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def _db():
+    conn = connect(TEXT_INDEX_PATH)
+    if TEXT_INDEX_PATH not in _initialized:
+        conn.executescript(_SCHEMA)
+        # Indexes built before term positions were recorded
+        if "pos" not in {r["name"] for r in conn.execute("PRAGMA table_info(postings)")}:
+            conn.execute("ALTER TABLE postings ADD COLUMN pos INTEGER")
+        _initialized.add(TEXT_INDEX_PATH)
+    return conn
+
+
+def _remove(conn, paper_id: str):
+    row = conn.execute("SELECT length FROM docs WHERE paper_id = ?", (paper_id,)).fetchone()
+    if row is None:
+        return
+    conn.execute("DELETE FROM postings WHERE paper_id = ?", (paper_id,))
+    conn.execute("DELETE FROM docs WHERE paper_id = ?", (paper_id,))
+    conn.execute("UPDATE meta SET value = value - 1 WHERE key = 'doc_count'")
+    conn.execute("UPDATE meta SET value = value - ? WHERE key = 'total_length'", (row["length"],))
+
+
+def index_paper(paper_id: str, text: Union[str, Iterable[str]], title: str = None,
+                authors: str = None, journal: str = None):
+    """Add or replace one paper in the index.
+
+    `text` may be a string or an iterable of chunks (pages), which are counted
+    incrementally so the full text never has to be held at once. The first
+    character offset of every term is kept so snippets can be read directly.
+    """
+    counts: Counter = Counter()
+    positions: Dict[str, int] = {}
+    offset = 0
+    for chunk in ([text] if isinstance(text, str) else text):
+        for m in _TOKEN_RE.finditer(chunk.lower()):
+            term = m.group(0)
+            if len(term) > 1 and term not in STOPWORDS:
+                counts[term] += 1
+                positions.setdefault(term, offset + m.start())
+        offset += len(chunk)
+    for field in (title, authors, journal):
+        if field:
+            for term in tokenize(field):
+                counts[term] += FIELD_BOOST
+    length = sum(counts.values())
+
+    conn = _db()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        _remove(conn, paper_id)
+        conn.executemany(
+            "INSERT INTO postings (term, paper_id, tf, pos) VALUES (?, ?, ?, ?)",
+            ((term, paper_id, tf, positions.get(term)) for term, tf in counts.items()),
+        )
+        conn.execute("INSERT INTO docs (paper_id, length) VALUES (?, ?)", (paper_id, length))
+        conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'doc_count'")
+        conn.execute("UPDATE meta SET value = value + ? WHERE key = 'total_length'", (length,))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def remove_paper(paper_id: str):
+    conn = _db()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        _remove(conn, paper_id)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def indexed_count() -> int:
+    row = _db().execute("SELECT value FROM meta WHERE key = 'doc_count'").fetchone()
+    return row["value"] if row else 0
+
+
+def _expand_prefix(conn, prefix: str) -> List[str]:
+    rows = conn.execute(
+        "SELECT DISTINCT term FROM postings WHERE term >= ? AND term < ? LIMIT ?",
+        (prefix, prefix + "\uffff", PREFIX_EXPANSIONS),
+    ).fetchall()
+    return [r["term"] for r in rows]
+
+
+def search(query: str, limit: int = 20, prefix: bool = True) -> List[Dict[str, Any]]:
+    """BM25-ranked papers matching any query term: [{"paper_id", "score", "terms", "pos"}]
+
+    `pos` is the character offset of the earliest matched term (None for
+    papers indexed before offsets were recorded).
+
+    With `prefix`, the last query term also matches indexed terms that start
+    with it, so partially typed words still find results.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms:
+        return []
+    conn = _db()
+    meta = {r["key"]: r["value"] for r in conn.execute("SELECT key, value FROM meta")}
+    n_docs = meta.get("doc_count", 0)
+    if n_docs <= 0:
+        return []
+    avgdl = max(1.0, meta.get("total_length", 0) / n_docs)
+
+    groups = [[t] for t in terms]
+    if prefix:
+        groups[-1] = list(dict.fromkeys(groups[-1] + _expand_prefix(conn, terms[-1])))
+
+    scores: Dict[str, float] = {}
+    matched: Dict[str, set] = {}
+    first: Dict[str, int] = {}
+    for group in groups:
+        for term in group:
+            rows = conn.execute(
+                "SELECT p.paper_id, p.tf, p.pos, d.length FROM postings p JOIN docs d ON d.paper_id = p.paper_id "
+                "WHERE p.term = ?",
+                (term,),
+            ).fetchall()
+            if not rows:
+                continue
+            idf = math.log(1 + (n_docs - len(rows) + 0.5) / (len(rows) + 0.5))
+            for r in rows:
+                tf = r["tf"]
+                norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * r["length"] / avgdl)
+                scores[r["paper_id"]] = scores.get(r["paper_id"], 0.0) + idf * tf * (BM25_K1 + 1) / norm
+                matched.setdefault(r["paper_id"], set()).add(term)
+                if r["pos"] is not None:
+                    first[r["paper_id"]] = min(first.get(r["paper_id"], r["pos"]), r["pos"])
+
+    ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:limit]
+    return [{"paper_id": pid, "score": round(score, 4), "terms": sorted(matched[pid]), "pos": first.get(pid)}
+            for pid, score in ranked]
+
+
+def make_snippet(text: str, terms: Iterable[str], width: int = 300, offset: int = 0,
+                 total_length: int = None) -> Dict[str, Optional[str]]:
+    """A window of `width` characters around the first matching term.
+
+    `text` may be an excerpt starting at character `offset` of a document of
+    `total_length` characters. Returns the plain snippet plus a copy with
+    matches wrapped in <mark>.
+    """
+    text = text or ""
+    terms = [t for t in terms if t]
+    pattern = re.compile(r"\b(" + "|".join(re.escape(t) for t in sorted(terms, key=len, reverse=True)) + r")\w*",
+                         re.IGNORECASE) if terms else None
+    match = pattern.search(text) if pattern else None
+    start = 0
+    if match:
+        start = max(0, match.start() - width // 3)
+    snippet = text[start:start + width].strip()
+    total_length = offset + len(text) if total_length is None else total_length
+    if offset + start > 0:
+        snippet = "..." + snippet
+    if offset + start + width < total_length:
+        snippet = snippet + "..."
+    highlighted = pattern.sub(lambda m: f"<mark>{m.group(0)}</mark>", snippet) if pattern else snippet
+    return {"text_snippet": snippet, "highlighted_snippet": highlighted}
@@ -0,0 +1,167 @@
+import mmap
+import os
+import threading
+import zlib
+from typing import Iterable, Iterator, Union
+
+from .local_db import connect, data_path
+
+try:
+    import zstandard
+except ImportError:  # optional; zlib is always available
+    zstandard = None
+
+# Paper texts live outside the graph: compressed blocks appended to one blob
+# file, located through a per-paper block index
+TEXT_STORE_DIR = os.getenv("TEXT_STORE_DIR") or data_path("text_store")
+# Characters per compressed block; a snippet only decompresses the blocks it spans
+TEXT_STORE_BLOCK_CHARS = int(os.getenv("TEXT_STORE_BLOCK_CHARS", "65536"))
+TEXT_STORE_CODEC = os.getenv("TEXT_STORE_CODEC", "zstd" if zstandard else "zlib")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blocks (
+    paper_id TEXT NOT NULL,
+    block INTEGER NOT NULL,
+    char_start INTEGER NOT NULL,
+    char_len INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    codec TEXT NOT NULL,
+    PRIMARY KEY (paper_id, block)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+"""
+
+_initialized = set()
+_write_lock = threading.Lock()
+_map_lock = threading.Lock()
+_map = None
+
+
+def _index_path() -> str:
+    return os.path.join(TEXT_STORE_DIR, "index.sqlite3")
+
+
+def _blob_path() -> str:
+    return os.path.join(TEXT_STORE_DIR, "blobs.bin")
+
+
+def _db():
+    path = _index_path()
+    conn = connect(path)
+    if path not in _initialized:
+        conn.executescript(_SCHEMA)
+        _initialized.add(path)
+    return conn
+
+
+def _compress(data: bytes) -> bytes:
+    if TEXT_STORE_CODEC == "zstd":
+        if zstandard is None:
+            raise RuntimeError("TEXT_STORE_CODEC=zstd requires the 'zstandard' package")
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return zlib.compress(data, 6)
+
+
+def _decompress(codec: str, data: bytes) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Text was stored with zstd; install the 'zstandard' package to read it")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+def _blocks(chunks: Iterable[str], size: int) -> Iterator[str]:
+    """Re-cut a stream of chunks into blocks of `size` characters"""
+    pending = ""
+    for chunk in chunks:
+        pending += chunk
+        while len(pending) >= size:
+            yield pending[:size]
+            pending = pending[size:]
+    if pending:
+        yield pending
+
+
+def _mapped(end: int) -> mmap.mmap:
+    """Read-only map of the blob file covering at least `end` bytes"""
+    global _map
+    with _map_lock:
+        if _map is None or len(_map) < end:
+            with open(_blob_path(), 'rb') as f:
+                _map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return _map
+
+
+def put_text(paper_id: str, text: Union[str, Iterable[str]]) -> int:
+    """Store (or replace) a paper's text, given as a string or an iterable of chunks.
+
+    Returns the number of characters stored. Replaced blocks stay in the blob
+    file until it is rebuilt.
+
+    Blocks are compressed first; the write then happens inside one index
+    transaction, whose lock serializes writers across threads and processes.
+    The index hands out the blob offset, so bytes left by a failed write are
+    overwritten by the next one instead of shifting later offsets.
+    """
+    os.makedirs(TEXT_STORE_DIR, exist_ok=True)
+    blocks = []
+    char_start = 0
+    for block in _blocks([text] if isinstance(text, str) else text, TEXT_STORE_BLOCK_CHARS):
+        blocks.append((char_start, len(block), _compress(block.encode("utf-8"))))
+        char_start += len(block)
+    path = _blob_path()
+    with _write_lock:
+        conn = _db()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'blob_end'").fetchone()
+            # Stores written before the index tracked the end: every byte so far is in use
+            offset = row["value"] if row else (os.path.getsize(path) if os.path.exists(path) else 0)
+            rows = []
+            with open(path, 'r+b' if os.path.exists(path) else 'w+b') as f:
+                f.seek(offset)
+                for i, (start, length, data) in enumerate(blocks):
+                    f.write(data)
+                    rows.append((paper_id, i, start, length, offset, len(data), TEXT_STORE_CODEC))
+                    offset += len(data)
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('blob_end', ?)", (offset,))
+            conn.execute("DELETE FROM blocks WHERE paper_id = ?", (paper_id,))
+            conn.executemany("INSERT INTO blocks VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    return char_start
+
+
+def get_text(paper_id: str, start: int = 0, end: int = None) -> str:
+    """Characters [start, end) of a paper's text; only the blocks in that range are read"""
+    start = max(0, start)
+    if end is not None and end <= start:
+        return ""
+    rows = _db().execute(
+        "SELECT char_start, char_len, offset, size, codec FROM blocks "
+        "WHERE paper_id = ? AND char_start + char_len > ? AND (? IS NULL OR char_start < ?) ORDER BY block",
+        (paper_id, start, end, end),
+    ).fetchall()
+    if not rows:
+        return ""
+    buf = _mapped(max(r["offset"] + r["size"] for r in rows))
+    text = "".join(_decompress(r["codec"], buf[r["offset"]:r["offset"] + r["size"]]).decode("utf-8") for r in rows)
+    base = rows[0]["char_start"]
+    return text[start - base:None if end is None else end - base]
+
+
+def text_length(paper_id: str) -> int:
+    row = _db().execute("SELECT coalesce(sum(char_len), 0) AS n FROM blocks WHERE paper_id = ?", (paper_id,)).fetchone()
+    return row["n"]
+
+
+def has_text(paper_id: str) -> bool:
+    return _db().execute("SELECT 1 FROM blocks WHERE paper_id = ? LIMIT 1", (paper_id,)).fetchone() is not None
+
+
+def remove_text(paper_id: str):
+    with _write_lock:
+        _db().execute("DELETE FROM blocks WHERE paper_id = ?", (paper_id,))
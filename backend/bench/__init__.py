@@ -0,0 +1 @@
+"""Offline benchmark suite: synthetic corpus generator, benchmarks and baseline comparison"""
@@ -0,0 +1,133 @@
+"""Compare NLP profiles: ingestion throughput and agreement with a reference profile.
+
+    python -m bench.profiles --papers-dir ../papers --out profiles.json
+
+Each profile builds the same graphs the ingestion pipeline would. Entities
+(resolved ids) and co-occurrence pairs are compared with the reference
+profile, so the speed-up of a lighter pipeline can be weighed against what it
+changes in the graph.
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Set, Tuple
+
+from .corpus import make_corpus
+
+
+def load_texts(args) -> List[str]:
+    """Paper texts from a directory of PDFs, or a synthetic corpus when none is given"""
+    if not args.papers_dir:
+        papers, _ = make_corpus(args.papers, args.sentences, seed=args.seed)
+        return [p["text"] for p in papers]
+    from app.pdf_utils import iter_pdf_pages
+    texts = []
+    for path in sorted(Path(args.papers_dir).glob("*.pdf"))[:args.papers]:
+        text = ""
+        for page in iter_pdf_pages(str(path)):
+            text += page
+            if args.max_chars and len(text) >= args.max_chars:
+                text = text[:args.max_chars]
+                break
+        texts.append(text)
+    return texts
+
+
+def agreement(found: List[Set[Any]], reference: List[Set[Any]]) -> Dict[str, float]:
+    """Micro-averaged precision, recall and F1 of `found` against `reference`"""
+    tp = sum(len(f & r) for f, r in zip(found, reference))
+    n_found = sum(len(f) for f in found)
+    n_ref = sum(len(r) for r in reference)
+    precision = tp / n_found if n_found else 1.0
+    recall = tp / n_ref if n_ref else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {"precision": round(precision, 4), "recall": round(recall, 4), "f1": round(f1, 4)}
+
+
+def run_profile(profile: str, texts: List[str], model: str, batch_size: int) -> Tuple[Dict[str, Any], List[Set[str]], List[Set[Tuple[str, str]]]]:
+    from app import nlp
+
+    started = time.perf_counter()
+    pipeline = nlp.load_pipeline(profile, model)
+    load_seconds = time.perf_counter() - started
+    nlp.set_spacy(pipeline)
+    max_chars = nlp.chunk_chars(profile)
+    pipeline("Warm-up sentence.")
+
+    entities, pairs = [], []
+    started = time.perf_counter()
+    for text in texts:
+        nodes, edges = nlp.process_chunks_to_graph(nlp.iter_text_chunks([text], max_chars=max_chars),
+                                                   batch_size=batch_size)
+        entities.append({n["id"] for n in nodes})
+        pairs.append({(e["source"], e["target"]) for e in edges})
+    seconds = time.perf_counter() - started
+    stats = {
+        "components": pipeline.pipe_names,
+        "chunk_chars": max_chars,
+        "load_seconds": round(load_seconds, 3),
+        "seconds": round(seconds, 3),
+        "docs_per_sec": round(len(texts) / seconds, 3) if seconds else None,
+        "chars_per_sec": round(sum(len(t) for t in texts) / seconds, 1) if seconds else None,
+        "entities": sum(len(e) for e in entities),
+        "edges": sum(len(p) for p in pairs),
+    }
+    return stats, entities, pairs
+
+
+def main(argv: List[str] = None) -> int:
+    from app import nlp
+
+    parser = argparse.ArgumentParser(prog="python -m bench.profiles", description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", default=",".join(nlp.NLP_PROFILES), help="comma-separated profiles to run")
+    parser.add_argument("--reference", default="full", help="profile the others are compared with")
+    parser.add_argument("--model", default=nlp.SPACY_MODEL, help="spaCy model name or path")
+    parser.add_argument("--papers-dir", help="directory of PDFs to use instead of a synthetic corpus")
+    parser.add_argument("--papers", type=int, default=20, help="papers to process")
+    parser.add_argument("--sentences", type=int, default=200, help="sentences per synthetic paper")
+    parser.add_argument("--max-chars", type=int, default=0, help="truncate each PDF's text (0 = whole text)")
+    parser.add_argument("--batch-size", type=int, default=nlp.NLP_BATCH_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="where to write the results JSON")
+    args = parser.parse_args(argv)
+
+    profiles = [p.strip() for p in args.profiles.split(",") if p.strip()]
+    for name in profiles + [args.reference]:
+        nlp.get_profile(name)
+    if args.reference not in profiles:
+        profiles.insert(0, args.reference)
+    texts = load_texts(args)
+    if not texts:
+        print("No texts to process")
+        return 1
+
+    results: Dict[str, Dict[str, Any]] = {}
+    outputs = {}
+    for profile in sorted(profiles, key=lambda p: p != args.reference):
+        stats, entities, pairs = run_profile(profile, texts, args.model, args.batch_size)
+        outputs[profile] = (entities, pairs)
+        results[profile] = stats
+    ref_entities, ref_pairs = outputs[args.reference]
+    for profile, (entities, pairs) in outputs.items():
+        results[profile]["entity_agreement"] = agreement(entities, ref_entities)
+        results[profile]["edge_agreement"] = agreement(pairs, ref_pairs)
+        results[profile]["speedup"] = round(results[args.reference]["seconds"] / results[profile]["seconds"], 2) \
+            if results[profile]["seconds"] else None
+
+    print(f"{len(texts)} papers, {sum(len(t) for t in texts)} chars, model {args.model}, reference {args.reference}")
+    for profile, stats in results.items():
+        print(f"{profile:10s} {stats['docs_per_sec']:8.2f} docs/s  x{stats['speedup']:<6} "
+              f"entity F1 {stats['entity_agreement']['f1']:.3f}  edge F1 {stats['edge_agreement']['f1']:.3f}  "
+              f"({', '.join(stats['components'])})")
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump({"model": args.model, "reference": args.reference, "papers": len(texts),
+                       "profiles": results}, f, indent=2)
+        print(f"Results written to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+"""Offline benchmarks for PDF extraction, NLP, graph writes and the read endpoints.
+
+    python -m bench --papers 20 --out bench_results.json --baseline bench_baseline.json
+
+Everything runs against a synthetic corpus and an embedded graph store in a
+temporary directory, so no network, GPU or downloaded spaCy model is needed.
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+from .corpus import make_corpus, write_pdf
+
+
+def configure_environment(workdir: str, backend: str, graph_cache: bool):
+    """Point every app store at `workdir`; must run before any `app` module is imported"""
+    os.environ["GRAPH_BACKEND"] = backend
+    os.environ["DATA_DIR"] = os.path.join(workdir, "data")
+    os.environ["PAPERS_DIR"] = os.path.join(workdir, "papers")
+    os.environ["UPLOAD_DIR"] = os.path.join(workdir, "uploads")
+    os.environ["QUERY_CACHE_ENABLED"] = "false"
+    os.environ["GRAPH_CACHE_ENABLED"] = "true" if graph_cache else "false"
+
+
+def build_ruler_pipeline(vocabulary):
+    """Blank English pipeline that tags the corpus vocabulary, so no model download is needed"""
+    import spacy
+    nlp = spacy.blank("en")
+    nlp.add_pipe("sentencizer")
+    ruler = nlp.add_pipe("entity_ruler")
+    ruler.add_patterns([{"label": etype, "pattern": name} for name, etype in vocabulary])
+    return nlp
+
+
+def summarize(samples: List[float], **extra) -> Dict[str, Any]:
+    """Latency statistics in milliseconds"""
+    ordered = sorted(samples)
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+    return {
+        "n": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered), 3),
+        "p50_ms": round(pct(0.5), 3),
+        "p95_ms": round(pct(0.95), 3),
+        "min_ms": round(ordered[0], 3),
+        "max_ms": round(ordered[-1], 3),
+        **extra,
+    }
+
+
+def measure(fn: Callable[[], Any], repeat: int, warmup: int = 1) -> List[float]:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def measure_each(fn: Callable[[Any], Any], items: List[Any]) -> List[float]:
+    samples = []
+    for item in items:
+        started = time.perf_counter()
+        fn(item)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def run_benchmarks(args) -> Dict[str, Any]:
+    workdir = tempfile.mkdtemp(prefix="kg-bench-")
+    configure_environment(workdir, args.backend, args.graph_cache)
+
+    from app import catalog, evidence, nlp, text_index, text_store
+    from app import main
+    from app.entity_resolution import resolve
+    from app.pdf_utils import extract_text_from_pdf
+    from app.storage import get_store, load_graph_cache
+
+    papers, vocabulary = make_corpus(args.papers, args.sentences, args.entity_density,
+                                     args.vocabulary, args.seed)
+    if args.spacy_model:
+        os.environ["SPACY_MODEL"] = args.spacy_model
+        nlp.SPACY_MODEL = args.spacy_model
+    else:
+        nlp.set_spacy(build_ruler_pipeline(vocabulary))
+    results: Dict[str, Any] = {}
+    chars = sum(len(p["text"]) for p in papers)
+
+    # PDF extraction
+    pdf_paths = []
+    for paper in papers[:args.pdfs]:
+        path = os.path.join(workdir, "pdfs", f"{paper['paper_id']}.pdf")
+        write_pdf(path, paper["text"])
+        pdf_paths.append(path)
+    if pdf_paths:
+        samples = measure_each(extract_text_from_pdf, pdf_paths)
+        results["pdf.extract_text"] = summarize(
+            samples, bytes=sum(os.path.getsize(p) for p in pdf_paths))
+
+    # NLP
+    graphs = {}
+
+    def parse(paper):
+        sentences = {}
+        graphs[paper["paper_id"]] = nlp.process_text_to_graph(paper["text"], sentences=sentences) + (sentences,)
+
+    samples = measure_each(parse, papers)
+    results["nlp.process_text_to_graph"] = summarize(
+        samples, chars_per_sec=round(chars / (sum(samples) / 1000), 1))
+    texts = [p["text"] for p in papers]
+    samples = measure(lambda: nlp.process_texts_to_graphs(texts), args.repeat, warmup=0)
+    results["nlp.process_texts_to_graphs"] = summarize(samples, papers=len(texts))
+
+    # Writes
+    store = get_store()
+
+    def write_graph(paper):
+        nodes, edges, _ = graphs[paper["paper_id"]]
+        store.upsert_paper(paper["paper_id"], f"{paper['paper_id']}.pdf", paper["title"],
+                           {"upload_date": datetime.now().isoformat()})
+        store.upsert_graph_with_paper(paper["paper_id"], nodes, edges)
+
+    def write_text(paper):
+        text_store.put_text(paper["paper_id"], paper["text"])
+        text_index.index_paper(paper["paper_id"], paper["text"], title=paper["title"])
+        evidence.save_sentences(paper["paper_id"], graphs[paper["paper_id"]][2])
+        catalog.upsert_paper({"paper_id": paper["paper_id"], "title": paper["title"],
+                              "filename": f"{paper['paper_id']}.pdf", "upload_date": datetime.now().isoformat()})
+
+    samples = measure_each(write_graph, papers)
+    results["store.upsert_graph_with_paper"] = summarize(
+        samples, nodes=sum(len(g[0]) for g in graphs.values()), edges=sum(len(g[1]) for g in graphs.values()))
+    results["store.index_text"] = summarize(measure_each(write_text, papers))
+    if args.graph_cache:
+        started = time.perf_counter()
+        load_graph_cache()
+        results["graph_cache.build"] = summarize([(time.perf_counter() - started) * 1000])
+
+    # Reads, through the endpoint functions
+    name, etype = vocabulary[0]
+    center = resolve(name, etype)[0]
+    other = resolve(*vocabulary[min(5, len(vocabulary) - 1)])[0]
+    paper_id = papers[0]["paper_id"]
+    word = name.split()[0].lower()
+    edges = graphs[paper_id][1]
+    evidence_ids = ",".join(edges[0]["props"]["evidence"]) if edges else "none"
+    endpoints = {
+        "GET /graph": lambda: main.read_graph(limit=100),
+        "GET /graph/{id}/expand": lambda: main.expand_node(center, depth=2, limit=100),
+        "GET /graph/path": lambda: main.shortest_path(center, other),
+        "GET /papers": lambda: main.list_papers(),
+        "GET /papers/search": lambda: main.search_papers_endpoint(f"{word} retrieval"),
+        "GET /entities/search": lambda: main.search_entities_endpoint(word[:4]),
+        "GET /entities/suggest": lambda: main.suggest_entities_endpoint(word[:3]),
+        "GET /graph/search": lambda: main.search_graph(word),
+        "GET /papers/{id}/graph": lambda: main.get_paper_graph(paper_id),
+        "GET /papers/{id}/text": lambda: main.get_paper_text(paper_id, 1000, 3000),
+        "GET /papers/{id}/evidence": lambda: main.get_paper_evidence(paper_id, evidence_ids),
+    }
+    # Async endpoints run to completion on one loop, as they would under uvicorn
+    loop = asyncio.new_event_loop()
+
+    def run(call):
+        result = call()
+        return loop.run_until_complete(result) if inspect.isawaitable(result) else result
+
+    for endpoint, call in endpoints.items():
+        results[f"endpoint.{endpoint}"] = summarize(measure(lambda: run(call), args.repeat))
+    loop.close()
+
+    store.close()
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": args.backend,
+            "graph_cache": args.graph_cache,
+            "nlp": args.spacy_model or "entity_ruler",
+            "corpus": {"papers": args.papers, "sentences": args.sentences,
+                       "entity_density": args.entity_density, "vocabulary": args.vocabulary,
+                       "seed": args.seed, "chars": chars},
+        },
+        "results": results,
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """Per-benchmark p50 ratio against a baseline run; ratios above 1 + threshold are regressions"""
+    rows = []
+    for name, current in results["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not base.get("p50_ms"):
+            continue
+        ratio = current["p50_ms"] / base["p50_ms"]
+        status = "regression" if ratio > 1 + threshold else "improvement" if ratio < 1 - threshold else "ok"
+        rows.append({"name": name, "baseline_p50_ms": base["p50_ms"], "p50_ms": current["p50_ms"],
+                     "ratio": round(ratio, 3), "status": status})
+    return rows
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench", description=__doc__.splitlines()[0])
+    parser.add_argument("--papers", type=int, default=20, help="synthetic papers to generate")
+    parser.add_argument("--sentences", type=int, default=200, help="sentences per paper")
+    parser.add_argument("--entity-density", type=float, default=2.0, help="mean entities per sentence")
+    parser.add_argument("--vocabulary", type=int, default=500, help="distinct entities in the corpus")
+    parser.add_argument("--pdfs", type=int, default=5, help="papers also rendered to PDF for extraction")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=20, help="samples per read benchmark")
+    parser.add_argument("--backend", choices=("memory", "sqlite"), default="memory")
+    parser.add_argument("--graph-cache", action="store_true", help="serve reads from the adjacency cache")
+    parser.add_argument("--spacy-model", help="installed spaCy model to use instead of the entity ruler")
+    parser.add_argument("--out", default="bench_results.json", help="where to write the results JSON")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed p50 slowdown before flagging")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit 1 when a benchmark regressed")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args)
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            report["comparison"] = compare(report, json.load(f), args.threshold)
+        regressions = [row for row in report["comparison"] if row["status"] == "regression"]
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    for name, stats in report["results"].items():
+        print(f"{name:40s} p50 {stats['p50_ms']:10.3f} ms   p95 {stats['p95_ms']:10.3f} ms   n={stats['n']}")
+    for row in report.get("comparison", []):
+        if row["status"] != "ok":
+            print(f"{row['status']:12s} {row['name']}: {row['baseline_p50_ms']} -> {row['p50_ms']} ms (x{row['ratio']})")
+    print(f"Results written to {args.out}")
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+# Local stores are configured from the environment when app modules are
+# imported, so point them at a scratch directory before any test imports one
+_tmp = tempfile.mkdtemp(prefix="kg-tests-")
+os.environ.setdefault("DATA_DIR", os.path.join(_tmp, "data"))
+os.environ.setdefault("PAPERS_DIR", os.path.join(_tmp, "papers"))
+os.environ.setdefault("GRAPH_BACKEND", "memory")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,88 @@
+import csv
+import os
+import re
+import shutil
+
+import pytest
+
+pytest.importorskip("spacy")
+
+from app import nlp  # noqa: E402
+from app.bulk_load import HEADERS, BulkWriter, bulk_load  # noqa: E402
+from bench.corpus import make_corpus, write_pdf  # noqa: E402
+from bench.run import build_ruler_pipeline  # noqa: E402
+
+
+@pytest.fixture
+def papers_dir(tmp_path):
+    papers, vocabulary = make_corpus(3, 20, seed=7)
+    previous = nlp._nlp
+    nlp.set_spacy(build_ruler_pipeline(vocabulary))
+    directory = tmp_path / "papers"
+    directory.mkdir()
+    for paper in papers:
+        write_pdf(str(directory / f"{paper['paper_id']}.pdf"), paper["text"])
+    # A second copy of one PDF resolves to the same paper id
+    shutil.copy(directory / "bench-00000.pdf", directory / "copy-of-00000.pdf")
+    yield str(directory)
+    nlp.set_spacy(previous)
+
+
+def read_rows(out_dir, kind):
+    rows = []
+    for name in sorted(os.listdir(out_dir)):
+        if re.fullmatch(rf"{kind}-[0-9]+\.csv", name):
+            with open(os.path.join(out_dir, name), newline="", encoding="utf-8") as f:
+                rows.extend(csv.reader(f))
+    return rows
+
+
+def test_bulk_load_writes_importable_shards(papers_dir, tmp_path):
+    out = str(tmp_path / "import")
+    summary = bulk_load(papers_dir, out, workers=1, shard_papers=2, local_stores=False)
+    assert summary["run"] == {"success": 3, "skipped": 1, "error": 0}
+    assert summary["total"] == {"papers": 3, "entities": summary["written"]["entities"], "shards": 2}
+
+    for kind, header in HEADERS.items():
+        with open(os.path.join(out, f"{kind}-header.csv"), newline="", encoding="utf-8") as f:
+            assert next(csv.reader(f)) == header
+        assert all(len(row) == len(header) for row in read_rows(out, kind))
+
+    papers = [row[0] for row in read_rows(out, "papers")]
+    entities = [row[0] for row in read_rows(out, "entities")]
+    assert len(papers) == len(set(papers)) == 3
+    assert len(entities) == len(set(entities)) > 0
+    for start, end, _ in read_rows(out, "contains"):
+        assert start in papers and end in entities
+    relationships = read_rows(out, "relationships")
+    assert relationships
+    for row in relationships:
+        assert row[0] in entities and row[1] in entities and row[3] in papers
+
+    script = summary["import_script"]
+    assert os.access(script, os.X_OK)
+    with open(script, encoding="utf-8") as f:
+        text = f.read()
+    for kind in HEADERS:
+        flag = "--nodes" if kind in ("papers", "entities") else "--relationships"
+        pattern = re.search(rf"{flag}='{kind}-header\.csv,([^']+)'", text).group(1)
+        matched = [n for n in os.listdir(out) if re.fullmatch(pattern, n)]
+        assert sorted(matched) == [f"{kind}-00000.csv", f"{kind}-00001.csv"]
+
+    # A rerun finds every paper committed and writes nothing
+    again = bulk_load(papers_dir, out, workers=1, shard_papers=2, local_stores=False)
+    assert again["run"] == {"success": 0, "skipped": 4, "error": 0}
+    assert again["total"]["papers"] == 3 and again["written"]["shards"] == 0
+
+
+def test_add_skips_a_paper_already_accepted(tmp_path):
+    writer = BulkWriter(str(tmp_path / "import"), shard_papers=10, local_stores=False)
+    paper = {"paper_id": "paper-1", "filename": "a.pdf", "content_hash": "1", "title": "A"}
+    nodes = [{"id": "ent-1", "name": "A", "type": "ORG", "props": {"key": "a"}}]
+    assert writer.add(paper, nodes, []) == "success"
+    assert writer.add({**paper, "filename": "b.pdf"}, nodes, []) == "skipped"
+    writer.flush()
+    assert writer.add({**paper, "filename": "c.pdf"}, nodes, []) == "skipped"
+    assert writer.stats["papers"] == 1 and writer.stats["duplicates"] == 2
+    assert read_rows(writer.out_dir, "papers")[0][:3] == ["paper-1", "A", "a.pdf"]
+    assert len(read_rows(writer.out_dir, "papers")) == 1
@@ -0,0 +1,50 @@
+import json
+import os
+
+import pytest
+
+from app import catalog
+
+
+@pytest.fixture(autouse=True)
+def catalog_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(catalog, "PAPERS_CATALOG_PATH", str(tmp_path / "papers_catalog.sqlite3"))
+
+
+def paper(n, **extra):
+    return {"paper_id": f"paper-{n}", "content_hash": f"hash-{n}", "title": f"Paper {n}",
+            "upload_date": f"2024-01-0{n}", **extra}
+
+
+def test_migrate_from_json_keeps_order_and_newer_rows(tmp_path):
+    legacy = tmp_path / "papers_index.json"
+    legacy.write_text(json.dumps({"papers": [paper(1), paper(2, title="Old title"), paper(3), {"title": "no id"}]}))
+    # Written after the legacy file, so it wins over its entry
+    catalog.upsert_paper(paper(2, title="New title"))
+
+    assert catalog.migrate_from_json(str(legacy)) == 4
+    assert not legacy.exists() and os.path.exists(str(legacy) + ".migrated")
+    assert [p["paper_id"] for p in catalog.list_papers()] == ["paper-2", "paper-1", "paper-3"]
+    assert catalog.get_paper("paper-2")["title"] == "New title"
+    assert catalog.get_by_hash("hash-3")["title"] == "Paper 3"
+    assert catalog.count_papers() == 3
+    # Nothing left to migrate on the next start
+    assert catalog.migrate_from_json(str(legacy)) == 0
+
+
+def test_unreadable_legacy_file_is_moved_aside(tmp_path):
+    legacy = tmp_path / "papers_index.json"
+    legacy.write_text("{not json")
+    assert catalog.migrate_from_json(str(legacy)) == 0
+    assert not legacy.exists() and catalog.count_papers() == 0
+
+
+def test_upsert_replaces_and_pages_in_insertion_order():
+    for n in (1, 2, 3):
+        catalog.upsert_paper(paper(n))
+    catalog.upsert_paper(paper(1, content_hash="hash-1b"))
+    assert catalog.get_by_hash("hash-1") is None
+    assert catalog.get_by_hash("hash-1b")["paper_id"] == "paper-1"
+    assert [p["paper_id"] for p in catalog.list_papers(offset=1, limit=1)] == ["paper-2"]
+    catalog.remove_paper("paper-2")
+    assert [p["paper_id"] for p in catalog.iter_papers()] == ["paper-1", "paper-3"]
@@ -0,0 +1,32 @@
+from app.entity_index import EntityNameIndex
+
+ROWS = [
+    ("e1", "Knowledge Graph", "PRODUCT", ["p1"]),
+    ("e2", "Graph Neural Network", "PRODUCT", ["p1", "p2"]),
+    ("e3", "Grapheme", "ORG", []),
+    ("e1", "Knowledge Graph", "PRODUCT", ["p3"]),
+    ("e4", "", "ORG", ["p1"]),
+]
+
+
+def test_build_matches_single_adds():
+    single = EntityNameIndex()
+    for row in ROWS:
+        single.add(*row)
+    built = EntityNameIndex()
+    built.add("old", "Obsolete", "ORG")
+    built.build(iter(ROWS))
+    assert built._keys == single._keys
+    assert len(built) == len(single) == 3
+    assert [r["id"] for r in built.prefix("gra")] == ["e1", "e2", "e3"]
+    assert built.prefix("kno")[0]["paper_count"] == 2
+    assert built.prefix("obs") == []
+
+
+def test_add_many_after_build_keeps_keys_sorted():
+    index = EntityNameIndex()
+    index.build(ROWS[:2])
+    index.add_many([("e5", "Attention", "ORG", ["p4"]), ("e6", "Zeta Graph", "ORG", [])])
+    index.add("e7", "Beta", "ORG")
+    assert index._keys == sorted(index._keys)
+    assert [r["id"] for r in index.prefix("graph")] == ["e2", "e1", "e6"]
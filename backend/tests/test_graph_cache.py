@@ -0,0 +1,77 @@
+import pytest
+
+from app import graph_cache
+from app.graph_cache import GraphCache
+from app.storage import SQLiteGraphStore, load_graph_cache
+
+NODES = [{"id": n, "name": n.upper(), "type": "ORG", "props": {"key": n}} for n in ("a", "b", "c", "d")]
+
+
+def edge(source, target, weight):
+    return {"source": source, "target": target, "label": "cooccurs_in_sentence",
+            "props": {"count": weight, "weight": weight, "evidence": []}}
+
+
+def neighbours(cache, node_id):
+    return sorted((n["id"], n["weight"], n["props"]["degree"]) for n in cache.top_neighbors(node_id, limit=10))
+
+
+@pytest.fixture(params=[50000, 1], ids=["delta", "compacted"])
+def store(request, monkeypatch):
+    monkeypatch.setattr(graph_cache, "GRAPH_CACHE_ENABLED", True)
+    monkeypatch.setattr(graph_cache, "GRAPH_CACHE_COMPACT_THRESHOLD", request.param)
+    monkeypatch.setattr(graph_cache, "_cache", None)
+    store = SQLiteGraphStore(":memory:")
+    for paper_id in ("p1", "p2"):
+        store.upsert_paper(paper_id, f"{paper_id}.pdf", paper_id)
+    load_graph_cache(store)
+    yield store
+    store.close()
+
+
+def fresh(store):
+    cache = GraphCache()
+    cache.build(store.iter_node_rows(), store.iter_edge_rows())
+    return cache
+
+
+def test_reingest_replaces_paper_edges(store):
+    cache = graph_cache.get_graph_cache()
+    store.upsert_graph_with_paper("p1", NODES, [edge("a", "b", 1), edge("b", "c", 2)])
+    store.upsert_graph_with_paper("p2", NODES[:2], [edge("a", "b", 3)])
+    # Re-ingest p1: a-b is written again and b-c is gone
+    store.upsert_graph_with_paper("p1", NODES, [edge("a", "b", 1), edge("c", "d", 1)])
+
+    assert neighbours(cache, "b") == [("a", 4.0, 1)]
+    assert neighbours(cache, "c") == [("d", 1.0, 1)]
+    for node_id in "abcd":
+        assert neighbours(cache, node_id) == neighbours(fresh(store), node_id)
+    assert cache.shortest_path("a", "c") is None
+
+
+def test_reingest_same_graph_keeps_weights(store):
+    cache = graph_cache.get_graph_cache()
+    for _ in range(3):
+        store.upsert_graph_with_paper("p1", NODES, [edge("a", "b", 2)])
+    assert neighbours(cache, "a") == [("b", 2.0, 1)]
+    assert neighbours(cache, "a") == neighbours(fresh(store), "a")
+
+
+def test_pair_keeps_each_relation_type_and_direction(store):
+    cache = graph_cache.get_graph_cache()
+    uses = {"source": "a", "target": "b", "label": "USES", "props": {"weight": 2}}
+    part_of = {"source": "b", "target": "a", "label": "PART_OF", "props": {"weight": 1}}
+    store.upsert_graph_with_paper("p1", NODES[:2], [uses, part_of])
+
+    for current in (cache, fresh(store)):
+        _, edges = current.expand("a")
+        assert sorted((e["id"], e["props"]["weight"]) for e in edges) == [("a|USES|b", 2.0), ("b|PART_OF|a", 1.0)]
+        # Both relation types link the same pair: one neighbour, their total weight
+        assert neighbours(current, "a") == [("b", 3.0, 1)]
+        assert len(current.shortest_path("b", "a")[1]) == 2
+
+    # Re-ingesting without PART_OF removes only that relation
+    store.upsert_graph_with_paper("p1", NODES[:2], [uses])
+    _, edges = cache.expand("b")
+    assert [e["id"] for e in edges] == ["a|USES|b"]
+    assert neighbours(cache, "b") == [("a", 2.0, 1)]
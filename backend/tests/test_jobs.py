@@ -0,0 +1,88 @@
+import asyncio
+import json
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app import jobs, main
+from app.jobs import JobManager, QueueFullError
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    manager = JobManager(workers=1, queue_size=2)
+    monkeypatch.setattr(main, "get_job_manager", lambda: manager)
+    yield manager
+    manager.shutdown(wait=False)
+
+
+def blocking_job(job, release, started, value):
+    job.update_progress(total=1, message="waiting")
+    started.set()
+    assert release.wait(10)
+    job.update_progress(done=1)
+    return value
+
+
+def failing_job(job):
+    raise ValueError("bad input")
+
+
+def wait_for(job, status):
+    for _ in range(200):
+        if job.status == status:
+            return
+        threading.Event().wait(0.01)
+    raise AssertionError(f"{job.kind} is {job.status}, expected {status}")
+
+
+def test_job_moves_from_queued_to_succeeded(manager):
+    release, started = threading.Event(), threading.Event()
+    job = manager.submit("test", blocking_job, release, started, 42)
+    assert job.status == jobs.QUEUED and job.started_at is None
+    manager.start()
+    assert started.wait(10)
+    assert job.status == jobs.RUNNING and job.progress == {"done": 0, "total": 1, "message": "waiting"}
+    release.set()
+    wait_for(job, jobs.SUCCEEDED)
+    assert job.result == 42 and job.progress["done"] == 1 and job.finished_at is not None
+    assert main.get_job(job.id)["result"] == 42
+
+
+def test_failed_job_records_its_error(manager):
+    manager.start()
+    job = manager.submit("test", failing_job)
+    wait_for(job, jobs.FAILED)
+    assert job.error == "bad input" and job.result is None
+    assert manager.stats()[jobs.FAILED] == 1
+
+
+def test_submit_returns_202_then_429_with_retry_after_when_full(manager):
+    # Workers are not started, so submitted jobs stay queued
+    response = asyncio.run(main.process_text({"text": "Graph databases store entities."}))
+    assert response.status_code == 202
+    body = json.loads(response.body)
+    assert body["status"] == jobs.QUEUED
+    assert main.get_job_progress(body["job_id"])["status"] == jobs.QUEUED
+    main.submit_job("test", failing_job)
+    with pytest.raises(HTTPException) as raised:
+        main.submit_job("test", failing_job)
+    assert raised.value.status_code == 429
+    assert raised.value.headers == {"Retry-After": "5"}
+    with pytest.raises(QueueFullError):
+        manager.submit("test", failing_job)
+    assert manager.stats()[jobs.QUEUED] == 2
+
+
+def test_shutdown_stops_idle_workers(manager):
+    manager.start()
+    threads = list(manager._threads)
+    job = manager.submit("test", lambda job: "done")
+    wait_for(job, jobs.SUCCEEDED)
+    manager.shutdown(wait=True)
+    assert not any(t.is_alive() for t in threads)
+    # Restarting after a shutdown runs new work again
+    manager.start()
+    job = manager.submit("test", lambda job: "again")
+    wait_for(job, jobs.SUCCEEDED)
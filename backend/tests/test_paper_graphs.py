@@ -0,0 +1,25 @@
+from app import paper_graphs
+from app.storage import SQLiteGraphStore
+
+NODES = [{"id": n, "name": n.upper(), "type": "ORG", "props": {"key": n}} for n in ("a", "b", "c")]
+EDGES = [
+    {"source": "a", "target": "b", "label": "USES", "props": {"weight": 1}},
+    {"source": "b", "target": "c", "label": "cooccurs_in_sentence", "props": {"weight": 2}},
+    # No such entity: the store skips the edge
+    {"source": "c", "target": "x", "label": "USES", "props": {"weight": 1}},
+]
+
+
+def test_snapshot_has_the_store_edge_ids(tmp_path, monkeypatch):
+    monkeypatch.setattr(paper_graphs, "PAPER_GRAPHS_PATH", str(tmp_path / "paper_graphs.sqlite3"))
+    store = SQLiteGraphStore(":memory:")
+    try:
+        store.upsert_paper("p1", "p1.pdf", "P1")
+        store.upsert_graph_with_paper("p1", NODES, EDGES)
+        _, snapshot_edges = paper_graphs.get_graph("p1")
+        _, live_edges = paper_graphs.order_graph(*store._query_paper_graph("p1"))
+        assert [e["id"] for e in snapshot_edges] == [e["id"] for e in live_edges]
+        assert len(snapshot_edges) == 2
+        assert store.get_paper_graph("p1")["edges"] == snapshot_edges
+    finally:
+        store.close()
@@ -0,0 +1,70 @@
+import pytest
+
+pytest.importorskip("spacy")
+
+from app import evidence, nlp, papers_manager, storage  # noqa: E402
+from app.storage import SQLiteGraphStore  # noqa: E402
+from bench.corpus import make_corpus, write_pdf  # noqa: E402
+from bench.run import build_ruler_pipeline  # noqa: E402
+
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    papers, vocabulary = make_corpus(4, 15, seed=11)
+    pipeline = build_ruler_pipeline(vocabulary)
+    previous = nlp._nlp
+    nlp.set_spacy(pipeline)
+    store = SQLiteGraphStore(":memory:")
+    storage.set_store(store)
+    # Each test parses from scratch
+    monkeypatch.setattr(papers_manager, "PAPERS_CACHE_DIR", str(tmp_path / "cache"))
+    directory = tmp_path / "papers"
+    directory.mkdir()
+    for paper in papers:
+        write_pdf(str(directory / f"{paper['paper_id']}.pdf"), paper["text"])
+    yield str(directory), pipeline
+    storage.set_store(None)
+    store.close()
+    nlp.set_spacy(previous)
+
+
+def test_sequential_ingestion_batches_papers_through_one_pipe(corpus, monkeypatch):
+    directory, pipeline = corpus
+    calls = []
+    pipe = pipeline.pipe
+
+    def counting_pipe(*args, **kwargs):
+        # spaCy re-enters pipe() for the untupled texts; count the outer call
+        if kwargs.get("as_tuples"):
+            calls.append(kwargs.get("batch_size"))
+        return pipe(*args, **kwargs)
+
+    monkeypatch.setattr(pipeline, "pipe", counting_pipe)
+    results = list(papers_manager.iter_process_papers_directory(directory, workers=1, batch_size=4, force=True))
+    assert sorted(r["status"] for r in results) == ["success"] * 4
+    assert calls == [4]
+    for r in results:
+        graph = storage.get_store().get_paper_graph(r["paper_id"], limit=10000)
+        edges = graph["edges"]
+        assert graph["nodes"] and edges
+        cited = {sid for e in edges for sid in e["props"]["evidence"]}
+        assert set(evidence.get_sentences(r["paper_id"], cited)) == cited
+
+
+def test_parse_failure_is_reported_for_its_own_paper(corpus, monkeypatch):
+    directory, _ = corpus
+    broken = papers_manager.compute_content_hash(f"{directory}/bench-00001.pdf")
+    read_pages = papers_manager.iter_cached_pages
+
+    def pages(content_hash, *args, **kwargs):
+        for i, page in enumerate(read_pages(content_hash, *args, **kwargs)):
+            if content_hash == broken and i == 0:
+                raise OSError("unreadable cache")
+            yield page
+
+    monkeypatch.setattr(papers_manager, "iter_cached_pages", pages)
+    results = {r["filename"]: r for r in papers_manager.iter_process_papers_directory(directory, workers=1,
+                                                                                     force=True)}
+    assert results["bench-00001.pdf"]["status"] == "error"
+    assert "unreadable cache" in results["bench-00001.pdf"]["error"]
+    assert [r["status"] for name, r in sorted(results.items()) if name != "bench-00001.pdf"] == ["success"] * 3
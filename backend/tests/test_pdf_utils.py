@@ -0,0 +1,21 @@
+import time
+
+from pdfminer.layout import LTPage
+
+from app.pdf_utils import iter_pdf_pages
+from bench.corpus import write_pdf
+
+
+def test_slow_layout_analysis_skips_the_page(tmp_path, monkeypatch):
+    path = str(tmp_path / "short.pdf")
+    write_pdf(path, "A short page of text.", lines_per_page=1)
+    assert [p.strip() for p in iter_pdf_pages(path, page_timeout=5)] == ["A short page of text."]
+
+    analyze = LTPage.analyze
+
+    def slow_analyze(self, laparams):
+        time.sleep(0.3)
+        return analyze(self, laparams)
+
+    monkeypatch.setattr(LTPage, "analyze", slow_analyze)
+    assert list(iter_pdf_pages(path, page_timeout=0.1)) == [""]
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from app.query_cache import QueryCache
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_concurrent_misses_share_one_computation():
+    async def main():
+        cache = QueryCache(maxsize=8, ttl=60)
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"nodes": [1]}
+
+        results = await asyncio.gather(*(cache.aget_or_compute("graph", {"limit": 1}, compute) for _ in range(5)))
+        assert results == [{"nodes": [1]}] * 5
+        assert await cache.aget_or_compute("graph", {"limit": 1}, compute) == {"nodes": [1]}
+        assert len(calls) == 1
+        assert (cache.counters["misses"], cache.counters["coalesced"], cache.counters["hits"]) == (1, 4, 1)
+
+    run(main())
+
+
+def test_cancelled_leader_does_not_fail_waiters():
+    async def main():
+        cache = QueryCache(maxsize=8, ttl=60)
+        started = asyncio.Event()
+
+        async def compute():
+            started.set()
+            await asyncio.sleep(0.05)
+            return "value"
+
+        leader = asyncio.ensure_future(cache.aget_or_compute("graph", {}, compute))
+        await started.wait()
+        waiter = asyncio.ensure_future(cache.aget_or_compute("graph", {}, compute))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        assert await waiter == "value"
+        # The computation finished and was stored for later requests
+        assert cache.stats()["size"] == 1
+
+    run(main())
+
+
+def test_failure_reaches_every_waiter_and_is_not_cached():
+    async def main():
+        cache = QueryCache(maxsize=8, ttl=60)
+
+        async def compute():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(*(cache.aget_or_compute("graph", {}, compute) for _ in range(3)),
+                                       return_exceptions=True)
+        assert all(isinstance(r, ValueError) for r in results)
+        assert cache.stats()["size"] == 0
+
+    run(main())
+
+
+def test_write_during_computation_is_not_stored():
+    async def main():
+        cache = QueryCache(maxsize=8, ttl=60)
+
+        async def compute():
+            cache.bump()
+            return "stale"
+
+        assert await cache.aget_or_compute("graph", {}, compute) == "stale"
+        assert cache.stats()["size"] == 0
+
+    run(main())
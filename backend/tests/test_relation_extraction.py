@@ -0,0 +1,170 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+tokenizers = pytest.importorskip("tokenizers")
+
+from app import relation_extraction  # noqa: E402
+from app.nlp import _GraphBuilder, extract_entities  # noqa: E402
+from app.relation_extraction import RelationExtractor, parse_triplets  # noqa: E402
+
+SPECIAL = ["<pad>", "<s>", "</s>", "<unk>", "<triplet>", "<subj>", "<obj>"]
+WORDS = ("aspirin inhibits cox Aspirin COX . part of treats pain headache paris is in france "
+         "a b c d e f g h the and").split()
+
+
+def tiny_tokenizer():
+    """Word-level tokenizer over a fixed vocabulary, with REBEL's marker tokens"""
+    vocab = {w: i for i, w in enumerate(dict.fromkeys(SPECIAL + WORDS))}
+    model = tokenizers.models.WordLevel(vocab, unk_token="<unk>")
+    tok = tokenizers.Tokenizer(model)
+    tok.pre_tokenizer = tokenizers.pre_tokenizers.WhitespaceSplit()
+    return transformers.PreTrainedTokenizerFast(
+        tokenizer_object=tok, bos_token="<s>", eos_token="</s>", pad_token="<pad>", unk_token="<unk>",
+        additional_special_tokens=["<triplet>", "<subj>", "<obj>"],
+    )
+
+
+def tiny_model(tokenizer):
+    """Randomly initialized two-layer BART; its output is noise but it runs generate()"""
+    torch.manual_seed(0)
+    config = transformers.BartConfig(
+        vocab_size=len(tokenizer), d_model=16, encoder_layers=1, decoder_layers=1,
+        encoder_attention_heads=2, decoder_attention_heads=2, encoder_ffn_dim=32, decoder_ffn_dim=32,
+        max_position_embeddings=64, pad_token_id=tokenizer.pad_token_id, bos_token_id=tokenizer.bos_token_id,
+        eos_token_id=tokenizer.eos_token_id, decoder_start_token_id=tokenizer.eos_token_id,
+    )
+    return transformers.BartForConditionalGeneration(config)
+
+
+class ScriptedExtractor(RelationExtractor):
+    """Runs the tiny model, then answers with a fixed REBEL output per sentence"""
+
+    def __init__(self, outputs, **kwargs):
+        tokenizer = tiny_tokenizer()
+        super().__init__(model_name="tiny-bart", model=tiny_model(tokenizer), tokenizer=tokenizer, **kwargs)
+        self.outputs = outputs
+        self.generated_batches = []
+
+    def _generate(self, texts):
+        generated = super()._generate(texts)
+        assert len(generated) == len(texts) and all(isinstance(g, str) for g in generated)
+        self.generated_batches.append(list(texts))
+        return [self.outputs.get(text, "") for text in texts]
+
+
+@pytest.fixture(autouse=True)
+def small_generation(monkeypatch):
+    monkeypatch.setattr(relation_extraction, "RELATION_MAX_OUTPUT_TOKENS", 8)
+
+
+def test_parse_triplets():
+    generated = "<s><triplet> aspirin <subj> cox <obj> inhibits <subj> pain <obj> treats</s><pad>"
+    assert parse_triplets(generated) == [
+        {"head": "aspirin", "tail": "cox", "relation": "inhibits"},
+        {"head": "aspirin", "tail": "pain", "relation": "treats"},
+    ]
+
+
+def test_extract_returns_parsed_triplets():
+    extractor = ScriptedExtractor({"aspirin inhibits cox": "<triplet> aspirin <subj> cox <obj> inhibits"})
+    try:
+        assert extractor.extract(["aspirin inhibits cox", "the"]) == [
+            [{"head": "aspirin", "tail": "cox", "relation": "inhibits"}],
+            [],
+        ]
+        assert extractor.extract([]) == []
+    finally:
+        extractor.close()
+
+
+def test_length_sorted_batches_keep_input_order(monkeypatch):
+    monkeypatch.setattr(relation_extraction, "RELATION_BATCH_SIZE", 2)
+    # Lengths deliberately out of order: 5, 1, 3, 7, 2, 4 words
+    sentences = ["a b c d e", "a", "a b c", "a b c d e f g", "a b", "a b c d"]
+    outputs = {s: f"<triplet> h{i} <subj> t{i} <obj> r{i}" for i, s in enumerate(sentences)}
+    extractor = ScriptedExtractor(outputs, workers=2)
+    try:
+        batches = extractor.batches(sentences)
+        assert sorted(i for batch in batches for i in batch) == list(range(len(sentences)))
+        assert all(len(batch) <= 2 for batch in batches)
+        lengths = [len(s.split()) for s in sentences]
+        flat = [lengths[i] for batch in batches for i in batch]
+        assert flat == sorted(flat)
+        results = extractor.extract(sentences)
+        assert [r[0]["relation"] for r in results] == [f"r{i}" for i in range(len(sentences))]
+        assert len(extractor.generated_batches) == len(batches)
+    finally:
+        extractor.close()
+
+
+def test_graph_builder_adds_directed_relation_edge():
+    spacy = pytest.importorskip("spacy")
+    nlp = spacy.blank("en")
+    nlp.add_pipe("sentencizer")
+    nlp.add_pipe("entity_ruler").add_patterns([
+        {"label": "PRODUCT", "pattern": "Aspirin"},
+        {"label": "PRODUCT", "pattern": "COX"},
+    ])
+    text = "COX is blocked . Aspirin inhibits COX ."
+    sentence = "Aspirin inhibits COX ."
+    extractor = ScriptedExtractor({sentence: "<triplet> Aspirin <subj> COX <obj> inhibits"})
+    try:
+        doc = nlp(text)
+        ids = {e["name"]: e["id"] for e in extract_entities(text, doc=doc)}
+        builder = _GraphBuilder(relations=extractor)
+        builder.add_doc(doc)
+        nodes, edges = builder.result()
+    finally:
+        extractor.close()
+    assert {n["id"] for n in nodes} == set(ids.values())
+    relation = [e for e in edges if e["label"] == "inhibits"]
+    assert len(relation) == 1
+    edge = relation[0]
+    # Direction follows the triplet, not the id order of co-occurrence edges
+    assert (edge["source"], edge["target"]) == (ids["Aspirin"], ids["COX"])
+    assert edge["props"]["count"] == 1
+    assert edge["props"]["weight"] == 1
+    assert edge["props"]["relation"] == "inhibits"
+    [sid] = edge["props"]["evidence"]
+    assert builder.sentences[sid] == sentence
+    assert builder.relation_edges == [edge]
+
+
+def test_graph_from_doc_keeps_relation_evidence(monkeypatch):
+    spacy = pytest.importorskip("spacy")
+    from app import nlp as nlp_module
+    pipeline = spacy.blank("en")
+    pipeline.add_pipe("sentencizer")
+    pipeline.add_pipe("entity_ruler").add_patterns([
+        {"label": "PRODUCT", "pattern": "Aspirin"},
+        {"label": "PRODUCT", "pattern": "COX"},
+    ])
+    # With one evidence sentence per co-occurrence edge, the second sentence
+    # is only cited by the relation edge, so it is interned by result()
+    monkeypatch.setattr(nlp_module, "NLP_MAX_EVIDENCE", 1)
+    monkeypatch.setattr(nlp_module, "RELATION_EXTRACTION", True)
+    extractor = ScriptedExtractor({"Aspirin inhibits COX .": "<triplet> Aspirin <subj> COX <obj> inhibits"})
+    relation_extraction.set_relation_extractor(extractor)
+    try:
+        sentences = {}
+        _, edges = nlp_module.graph_from_doc(pipeline("COX and Aspirin . Aspirin inhibits COX ."),
+                                             sentences=sentences)
+    finally:
+        relation_extraction.set_relation_extractor(None)
+        extractor.close()
+    cited = {sid for e in edges for sid in e["props"]["evidence"]}
+    assert len(cited) == 2
+    assert cited <= set(sentences)
+
+
+def test_extractors_are_cached_per_model(monkeypatch):
+    monkeypatch.setattr(relation_extraction, "_extractor", None)
+    monkeypatch.setattr(relation_extraction, "_extractors", {})
+    default = relation_extraction.get_relation_extractor()
+    other = relation_extraction.get_relation_extractor("other/model")
+    # Asking for another model leaves the shared one open and in place
+    assert other is not default and other.model_name == "other/model"
+    assert relation_extraction.get_relation_extractor() is default
+    assert relation_extraction.get_relation_extractor(default.model_name) is default
+    assert relation_extraction.get_relation_extractor("other/model") is other
@@ -0,0 +1,78 @@
+import pytest
+
+from app import paper_graphs
+from app.storage import SQLiteGraphStore, create_store
+
+NODES = [{"id": n, "name": name, "type": kind, "props": {"key": n}}
+         for n, name, kind in (("a", "Aspirin", "PRODUCT"), ("b", "COX", "PRODUCT"),
+                               ("c", "Bayer", "ORG"), ("d", "Pain", "CONDITION"))]
+
+
+def edge(source, target, label="cooccurs_in_sentence", weight=1):
+    return {"source": source, "target": target, "label": label, "props": {"count": weight, "weight": weight}}
+
+
+def load(store):
+    for paper_id in ("p1", "p2"):
+        store.upsert_paper(paper_id, f"{paper_id}.pdf", f"Paper {paper_id}", {"authors": "A. Author"})
+    store.upsert_graph_with_paper("p1", NODES[:3], [edge("a", "b", "inhibits"), edge("a", "c")])
+    store.upsert_graph_with_paper("p2", NODES, [edge("a", "b", weight=2), edge("b", "d")])
+    # Re-ingesting p1 replaces its a-c edge
+    store.upsert_graph_with_paper("p1", NODES[:3], [edge("a", "b", "inhibits"), edge("b", "c")])
+
+
+def graph_view(graph):
+    nodes, edges = graph
+    return (sorted(n["id"] for n in nodes),
+            sorted((e["source"], e["label"], e["target"], e["props"].get("paper_id")) for e in edges))
+
+
+def answers(store):
+    """What each read returns, with store-assigned ids left out"""
+    return {
+        "papers": sorted((p["paper_id"], p["title"]) for p in store.get_papers(["p1", "p2", "missing"])),
+        "search": sorted(e["id"] for e in store.search_entities("cox")),
+        "by_entity": sorted(p["paper_id"] for p in store.get_papers_by_entity("d")),
+        "paper_graph": graph_view(store._query_paper_graph("p1")),
+        "for_papers": graph_view(store.get_graph_for_papers(["p2"])),
+        "subgraph": graph_view(store.get_subgraph("c", depth=2)),
+        "path": graph_view(store.get_shortest_path("c", "d")),
+        "nodes": sorted(store.iter_node_rows()),
+        "edges": sorted(store.iter_edge_rows()),
+    }
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path, monkeypatch):
+    monkeypatch.setattr(paper_graphs, "PAPER_GRAPH_SNAPSHOTS", False)
+    store = create_store("memory") if request.param == "memory" else SQLiteGraphStore(str(tmp_path / "graph.db"))
+    yield store
+    store.close()
+
+
+def test_backend_answers(store):
+    load(store)
+    found = answers(store)
+    assert found["papers"] == [("p1", "Paper p1"), ("p2", "Paper p2")]
+    assert found["search"] == ["b"]
+    assert found["by_entity"] == ["p2"]
+    assert found["paper_graph"] == (["a", "b", "c"], [("a", "inhibits", "b", "p1"),
+                                                      ("b", "cooccurs_in_sentence", "c", "p1")])
+    # Like the Cypher query, only entities on one of the paper's edges
+    assert found["for_papers"][0] == ["a", "b", "d"]
+    assert ("a", "cooccurs_in_sentence", "c", "p1") not in found["subgraph"][1]
+    assert found["path"][0] == ["b", "c", "d"]
+    assert len(found["edges"]) == 4
+
+
+def test_memory_and_file_backends_agree(tmp_path, monkeypatch):
+    monkeypatch.setattr(paper_graphs, "PAPER_GRAPH_SNAPSHOTS", False)
+    memory, sqlite = create_store("memory"), SQLiteGraphStore(str(tmp_path / "graph.db"))
+    try:
+        for store in (memory, sqlite):
+            load(store)
+        assert (memory.name, sqlite.name) == ("memory", "sqlite")
+        assert answers(memory) == answers(sqlite)
+    finally:
+        memory.close()
+        sqlite.close()
@@ -0,0 +1,52 @@
+import pytest
+
+from app import text_index
+
+
+@pytest.fixture(autouse=True)
+def index_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(text_index, "TEXT_INDEX_PATH", str(tmp_path / "text_index.sqlite3"))
+
+
+def ids(hits):
+    return [h["paper_id"] for h in hits]
+
+
+def test_bm25_ranks_by_frequency_rarity_and_length():
+    text_index.index_paper("dense", "graph graph graph database")
+    text_index.index_paper("sparse", "graph database storage engine with many other words about indexing")
+    text_index.index_paper("other", "neural networks for vision")
+    assert ids(text_index.search("graph", prefix=False)) == ["dense", "sparse"]
+    # "neural" is in one paper and "database" in two, so "neural" carries more weight
+    hits = text_index.search("database neural", prefix=False)
+    assert ids(hits)[0] == "other"
+    assert hits[0]["terms"] == ["neural"]
+    assert text_index.search("the of", prefix=False) == []
+
+
+def test_metadata_fields_are_boosted():
+    text_index.index_paper("body", "a survey of knowledge methods")
+    text_index.index_paper("titled", "a survey of methods", title="Knowledge")
+    assert ids(text_index.search("knowledge", prefix=False)) == ["titled", "body"]
+
+
+def test_prefix_expands_only_the_last_term():
+    text_index.index_paper("p1", "transformers for translation")
+    text_index.index_paper("p2", "transport networks")
+    assert sorted(ids(text_index.search("trans"))) == ["p1", "p2"]
+    assert ids(text_index.search("trans", prefix=False)) == []
+    # Only the last term is a prefix; earlier terms must match whole
+    assert ids(text_index.search("transl networks")) == ["p2"]
+    hits = text_index.search("networks transl")
+    assert sorted(ids(hits)) == ["p1", "p2"]
+    assert {h["paper_id"]: h["terms"] for h in hits} == {"p1": ["translation"], "p2": ["networks"]}
+
+
+def test_reindex_and_remove_keep_counts_and_positions():
+    text_index.index_paper("p1", ["first page ", "graph on the second page"])
+    [hit] = text_index.search("graph")
+    assert hit["pos"] == len("first page ")
+    text_index.index_paper("p1", "no longer about it")
+    assert text_index.search("graph") == [] and text_index.indexed_count() == 1
+    text_index.remove_paper("p1")
+    assert text_index.indexed_count() == 0 and text_index.search("longer") == []
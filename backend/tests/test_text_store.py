@@ -0,0 +1,40 @@
+import multiprocessing
+
+import pytest
+
+from app import text_store
+
+
+@pytest.fixture(autouse=True)
+def store_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(text_store, "TEXT_STORE_DIR", str(tmp_path))
+    # The blob map is per process, not per directory
+    monkeypatch.setattr(text_store, "_map", None)
+    return str(tmp_path)
+
+
+def _write_papers(store_dir: str, prefix: str, count: int):
+    text_store.TEXT_STORE_DIR = store_dir
+    text_store.TEXT_STORE_BLOCK_CHARS = 256
+    for i in range(count):
+        text_store.put_text(f"{prefix}-{i}", [f"{prefix} paper {i} " * 50, "end"])
+
+
+def test_concurrent_processes_append_without_overlap(store_dir):
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=_write_papers, args=(store_dir, f"w{n}", 40)) for n in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(60)
+        assert worker.exitcode == 0
+    for n in range(3):
+        for i in range(40):
+            assert text_store.get_text(f"w{n}-{i}") == f"w{n} paper {i} " * 50 + "end"
+
+
+def test_replaced_text_reads_back():
+    assert text_store.put_text("p", "first version") == 13
+    assert text_store.put_text("p", "second") == 6
+    assert text_store.get_text("p") == "second"
+    assert text_store.get_text("p", 1, 4) == "eco"
@@ -1,6 +1,16 @@
 import React, { useState } from 'react';
 import axios from 'axios';
 
+// Uploads and text processing run as background jobs; poll until one finishes
+async function waitForJob(apiBase, jobId, intervalMs = 1000) {
+  for (;;) {
+    const res = await axios.get(`${apiBase}/jobs/${jobId}`);
+    if (res.data.status === 'succeeded') return res.data.result;
+    if (res.data.status === 'failed') throw new Error(res.data.error || 'Job failed');
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+}
+
 export default function UploadForm({ onProcessed, apiBase }) {
   const [file, setFile] = useState(null);
   const [loading, setLoading] = useState(false);
@@ -14,10 +24,12 @@ export default function UploadForm({ onProcessed, apiBase }) {
       const up = await axios.post(`${apiBase}/upload-pdf`, form, {
         headers: { 'Content-Type': 'multipart/form-data' },
       });
-      const text = (await up).data.text_snippet || '';
+      const uploaded = await waitForJob(apiBase, up.data.job_id);
+      const text = uploaded.text_snippet || '';
       // For demo, send full file text to process-text; ideally the backend should extract and persist
       const res = await axios.post(`${apiBase}/process-text`, { text: text });
-      onProcessed(res.data.nodes, res.data.edges);
+      const graph = await waitForJob(apiBase, res.data.job_id);
+      onProcessed(graph.nodes, graph.edges);
     } catch (err) {
       console.error(err);
       // More user-friendly error message that provides guidance